@@ -13,8 +13,27 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 自定义 CSS
-st.markdown("""
+# 平台特性卡片：(图标, 指标, 名称, 说明)
+METRIC_CARDS = [
+    ("🛠️", "2+", "可用工具", "持续增加中"),
+    ("⚡", "&lt;2s", "平均响应", "快速高效"),
+    ("🔐", "企业级", "安全标准", "最高保护"),
+    ("💰", "免费", "使用成本", "零投入")
+]
+
+
+@st.cache_resource
+def landing_html():
+    """
+    拼接首页的静态 HTML（样式、标题、特性卡片、页脚），每个进程只生成一次
+
+    四张特性卡片合并为一个 CSS 网格块，不再为每张卡片创建一列和一个元素，
+    每次访问首页发送和渲染的元素更少
+
+    Returns:
+        {'header': str, 'metrics': str, 'footer': str}
+    """
+    header = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -37,6 +56,11 @@ st.markdown("""
         box-shadow: 0 4px 12px rgba(102, 126, 234, 0.15);
         transform: translateY(-2px);
     }
+    .metric-grid {
+        display: grid;
+        grid-template-columns: repeat(4, 1fr);
+        gap: 1rem;
+    }
     .metric-card {
         text-align: center;
         padding: 1rem;
@@ -45,11 +69,32 @@ st.markdown("""
         color: white;
     }
 </style>
-""", unsafe_allow_html=True)
+<h1 class="main-header">🛠️ DevOps 工具集</h1>
+<p style="text-align: center; font-size: 1.2rem; color: #666;">提升团队效率的 DevOps 自动化工具平台</p>
+"""
+    metrics = '<div class="metric-grid">' + "".join(
+        f'<div class="metric-card"><h2>{icon}</h2><h3>{value}</h3><p>{name}</p><small>{note}</small></div>'
+        for icon, value, name, note in METRIC_CARDS
+    ) + '</div>'
+    footer = """
+<div style="text-align: center; color: #666; padding: 2rem 0;">
+    <p style="font-size: 1.1rem; margin-bottom: 0.5rem;">🛠️ DevOps 工具集 v2.0.0</p>
+    <p style="margin-bottom: 0.5rem;">Powered by <strong>Streamlit</strong> | Built with ❤️ by DevOps Team</p>
+    <p style="font-size: 0.9rem;">👩‍💻 维护者: Daisy Liu | 📧 daisy.liu@qima.com</p>
+    <p style="font-size: 0.8rem; margin-top: 1rem; color: #999;">
+        © 2025 QIMA. All rights reserved. | 
+        <a href="https://github.com/Daisy-liu822/jiraWeb" target="_blank" style="color: #667eea;">GitHub</a> | 
+        <a href="mailto:daisy.liu@qima.com" style="color: #667eea;">Support</a>
+    </p>
+</div>
+"""
+    return {'header': header, 'metrics': metrics, 'footer': footer}
+
 
-# 主标题
-st.markdown('<h1 class="main-header">🛠️ DevOps 工具集</h1>', unsafe_allow_html=True)
-st.markdown('<p style="text-align: center; font-size: 1.2rem; color: #666;">提升团队效率的 DevOps 自动化工具平台</p>', unsafe_allow_html=True)
+content = landing_html()
+
+# 样式和主标题
+st.markdown(content['header'], unsafe_allow_html=True)
 st.markdown("---")
 
 # 工具展示区
@@ -117,47 +162,7 @@ with col2:
 st.markdown("---")
 st.markdown("## ✨ 平台特性")
 
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    st.markdown("""
-    <div class="metric-card">
-        <h2>🛠️</h2>
-        <h3>2+</h3>
-        <p>可用工具</p>
-        <small>持续增加中</small>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    st.markdown("""
-    <div class="metric-card">
-        <h2>⚡</h2>
-        <h3>&lt;2s</h3>
-        <p>平均响应</p>
-        <small>快速高效</small>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col3:
-    st.markdown("""
-    <div class="metric-card">
-        <h2>🔐</h2>
-        <h3>企业级</h3>
-        <p>安全标准</p>
-        <small>最高保护</small>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col4:
-    st.markdown("""
-    <div class="metric-card">
-        <h2>💰</h2>
-        <h3>免费</h3>
-        <p>使用成本</p>
-        <small>零投入</small>
-    </div>
-    """, unsafe_allow_html=True)
+st.markdown(content['metrics'], unsafe_allow_html=True)
 
 # 快速开始指南
 st.markdown("---")
@@ -389,18 +394,7 @@ with st.expander("📋 版本更新日志"):
 
 # 页脚
 st.markdown("---")
-st.markdown("""
-<div style="text-align: center; color: #666; padding: 2rem 0;">
-    <p style="font-size: 1.1rem; margin-bottom: 0.5rem;">🛠️ DevOps 工具集 v2.0.0</p>
-    <p style="margin-bottom: 0.5rem;">Powered by <strong>Streamlit</strong> | Built with ❤️ by DevOps Team</p>
-    <p style="font-size: 0.9rem;">👩‍💻 维护者: Daisy Liu | 📧 daisy.liu@qima.com</p>
-    <p style="font-size: 0.8rem; margin-top: 1rem; color: #999;">
-        © 2025 QIMA. All rights reserved. | 
-        <a href="https://github.com/Daisy-liu822/jiraWeb" target="_blank" style="color: #667eea;">GitHub</a> | 
-        <a href="mailto:daisy.liu@qima.com" style="color: #667eea;">Support</a>
-    </p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(content['footer'], unsafe_allow_html=True)
 
 # 侧边栏信息
 with st.sidebar:
@@ -0,0 +1,9 @@
+"""
+命令行入口: python -m modules ...
+"""
+
+import sys
+
+from modules.cli import main
+
+sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+ArgoCD 客户端基准测试模块
+针对本地模拟服务（modules.argocd_mock）测量 get_service_images 的单次延迟和
+query_multiple_services 在不同服务数、并发数下的批量耗时，每个场景输出一条 JSON 记录，
+可与之前保存的输出对比（--baseline）
+
+用法示例：
+    python -m modules bench-argocd > bench_before.jsonl
+    python -m modules bench-argocd --services 50,200 --concurrency 1,8,16 --latency-ms 30 --baseline bench_before.jsonl
+"""
+
+import logging
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from modules.argocd_client import ArgoCDClient
+from modules.argocd_mock import MockArgoCDServer
+from modules.benchmark import summarize_latencies
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_TOKEN = "benchmark.token.local"
+
+# 标识同一场景的字段和对比的指标（用于 attach_baseline）
+SCENARIO_KEYS = ('operation', 'services', 'concurrency', 'latency_ms_injected', 'jitter_ms_injected', 'failure_rate',
+                 'failure_status', 'manifests_per_app', 'manifest_bytes')
+COMPARED_METRICS = {
+    'p50_ms': ('latency_ms', 'p50'),
+    'p95_ms': ('latency_ms', 'p95'),
+    'throughput': ('throughput',)
+}
+
+
+def _client_for(server: MockArgoCDServer, environment: str = "preprod") -> ArgoCDClient:
+    client = ArgoCDClient(environment, BENCHMARK_TOKEN)
+    client.server_url = server.url
+    return client
+
+
+def bench_service_images(server: MockArgoCDServer, samples: int, warmup: int = 1) -> Dict:
+    """
+    顺序调用 get_service_images，测量单次延迟
+
+    Args:
+        server: 已启动的模拟服务
+        samples: 调用次数（按顺序轮流使用服务列表）
+        warmup: 不计入统计的预热调用次数
+
+    Returns:
+        场景记录
+    """
+    client = _client_for(server)
+    services = server.services
+    for i in range(warmup):
+        try:
+            client.get_service_images(services[i % len(services)])
+        except Exception:
+            pass
+    server.reset_counts()
+
+    latencies = []
+    failed = 0
+    wrong_tags = 0
+    started = time.perf_counter()
+    for i in range(samples):
+        service = services[i % len(services)]
+        call_started = time.perf_counter()
+        try:
+            images = client.get_service_images(service)
+            if images.get(service) != server.expected_tag(service):
+                wrong_tags += 1
+        except Exception:
+            failed += 1
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    requests = server.reset_counts()
+
+    return {
+        'operation': 'get_service_images',
+        'services': len(services),
+        'concurrency': 1,
+        'samples': samples,
+        'latency_ms': summarize_latencies(latencies),
+        'throughput': round(samples / elapsed, 2) if elapsed else 0.0,
+        'requests': requests,
+        'requests_per_call': round(sum(v for k, v in requests.items() if k != 'failures') / samples, 2) if samples else 0.0,
+        'failed': failed,
+        'wrong_tags': wrong_tags,
+        'elapsed': round(elapsed, 3)
+    }
+
+
+def bench_query_multiple(server: MockArgoCDServer, concurrency: int, repeat: int, warmup: int = 1) -> Dict:
+    """
+    重复调用 query_multiple_services 查询全部服务，测量批量耗时
+
+    Args:
+        server: 已启动的模拟服务
+        concurrency: max_workers
+        repeat: 计入统计的调用次数
+        warmup: 不计入统计的预热调用次数
+
+    Returns:
+        场景记录（latency_ms 为每次批量查询的总耗时，throughput 为每秒完成的服务数）
+    """
+    client = _client_for(server)
+    services = server.services
+    for _ in range(warmup):
+        client.query_multiple_services(services, max_workers=concurrency)
+    server.reset_counts()
+
+    durations = []
+    failed = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = client.query_multiple_services(services, max_workers=concurrency)
+        durations.append(time.perf_counter() - started)
+        failed += len(results['failed'])
+    requests = server.reset_counts()
+    total = sum(durations)
+
+    return {
+        'operation': 'query_multiple_services',
+        'services': len(services),
+        'concurrency': concurrency,
+        'samples': repeat,
+        'latency_ms': summarize_latencies(durations),
+        'throughput': round(len(services) * repeat / total, 2) if total else 0.0,
+        'requests': requests,
+        'requests_per_call': round(sum(v for k, v in requests.items() if k != 'failures') / (len(services) * repeat), 2)
+        if services and repeat else 0.0,
+        'failed': failed,
+        'elapsed': round(total, 3)
+    }
+
+
+def run_argocd_benchmark(service_counts: Sequence[int] = (10, 50, 200), concurrency: Sequence[int] = (1, 4, 8, 16),
+                         repeat: int = 3, samples: int = 50, latency: float = 0.02, jitter: float = 0.0,
+                         failure_rate: float = 0.0, failure_status: int = 500, manifests_per_app: int = 3,
+                         manifest_bytes: int = 2048, operations: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    按服务数和并发数逐个运行场景
+
+    每个服务数使用一个新的模拟服务（新端口），熔断器和预检缓存按服务器地址区分，场景之间互不影响
+
+    Args:
+        service_counts: 服务数列表
+        concurrency: 并发数列表（只作用于 query_multiple_services）
+        repeat: 每个批量场景的重复次数
+        samples: get_service_images 的调用次数
+        latency: 模拟服务每个请求的固定延迟（秒）
+        jitter: 随机延迟上限（秒）
+        failure_rate: 注入失败的概率
+        failure_status: 注入失败的状态码
+        manifests_per_app: 每个应用的 manifest 个数
+        manifest_bytes: 每个 manifest 的大致大小
+        operations: 只运行这些操作，默认全部
+
+    Yields:
+        场景记录
+    """
+    operations = operations or ['get_service_images', 'query_multiple_services']
+    scenario = {
+        'latency_ms_injected': round(latency * 1000, 1),
+        'jitter_ms_injected': round(jitter * 1000, 1),
+        'failure_rate': failure_rate,
+        'failure_status': failure_status,
+        'manifests_per_app': manifests_per_app,
+        'manifest_bytes': manifest_bytes
+    }
+    for count in service_counts:
+        server = MockArgoCDServer(
+            service_count=count, manifests_per_app=manifests_per_app, manifest_bytes=manifest_bytes,
+            latency=latency, jitter=jitter, failure_rate=failure_rate, failure_status=failure_status
+        ).start()
+        try:
+            if 'get_service_images' in operations:
+                yield dict(bench_service_images(server, samples), **scenario)
+            if 'query_multiple_services' in operations:
+                for workers in concurrency:
+                    yield dict(bench_query_multiple(server, workers, repeat), **scenario)
+        finally:
+            server.stop()
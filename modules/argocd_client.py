@@ -3,16 +3,99 @@ ArgoCD API 客户端模块
 提供与 ArgoCD API 交互的核心功能
 """
 
-import requests
-import yaml
 import json
 import base64
-import urllib3
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterator, List, Tuple, Optional
 
-# 屏蔽证书警告（测试环境）
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from modules.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from modules.lazy_import import lazy_module
+from modules.metrics import get_metrics_registry
+
+# requests / yaml 在第一次发送请求、解析 manifest 时才导入，页面冷启动不承担这部分开销
+requests = lazy_module('requests')
+yaml = lazy_module('yaml')
+urllib3 = lazy_module('urllib3')
+_insecure_warnings_disabled = False
+
+# 连接超时单独设置：服务器不可达时尽快失败，读取超时仍允许较慢的 manifest 渲染
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+# 预检结果（服务器可达且 Token 可用）的缓存时间（秒），键为 (server, token 哈希)
+PREFLIGHT_TTL = 300
+_preflight_cache: Dict[Tuple[str, str], Tuple[bool, str, float]] = {}
+_preflight_lock = threading.Lock()
+
+# 视为服务器不可用的网关状态码（计入熔断器失败次数）
+GATEWAY_ERRORS = (502, 503, 504)
+
+# 每个 revision 渲染出的镜像：(server, app_name, revision) -> {container_name: image_url}
+# revision 不可变，只按数量淘汰最久未使用的条目
+REVISION_CACHE_SIZE = 2000
+_revision_images_cache: "OrderedDict[Tuple[str, str, str], Dict[str, str]]" = OrderedDict()
+_revision_images_lock = threading.Lock()
+
+
+# 解码后的 JWT claims：token 哈希 -> (claims, 错误信息)，只保存哈希不保存 token 本身
+TOKEN_CLAIMS_CACHE_SIZE = 256
+_token_claims_cache: "OrderedDict[str, Tuple[Optional[Dict], str]]" = OrderedDict()
+_token_claims_lock = threading.Lock()
+
+# 解析后的 CLI 配置：路径 -> ((mtime_ns, size), config)
+_cli_config_cache: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+_cli_config_lock = threading.Lock()
+
+
+def token_hash(token: str) -> str:
+    """token 的 SHA-256 摘要（用作缓存键）"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def decode_token_claims(token: str) -> Tuple[Optional[Dict], str]:
+    """
+    解码 JWT 的 payload（不校验签名），结果按 token 哈希缓存
+    
+    Args:
+        token: JWT token
+        
+    Returns:
+        (claims, error)：成功时 error 为空字符串，失败时 claims 为 None
+    """
+    key = token_hash(token)
+    with _token_claims_lock:
+        if key in _token_claims_cache:
+            _token_claims_cache.move_to_end(key)
+            get_metrics_registry().record_cache('argocd_token_claims', True)
+            return _token_claims_cache[key]
+    get_metrics_registry().record_cache('argocd_token_claims', False)
+    
+    # JWT token 由三部分组成，用'.'分隔
+    parts = token.split('.')
+    if len(parts) != 3:
+        result = (None, "Token格式不正确，不是有效的JWT")
+    else:
+        # 解析 payload 部分（第二部分），添加必要的 padding
+        payload = parts[1]
+        padding = 4 - len(payload) % 4
+        if padding != 4:
+            payload += '=' * padding
+        try:
+            result = (json.loads(base64.urlsafe_b64decode(payload)), "")
+        except Exception:
+            result = (None, "Token payload解析失败")
+    
+    with _token_claims_lock:
+        _token_claims_cache[key] = result
+        while len(_token_claims_cache) > TOKEN_CLAIMS_CACHE_SIZE:
+            _token_claims_cache.popitem(last=False)
+    return result
 
 
 class ArgoCDClient:
@@ -57,6 +140,95 @@ class ArgoCDClient:
             "Content-Type": "application/json"
         }
     
+    def _get(self, url: str, endpoint: str = "other", **kwargs) -> "requests.Response":
+        """
+        经过熔断器发送 GET 请求，并记录请求 span（接口、状态码、字节数、耗时）
+
+        熔断器打开时直接抛出 CircuitOpenError，不发送请求；
+        连接失败、超时和网关错误计为失败，其他响应（包括 4xx）说明服务器可达
+        
+        Args:
+            url: 请求地址
+            endpoint: 接口名（用于指标标签，如 'application'、'manifests'）
+        """
+        global _insecure_warnings_disabled
+        breaker = get_circuit_breaker(self.server_url)
+        breaker.check()
+        if not _insecure_warnings_disabled:
+            # 屏蔽证书警告（测试环境）
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            _insecure_warnings_disabled = True
+        kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+        metrics = get_metrics_registry()
+        started = time.perf_counter()
+        try:
+            response = requests.get(url, headers=self.headers, verify=False, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            breaker.record_failure(str(e))
+            metrics.record_request('argocd', 'GET', endpoint, None, 0, time.perf_counter() - started, error=str(e))
+            raise
+        except Exception as e:
+            # 无效 URL、重定向过多等不说明服务器不可用，只记录指标，不计入熔断器
+            breaker.release_probe()
+            metrics.record_request('argocd', 'GET', endpoint, None, 0, time.perf_counter() - started, error=str(e))
+            raise
+        # elapsed 为收到响应头的耗时（DNS、连接、TLS 和服务器渲染 manifest），其余为下载响应体
+        metrics.record_request('argocd', 'GET', endpoint, response.status_code, len(response.content),
+                               time.perf_counter() - started, ttfb=response.elapsed.total_seconds())
+        if response.status_code in GATEWAY_ERRORS:
+            breaker.record_failure(f"{response.status_code} {response.reason}")
+        else:
+            breaker.record_success()
+        return response
+    
+    def preflight(self, max_age: float = PREFLIGHT_TTL) -> Tuple[bool, str]:
+        """
+        检查服务器是否可达、Token 是否可用（结果按服务器和 Token 缓存）
+        
+        不可达时立即打开熔断器，随后的请求直接失败，冷却后由探测请求检测恢复
+        
+        Args:
+            max_age: 成功结果的缓存时间（秒）
+            
+        Returns:
+            (ok, message)
+        """
+        key = (self.server_url, token_hash(self.token))
+        with _preflight_lock:
+            cached = _preflight_cache.get(key)
+        hit = bool(cached and time.time() - cached[2] < max_age)
+        get_metrics_registry().record_cache('argocd_preflight', hit)
+        if hit:
+            return cached[0], cached[1]
+        
+        breaker = get_circuit_breaker(self.server_url)
+        try:
+            response = self._get(f"{self.server_url}/api/v1/session/userinfo", endpoint='userinfo', timeout=(CONNECT_TIMEOUT, 10))
+        except CircuitOpenError as e:
+            return False, str(e)
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure(str(e), trip=True)
+            return False, f"无法连接 {self.server_url}: {str(e)}"
+        
+        if response.status_code in (401, 403):
+            result = (False, "Token 无效或已过期")
+        elif response.status_code != 200:
+            return False, f"预检失败: {response.status_code}"
+        else:
+            try:
+                userinfo = response.json()
+            except ValueError:
+                # 代理或 SSO 返回的 HTML 页面
+                return False, "预检失败: 响应不是 JSON"
+            if isinstance(userinfo, dict) and not userinfo.get('loggedIn', True):
+                result = (False, "Token 无效或已过期")
+            else:
+                result = (True, f"服务器可达，Token 可用")
+        # 只缓存服务器给出明确答复的结果，不可达由熔断器负责
+        with _preflight_lock:
+            _preflight_cache[key] = (result[0], result[1], time.time())
+        return result
+    
     def validate_token(self) -> Tuple[bool, str]:
         """
         验证 JWT Token 的有效性和过期时间
@@ -65,23 +237,10 @@ class ArgoCDClient:
             (is_valid, message): 验证结果和消息
         """
         try:
-            # JWT token 由三部分组成，用'.'分隔
-            parts = self.token.split('.')
-            if len(parts) != 3:
-                return False, "Token格式不正确，不是有效的JWT"
-            
-            # 解析 payload 部分（第二部分）
-            payload = parts[1]
-            # 添加必要的 padding
-            padding = 4 - len(payload) % 4
-            if padding != 4:
-                payload += '=' * padding
-            
-            try:
-                decoded_payload = base64.urlsafe_b64decode(payload)
-                payload_data = json.loads(decoded_payload)
-            except Exception:
-                return False, "Token payload解析失败"
+            # 解码结果按 token 哈希缓存，页面每次重跑只需按当前时间计算剩余时间
+            payload_data, error = decode_token_claims(self.token)
+            if payload_data is None:
+                return False, error
             
             # 检查过期时间
             if 'exp' in payload_data:
@@ -123,7 +282,7 @@ class ArgoCDClient:
         """
         url = f"{self.server_url}/api/v1/applications/{app_name}"
         try:
-            response = requests.get(url, headers=self.headers, verify=False, timeout=30)
+            response = self._get(url, endpoint='application')
             
             if response.status_code == 200:
                 return response.json()
@@ -176,13 +335,7 @@ class ArgoCDClient:
         """
         url = f"{self.server_url}/api/v1/applications/{app_name}/manifests"
         try:
-            response = requests.get(
-                url,
-                headers=self.headers,
-                params={"revision": revision},
-                verify=False,
-                timeout=30
-            )
+            response = self._get(url, endpoint='manifests', params={"revision": revision})
             
             if response.status_code == 200:
                 return response.json()["manifests"]
@@ -241,6 +394,56 @@ class ArgoCDClient:
         
         return images
     
+    def list_applications(self) -> List[str]:
+        """
+        列出当前环境中所有应用名称（只请求 metadata.name 字段）
+        
+        Returns:
+            应用名称列表
+        """
+        url = f"{self.server_url}/api/v1/applications"
+        try:
+            response = self._get(url, endpoint='applications', params={"fields": "items.metadata.name"})
+            
+            if response.status_code == 200:
+                items = response.json().get("items") or []
+                return [item.get("metadata", {}).get("name", "") for item in items if item.get("metadata")]
+            elif response.status_code in (401, 403):
+                raise Exception(f"Token 无效或权限不足")
+            else:
+                raise Exception(f"获取应用列表失败: {response.status_code} - {response.text}")
+                
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"请求失败: {str(e)}")
+    
+    def get_app_name(self, service_name: str) -> str:
+        """
+        根据服务名构建完整应用名
+        
+        Args:
+            service_name: 服务名称（不含环境前后缀）
+            
+        Returns:
+            完整应用名
+        """
+        return f"{self.env_config['app_prefix']}{service_name}{self.env_config['app_suffix']}"
+    
+    def get_service_name(self, app_name: str) -> Optional[str]:
+        """
+        从完整应用名中去掉环境前后缀得到服务名
+        
+        Args:
+            app_name: 完整应用名
+            
+        Returns:
+            服务名称，不符合当前环境命名规则时返回 None
+        """
+        prefix = self.env_config['app_prefix']
+        suffix = self.env_config['app_suffix']
+        if app_name.startswith(prefix) and app_name.endswith(suffix) and len(app_name) > len(prefix) + len(suffix):
+            return app_name[len(prefix):len(app_name) - len(suffix)]
+        return None
+    
     def get_service_images(self, service_name: str) -> Dict[str, str]:
         """
         获取服务的镜像信息（高级封装）
@@ -251,49 +454,212 @@ class ArgoCDClient:
         Returns:
             {service_name: image_tag} 字典
         """
+        metrics = get_metrics_registry()
         # 构建完整应用名
-        app_name = f"{self.env_config['app_prefix']}{service_name}{self.env_config['app_suffix']}"
-        
-        # 获取 revision
-        revision = self.get_app_revision(app_name)
+        app_name = self.get_app_name(service_name)
         
-        # 获取 manifests
-        manifests = self.get_manifests(app_name, revision)
+        with metrics.stage('argocd', 'fetch'):
+            # 获取 revision
+            revision = self.get_app_revision(app_name)
+            
+            # 获取 manifests
+            manifests = self.get_manifests(app_name, revision)
         
         # 提取镜像
-        images = self.extract_images_from_manifests(manifests)
+        with metrics.stage('argocd', 'parse'):
+            images = self.extract_images_from_manifests(manifests)
         
         # 提取主服务镜像（过滤第三方组件）
-        result = {}
+        with metrics.stage('argocd', 'map'):
+            tag = self.select_service_tag(service_name, images)
+        return {service_name: tag} if tag is not None else {}
+    
+    @staticmethod
+    def select_service_tag(service_name: str, images: Dict[str, str]) -> Optional[str]:
+        """
+        从容器镜像中选出服务的主镜像标签（过滤第三方组件）
+        
+        Args:
+            service_name: 服务名称
+            images: {container_name: image_url}
+            
+        Returns:
+            镜像标签，没有镜像时返回 None
+        """
+        def tag_of(image_url):
+            return image_url.split(":")[-1] if ":" in image_url else "latest"
         
         # 优先选择与服务名匹配的容器
         if service_name in images:
-            image_url = images[service_name]
-            tag = image_url.split(":")[-1] if ":" in image_url else "latest"
-            result[service_name] = tag
-        else:
-            # 如果没有匹配的，使用第一个非第三方镜像
-            for container_name, image_url in images.items():
-                if container_name not in ["nginx-prometheus-exporter", "prometheus-exporter"]:
-                    tag = image_url.split(":")[-1] if ":" in image_url else "latest"
-                    result[service_name] = tag
-                    break
+            return tag_of(images[service_name])
+        
+        # 如果没有匹配的，使用第一个非第三方镜像
+        for container_name, image_url in images.items():
+            if container_name not in ["nginx-prometheus-exporter", "prometheus-exporter"]:
+                return tag_of(image_url)
         
         # 如果仍然没有找到，返回第一个镜像
-        if not result and images:
-            first_container = list(images.keys())[0]
-            first_image = images[first_container]
-            tag = first_image.split(":")[-1] if ":" in first_image else "latest"
-            result[service_name] = tag
+        if images:
+            return tag_of(next(iter(images.values())))
+        return None
+    
+    def get_app_history(self, app_name: str) -> List[Dict]:
+        """
+        获取应用的部署历史（status.history），最新的在前
         
-        return result
+        Args:
+            app_name: 应用名称
+            
+        Returns:
+            [{'id', 'revision', 'deployed_at', 'deploy_started_at'}, ...]
+        """
+        app_info = self.get_application(app_name)
+        if not app_info:
+            raise Exception("无法获取应用信息")
+        
+        entries = []
+        for item in app_info.get("status", {}).get("history") or []:
+            # 多数据源应用使用 revisions 列表，取第一个
+            revision = item.get("revision") or next(iter(item.get("revisions") or []), None)
+            if not revision:
+                continue
+            entries.append({
+                'id': item.get("id"),
+                'revision': revision,
+                'deployed_at': item.get("deployedAt", ""),
+                'deploy_started_at': item.get("deployStartedAt", "")
+            })
+        return sorted(entries, key=lambda entry: (entry['deployed_at'], entry['id'] or 0), reverse=True)
+    
+    def get_revision_images(self, app_name: str, revision: str) -> Dict[str, str]:
+        """
+        获取应用某个 revision 的镜像（revision 不可变，结果在进程内缓存）
+        
+        Args:
+            app_name: 应用名称
+            revision: Git revision
+            
+        Returns:
+            {container_name: image_url}
+        """
+        metrics = get_metrics_registry()
+        key = (self.server_url, app_name, revision)
+        with _revision_images_lock:
+            cached = _revision_images_cache.get(key)
+            if cached is not None:
+                _revision_images_cache.move_to_end(key)
+        metrics.record_cache('argocd_revision_images', cached is not None)
+        if cached is not None:
+            return dict(cached)
+        
+        with metrics.stage('argocd', 'fetch'):
+            manifests = self.get_manifests(app_name, revision)
+        with metrics.stage('argocd', 'parse'):
+            images = self.extract_images_from_manifests(manifests)
+        with _revision_images_lock:
+            _revision_images_cache[key] = images
+            while len(_revision_images_cache) > REVISION_CACHE_SIZE:
+                _revision_images_cache.popitem(last=False)
+        return dict(images)
     
-    def query_multiple_services(self, service_names: List[str]) -> Dict[str, any]:
+    def get_service_history(self, service_name: str, max_entries: int = 20, max_workers: int = 8) -> List[Dict]:
+        """
+        获取服务的镜像标签时间线
+        
+        Args:
+            service_name: 服务名称（不含环境前后缀）
+            max_entries: 最多解析的历史记录数（最新的）
+            max_workers: 并发获取 manifest 的最大请求数
+            
+        Returns:
+            [{'revision', 'deployed_at', 'tag', 'images', 'changed', 'error'}, ...]，最新的在前；
+            changed 表示标签与上一次（更早的）部署不同
+        """
+        app_name = self.get_app_name(service_name)
+        history = self.get_app_history(app_name)[:max_entries]
+        
+        # 同一 revision 可能被多次部署（回滚），每个 revision 只获取一次
+        revisions = list(dict.fromkeys(entry['revision'] for entry in history))
+        images_by_revision = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {executor.submit(self.get_revision_images, app_name, revision): revision for revision in revisions}
+            for future in as_completed(futures):
+                revision = futures[future]
+                try:
+                    images_by_revision[revision] = future.result()
+                except Exception as e:
+                    errors[revision] = str(e)
+        
+        timeline = []
+        for entry in history:
+            images = images_by_revision.get(entry['revision'], {})
+            timeline.append(dict(
+                entry,
+                service=service_name,
+                images=images,
+                tag=self.select_service_tag(service_name, images),
+                error=errors.get(entry['revision'])
+            ))
+        
+        # 从最早的部署开始标记标签变化
+        previous_tag = None
+        for item in reversed(timeline):
+            item['changed'] = item['tag'] is not None and item['tag'] != previous_tag
+            if item['tag'] is not None:
+                previous_tag = item['tag']
+        return timeline
+    
+    def iter_service_images(self, service_names: List[str], max_workers: int = 8,
+                            stop: Optional[Callable[[], bool]] = None, preflight: bool = True) -> Iterator[Dict]:
+        """
+        并发查询多个服务的镜像信息，按完成顺序逐个返回
+        
+        Args:
+            service_names: 服务名称列表
+            max_workers: 最大并发请求数
+            stop: 可选的停止条件，等待期间每 0.2 秒检查一次，返回 True 时放弃其余请求并结束迭代
+                  （不必等正在超时的请求返回）
+            preflight: 是否先做（缓存的）可达性和 Token 预检，失败时所有服务立即返回该错误
+            
+        Yields:
+            {'service', 'images', 'error', 'elapsed'}，成功时 error 为 None
+        """
+        if preflight and service_names:
+            ok, message = self.preflight()
+            if not ok:
+                for service_name in service_names:
+                    yield {'service': service_name, 'images': {}, 'error': message, 'elapsed': 0.0}
+                return
+        
+        def query(service_name):
+            start = time.perf_counter()
+            try:
+                return service_name, self.get_service_images(service_name), None, time.perf_counter() - start
+            except Exception as e:
+                return service_name, {}, str(e), time.perf_counter() - start
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            pending = {executor.submit(query, service_name) for service_name in service_names}
+            while pending:
+                done, pending = wait(pending, timeout=0.2 if stop else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    service_name, images, error, elapsed = future.result()
+                    yield {'service': service_name, 'images': images, 'error': error, 'elapsed': elapsed}
+                if stop is not None and stop():
+                    return
+        finally:
+            # 调用方提前停止迭代（如取消任务）时，丢弃尚未开始的请求
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def query_multiple_services(self, service_names: List[str], max_workers: int = 8) -> Dict[str, any]:
         """
         批量查询多个服务的镜像信息
         
         Args:
             service_names: 服务名称列表
+            max_workers: 最大并发请求数
             
         Returns:
             {
@@ -306,12 +672,11 @@ class ArgoCDClient:
             'failed': {}
         }
         
-        for service_name in service_names:
-            try:
-                images = self.get_service_images(service_name)
-                results['success'].update(images)
-            except Exception as e:
-                results['failed'][service_name] = str(e)
+        for item in self.iter_service_images(service_names, max_workers):
+            if item['error'] is None:
+                results['success'].update(item['images'])
+            else:
+                results['failed'][item['service']] = item['error']
         
         return results
     
@@ -338,3 +703,63 @@ class ArgoCDClient:
         """
         return list(ArgoCDClient.SUPPORTED_ENVIRONMENTS.keys())
 
+
+def load_cli_config(config_path: str) -> Optional[Dict]:
+    """
+    读取并解析 ArgoCD CLI 配置文件，按文件修改时间和大小缓存（文件未变化时不重新解析 YAML）
+    
+    Args:
+        config_path: 配置文件路径
+        
+    Returns:
+        配置字典，文件不存在时返回 None
+    """
+    try:
+        stat = os.stat(config_path)
+    except OSError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _cli_config_lock:
+        cached = _cli_config_cache.get(config_path)
+    hit = bool(cached and cached[0] == signature)
+    get_metrics_registry().record_cache('argocd_cli_config', hit)
+    if hit:
+        return cached[1]
+    
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f) or {}
+    with _cli_config_lock:
+        _cli_config_cache[config_path] = (signature, config)
+    return config
+
+
+def load_cli_token(environment: str, config_path: Optional[str] = None, fallback_first: bool = True) -> Optional[str]:
+    """
+    从 ArgoCD CLI 配置文件（~/.argocd/config）读取 token
+    
+    Args:
+        environment: 环境名称，用于匹配 context 的 server
+        config_path: 配置文件路径，默认 ~/.argocd/config
+        fallback_first: 没有匹配的环境时是否返回第一个 context 的 token
+        
+    Returns:
+        token，找不到时返回 None
+    """
+    try:
+        config_path = config_path or os.path.join(os.path.expanduser("~"), ".argocd", "config")
+        config = load_cli_config(config_path)
+        if config is None:
+            return None
+        
+        # 尝试找到当前环境的 token
+        contexts = config.get('contexts', []) or []
+        for context in contexts:
+            if environment in context.get('server', ''):
+                return context.get('user', {}).get('auth-token', '')
+        
+        # 如果没有找到特定环境，返回第一个 token
+        if fallback_first and contexts and 'user' in contexts[0]:
+            return contexts[0].get('user', {}).get('auth-token', '')
+    except Exception:
+        pass
+    return None
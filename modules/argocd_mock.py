@@ -0,0 +1,249 @@
+"""
+本地 ArgoCD 模拟服务模块
+在后台线程中提供 ArgoCDClient 用到的几个只读 API，返回合成的 Application 和 manifest，
+可配置应用数量、manifest 大小、注入延迟和失败率，用于基准测试和本地调试，不需要访问内网
+
+    GET /api/v1/session/userinfo
+    GET /api/v1/applications
+    GET /api/v1/applications/<name>
+    GET /api/v1/applications/<name>/manifests?revision=...
+"""
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from modules.argocd_client import ArgoCDClient
+
+logger = logging.getLogger(__name__)
+
+APPLICATIONS_PATH = "/api/v1/applications"
+
+# 每个服务的主容器之外附带的第三方容器（select_service_tag 需要过滤掉）
+SIDECAR_IMAGES = {
+    'nginx-prometheus-exporter': "nginx/nginx-prometheus-exporter:0.11.0",
+    'istio-proxy': "docker.io/istio/proxyv2:1.20.3"
+}
+
+
+def synthetic_services(count: int) -> List[str]:
+    """生成 count 个合成服务名（svc-0000, svc-0001, ...）"""
+    return [f"svc-{i:04d}" for i in range(count)]
+
+
+def build_manifests(service: str, tag: str, manifests_per_app: int = 3, manifest_bytes: int = 2048) -> List[str]:
+    """
+    生成一个应用的 manifest 列表（一个 Deployment，其余为 Service / ConfigMap）
+
+    Args:
+        service: 服务名
+        tag: 主容器镜像标签
+        manifests_per_app: manifest 个数
+        manifest_bytes: 每个 manifest 的大致大小（通过注解填充）
+
+    Returns:
+        YAML 字符串列表
+    """
+    containers = "".join(
+        f"        - name: {name}\n          image: {image}\n"
+        for name, image in [(service, f"registry.example.com/qima/{service}:{tag}")] + list(SIDECAR_IMAGES.items())
+    )
+    deployment = (
+        "apiVersion: apps/v1\nkind: Deployment\n"
+        f"metadata:\n  name: {service}\n  annotations:\n    bench/padding: \"{{padding}}\"\n"
+        "spec:\n  replicas: 2\n  template:\n    spec:\n      containers:\n" + containers
+    )
+    others = [
+        f"apiVersion: v1\nkind: Service\nmetadata:\n  name: {service}-{i}\n  annotations:\n    bench/padding: \"{{padding}}\"\n"
+        "spec:\n  ports:\n  - port: 80\n"
+        if i % 2 else
+        f"apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: {service}-{i}\n  annotations:\n    bench/padding: \"{{padding}}\"\n"
+        "data:\n  LOG_LEVEL: info\n"
+        for i in range(1, max(1, manifests_per_app))
+    ]
+    manifests = []
+    for template in [deployment] + others:
+        padding = "x" * max(0, manifest_bytes - len(template))
+        manifests.append(template.replace("{padding}", padding))
+    return manifests
+
+
+class MockArgoCDHandler(BaseHTTPRequestHandler):
+    """处理模拟 API 请求"""
+
+    server_version = "MockArgoCD/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body) -> None:
+        data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        mock: "MockArgoCDServer" = self.server.mock
+        path = urlparse(self.path).path.rstrip('/')
+        if path == "/api/v1/session/userinfo":
+            endpoint = 'userinfo'
+        elif path == APPLICATIONS_PATH:
+            endpoint = 'list'
+        elif path.startswith(APPLICATIONS_PATH + "/") and path.endswith("/manifests"):
+            endpoint = 'manifests'
+        elif path.startswith(APPLICATIONS_PATH + "/"):
+            endpoint = 'application'
+        else:
+            endpoint = 'other'
+        mock.count(endpoint)
+
+        delay = mock.delay()
+        if delay > 0:
+            time.sleep(delay)
+        if endpoint != 'userinfo' and mock.should_fail():
+            mock.count('failures')
+            self._send_json(mock.failure_status, {'error': "injected failure", 'code': mock.failure_status})
+            return
+
+        if endpoint == 'userinfo':
+            self._send_json(200, {'loggedIn': True, 'username': "benchmark"})
+        elif endpoint == 'list':
+            self._send_json(200, mock.list_body)
+        elif endpoint in ('application', 'manifests'):
+            app_name = path[len(APPLICATIONS_PATH) + 1:]
+            if endpoint == 'manifests':
+                body = mock.manifests_body(app_name[:-len("/manifests")])
+            else:
+                body = mock.application_body(app_name)
+            if body is None:
+                self._send_json(404, {'error': "application not found"})
+            else:
+                self._send_json(200, body)
+        else:
+            self._send_json(404, {'error': "not found"})
+
+    def log_message(self, format, *args):
+        logger.debug(f"mock argocd {self.address_string()} {format % args}")
+
+
+class MockArgoCDServer:
+    """在后台线程中运行的模拟 ArgoCD 服务"""
+
+    def __init__(self, services: Optional[List[str]] = None, service_count: int = 100, environment: str = "preprod",
+                 manifests_per_app: int = 3, manifest_bytes: int = 2048, latency: float = 0.0, jitter: float = 0.0,
+                 failure_rate: float = 0.0, failure_status: int = 500, seed: int = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        初始化
+
+        Args:
+            services: 服务名列表，默认生成 service_count 个合成服务
+            service_count: 合成服务数量
+            environment: 应用命名使用的环境（前后缀与 ArgoCDClient 一致）
+            manifests_per_app: 每个应用的 manifest 个数
+            manifest_bytes: 每个 manifest 的大致大小
+            latency: 每个请求的固定延迟（秒）
+            jitter: 在固定延迟上增加的随机延迟上限（秒）
+            failure_rate: 注入失败的概率（0-1，不作用于 userinfo）
+            failure_status: 注入失败时返回的状态码（502/503/504 会计入熔断器）
+            seed: 随机数种子
+            host: 监听地址
+            port: 监听端口（0 表示随机端口）
+        """
+        env_config = ArgoCDClient.get_environment_config(environment)
+        self.services = list(services) if services is not None else synthetic_services(service_count)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.requests = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # 响应体预先生成，请求处理只做查找，测得的是客户端而不是模拟服务的开销
+        self._applications: Dict[str, bytes] = {}
+        self._manifests: Dict[str, bytes] = {}
+        for i, service in enumerate(self.services):
+            app_name = f"{env_config['app_prefix']}{service}{env_config['app_suffix']}"
+            revision = hashlib.sha1(app_name.encode('utf-8')).hexdigest()
+            tag = f"1.{i}.0"
+            self._applications[app_name] = json.dumps({
+                'metadata': {'name': app_name},
+                'status': {
+                    'operationState': {'operation': {'sync': {'revision': revision}}, 'phase': "Succeeded"},
+                    'history': [{'id': 1, 'revision': revision, 'deployedAt': "2025-01-01T00:00:00Z"}]
+                }
+            }).encode('utf-8')
+            self._manifests[app_name] = json.dumps({
+                'manifests': build_manifests(service, tag, manifests_per_app, manifest_bytes)
+            }).encode('utf-8')
+        self.list_body = json.dumps({
+            'items': [{'metadata': {'name': app_name}} for app_name in self._applications]
+        }).encode('utf-8')
+
+        self.server = ThreadingHTTPServer((host, port), MockArgoCDHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def expected_tag(self, service: str) -> str:
+        """某个合成服务的主镜像标签"""
+        return f"1.{self.services.index(service)}.0"
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def reset_counts(self) -> Dict[str, int]:
+        """返回并清零请求计数"""
+        with self._lock:
+            counts = dict(self.requests)
+            self.requests.clear()
+        return counts
+
+    def delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def should_fail(self) -> bool:
+        if self.failure_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.failure_rate
+
+    def application_body(self, app_name: str) -> Optional[bytes]:
+        return self._applications.get(app_name)
+
+    def manifests_body(self, app_name: str) -> Optional[bytes]:
+        return self._manifests.get(app_name)
+
+    def start(self) -> "MockArgoCDServer":
+        """在守护线程中启动服务"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-argocd", daemon=True)
+        self._thread.start()
+        logger.info(f"模拟 ArgoCD 服务已启动: {self.url}（{len(self.services)} 个应用）")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockArgoCDServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
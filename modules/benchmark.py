@@ -0,0 +1,105 @@
+"""
+基准测试公共工具
+百分位统计、运行环境信息，以及与上一次运行结果（JSON Lines）的对比，
+供 ArgoCD / Jira 基准测试共用，输出格式保持一致便于不同提交之间比较
+"""
+
+import json
+import os
+import platform
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from modules.metrics import percentile
+
+
+def summarize_latencies(seconds: Sequence[float]) -> Dict[str, float]:
+    """
+    汇总延迟样本（秒）为毫秒统计
+
+    Returns:
+        {'count', 'min', 'p50', 'p95', 'max', 'mean'}（毫秒，保留两位小数）
+    """
+    if not seconds:
+        return {'count': 0, 'min': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0, 'mean': 0.0}
+    return {
+        'count': len(seconds),
+        'min': round(min(seconds) * 1000, 2),
+        'p50': round(percentile(seconds, 50) * 1000, 2),
+        'p95': round(percentile(seconds, 95) * 1000, 2),
+        'max': round(max(seconds) * 1000, 2),
+        'mean': round(sum(seconds) / len(seconds) * 1000, 2)
+    }
+
+
+def run_metadata(label: str = "") -> Dict:
+    """运行环境信息（写入每次基准测试的 summary 记录）"""
+    return {
+        'label': label,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'started_at': datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def load_records(path: str, record_type: str = 'benchmark') -> List[Dict]:
+    """
+    读取之前保存的 JSON Lines 输出
+
+    Args:
+        path: 文件路径
+        record_type: 只保留该类型的记录
+
+    Returns:
+        记录列表（无法解析的行被忽略）
+    """
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('type') == record_type:
+                records.append(record)
+    return records
+
+
+def attach_baseline(records: Iterable[Dict], baseline: List[Dict], key_fields: Tuple[str, ...],
+                    metrics: Dict[str, Tuple[str, ...]]) -> Iterable[Dict]:
+    """
+    为每条记录附加与基线中相同场景的差异
+
+    Args:
+        records: 本次运行的记录
+        baseline: 基线记录（load_records() 的结果）
+        key_fields: 标识同一场景的字段，如 ('operation', 'services', 'concurrency')
+        metrics: 需要比较的指标，{名称: 记录中的路径}，如 {'p50_ms': ('latency_ms', 'p50')}
+
+    Yields:
+        原记录，基线中有相同场景时增加 'baseline': {名称: {'before', 'after', 'change_pct'}}
+    """
+    indexed = {tuple(record.get(field) for field in key_fields): record for record in baseline}
+    for record in records:
+        previous = indexed.get(tuple(record.get(field) for field in key_fields))
+        if previous is not None:
+            comparison = {}
+            for name, path in metrics.items():
+                before, after = _lookup(previous, path), _lookup(record, path)
+                if before is None or after is None:
+                    continue
+                change = round((after - before) / before * 100, 1) if before else None
+                comparison[name] = {'before': before, 'after': after, 'change_pct': change}
+            record = dict(record, baseline=comparison)
+        yield record
+
+
+def _lookup(record: Dict, path: Tuple[str, ...]) -> Optional[float]:
+    value = record
+    for part in path:
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value if isinstance(value, (int, float)) else None
+
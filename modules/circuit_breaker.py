@@ -0,0 +1,130 @@
+"""
+熔断器模块
+ArgoCD 服务器只能在内网访问，不可达时每个请求都要等满超时时间。
+每个服务器一个熔断器：连续失败达到阈值后进入打开状态，其余请求立即失败；
+冷却时间过后放行一个探测请求（半开），成功则恢复，失败则重新打开
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开，请求未发送"""
+
+
+class CircuitBreaker:
+    """单个服务器的熔断器"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 30.0):
+        """
+        初始化熔断器
+
+        Args:
+            name: 名称（服务器地址），用于日志和错误信息
+            failure_threshold: 连续失败多少次后打开
+            cooldown: 打开后多少秒放行探测请求
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error = ""
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        是否放行一个请求
+
+        打开状态下冷却时间过后只放行一个探测请求，探测结束前其他请求仍被拒绝
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def check(self):
+        """不放行时抛出 CircuitOpenError"""
+        if not self.allow():
+            raise CircuitOpenError(
+                f"服务器 {self.name} 暂时不可达（{self.retry_in():.0f} 秒后重试）: {self.last_error}"
+            )
+
+    def record_success(self):
+        """请求成功（服务器可达）"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"熔断器恢复: {self.name}")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """请求因与服务器可用性无关的原因失败（如无效 URL）：不计入失败，只释放探测名额"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, error: str = "", trip: bool = False):
+        """
+        请求失败（连接失败、超时或网关错误）
+
+        Args:
+            error: 错误信息
+            trip: 是否立即打开（如预检已确认服务器不可达）
+        """
+        with self._lock:
+            self.failures += 1
+            self.last_error = error or self.last_error
+            reopen = self.state == self.HALF_OPEN
+            if trip or reopen or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"熔断器打开: {self.name}（连续失败 {self.failures} 次）: {error}")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+            self._probe_in_flight = False
+
+    def retry_in(self) -> float:
+        """距离下一次探测的秒数（未打开时为 0）"""
+        if self.state != self.OPEN or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.cooldown - (time.time() - self.opened_at))
+
+    def snapshot(self) -> Dict:
+        """状态快照（用于页面展示）"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self.state,
+                'failures': self.failures,
+                'last_error': self.last_error,
+                'retry_in': round(self.retry_in(), 1)
+            }
+
+
+# 进程内每个服务器一个熔断器，所有会话和任务共享
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """获取（必要时创建）指定服务器的熔断器"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
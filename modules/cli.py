@@ -0,0 +1,494 @@
+"""
+命令行入口模块
+不启动 Streamlit 即可执行 Jira 提取和 ArgoCD 镜像查询，结果以 JSON Lines 逐行输出到标准输出，
+便于发布机器人和定时任务直接消费
+
+用法示例：
+    python -m modules jira --filter 20334
+    python -m modules jira --filter 20334 --filter 24058 --projects-only
+    python -m modules argocd --env preprod --env prod --service aims-service-cloud --service aca-new
+    python -m modules argocd --env prod --services-file services.txt
+    python -m modules webhook --filter 20334 --port 8765
+    python -m modules importtime --module modules.argocd_client --repeat 3
+    python -m modules bench-argocd --services 50,200 --concurrency 1,8,16 --baseline bench_before.jsonl
+    python -m modules bench-jira --issues 100,1000,10000,100000 --baseline jira_before.jsonl
+
+凭证读取顺序：
+    Jira:   环境变量 JIRA_BASE_URL / JIRA_API_TOKEN / JIRA_EMAIL，其次 config/jira_config.json
+    ArgoCD: 环境变量 ARGOCD_TOKEN_<ENV>（如 ARGOCD_TOKEN_PROD）、ARGOCD_TOKEN，其次 ~/.argocd/config
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+JIRA_CONFIG_FILE = "config/jira_config.json"
+ARGOCD_CONFIG_FILE = "config/argocd_config.json"
+
+logger = logging.getLogger(__name__)
+
+
+def emit(record: Dict):
+    """输出一行 JSON 记录并立即刷新，保证下游可以边运行边读取"""
+    print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
+
+
+def _load_json(path: str) -> Dict:
+    """读取 JSON 配置文件，不存在或损坏时返回空字典"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取配置文件 {path} 失败: {e}")
+    return {}
+
+
+def load_jira_credentials(base_url: Optional[str] = None, email: Optional[str] = None) -> Dict[str, str]:
+    """
+    读取 Jira 凭证（命令行参数 > 环境变量 > 配置文件）
+
+    Returns:
+        {'base_url', 'api_token', 'email', 'filter_id', 'field_id'}
+    """
+    config = _load_json(JIRA_CONFIG_FILE)
+    return {
+        'base_url': base_url or os.environ.get('JIRA_BASE_URL') or config.get('base_url', ''),
+        'api_token': os.environ.get('JIRA_API_TOKEN') or config.get('api_token', ''),
+        'email': email if email is not None else os.environ.get('JIRA_EMAIL', config.get('email', '')),
+        'filter_id': config.get('filter_id', ''),
+        'field_id': os.environ.get('JIRA_FIELD_ID') or config.get('field_id', '')
+    }
+
+
+def load_argocd_token(environment: str) -> Optional[str]:
+    """
+    读取 ArgoCD token（ARGOCD_TOKEN_<ENV> > ARGOCD_TOKEN > ArgoCD CLI 配置）
+
+    Args:
+        environment: 环境名称
+    """
+    from modules.argocd_client import load_cli_token
+
+    return (os.environ.get(f"ARGOCD_TOKEN_{environment.upper()}")
+            or os.environ.get('ARGOCD_TOKEN')
+            or load_cli_token(environment, fallback_first=False))
+
+
+def read_services(services: List[str], services_file: Optional[str]) -> List[str]:
+    """
+    合并命令行、文件（每行一个，- 表示标准输入）和配置文件中的服务名
+
+    Returns:
+        去重后的服务名列表（保持输入顺序）
+    """
+    names = [s for arg in services or [] for s in arg.split(',')]
+    if services_file:
+        handle = sys.stdin if services_file == '-' else open(services_file, 'r', encoding='utf-8')
+        try:
+            names.extend(line.split('#', 1)[0] for line in handle)
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+    if not names:
+        names = list(_load_json(ARGOCD_CONFIG_FILE).get('services', []))
+    return list(dict.fromkeys(name.strip() for name in names if name.strip()))
+
+
+def resolve_field_id(extractor, field_id: Optional[str], filter_id: str) -> Optional[str]:
+    """
+    确定 Affects Project 字段 ID（参数或配置为空时按过滤器中的问题自动检测）
+
+    Returns:
+        字段 ID，检测失败时返回 None
+    """
+    if field_id:
+        return field_id
+    field_id = extractor.find_affects_project_field_id(filter_id)
+    if field_id:
+        logger.info(f"自动检测到 Affects Project 字段: {field_id}")
+    return field_id or None
+
+
+def run_jira(args) -> int:
+    """执行 Jira 提取子命令"""
+    from modules.jira_extractor import JiraExtractor
+
+    credentials = load_jira_credentials(args.base_url, args.email)
+    if not credentials['base_url'] or not credentials['api_token']:
+        emit({'type': 'error', 'message': "缺少 Jira 凭证，请设置 JIRA_BASE_URL 和 JIRA_API_TOKEN"})
+        return 2
+
+    filter_ids = [f.strip() for arg in args.filter or [] for f in arg.split(',') if f.strip()] or [credentials['filter_id']]
+    extractor = JiraExtractor(credentials['base_url'], credentials['api_token'], credentials['email'])
+    started = time.perf_counter()
+    field_id = resolve_field_id(extractor, args.field_id or credentials['field_id'], filter_ids[0])
+    if not field_id:
+        emit({'type': 'error', 'message': "无法检测 Affects Project 字段 ID，请使用 --field-id 或设置 JIRA_FIELD_ID"})
+        return 2
+
+    def progress(done, total, message):
+        # 每个过滤器或每批问题获取完成时输出一条进度记录，问题和项目记录在全部解析完成后输出
+        emit({'type': 'progress', 'done': done, 'total': total, 'message': message})
+
+    if len(filter_ids) == 1:
+        results = extractor.get_affects_projects_compact(filter_ids[0], field_id)
+        failed = {}
+        filter_projects = {}
+    else:
+        batch = extractor.get_affects_projects_batch(filter_ids, field_id, max_workers=args.workers,
+                                                     progress=progress)
+        results = batch['results']
+        failed = batch['failed']
+        filter_projects = batch['filter_projects']
+
+    if not args.projects_only:
+        for row in results:
+            emit(dict(row, type='issue'))
+    for row in extractor.get_project_aggregation_rows():
+        emit(dict(row, type='project'))
+    for filter_id, projects in filter_projects.items():
+        emit({'type': 'filter', 'filter_id': filter_id, 'projects': projects})
+    for filter_id, error in failed.items():
+        emit({'type': 'error', 'filter_id': filter_id, 'message': error})
+
+    if args.archive:
+        extractor.archive_results(results, "_".join(filter_ids))
+
+    emit({
+        'type': 'summary',
+        'filters': filter_ids,
+        'issue_count': len(results),
+        'project_count': len(extractor.get_unique_projects()),
+        'failed': len(failed),
+        'elapsed': round(time.perf_counter() - started, 3),
+        'finished_at': datetime.now().isoformat(timespec='seconds')
+    })
+    return 1 if failed else 0
+
+
+def run_argocd(args) -> int:
+    """执行 ArgoCD 镜像查询子命令"""
+    from modules.argocd_client import ArgoCDClient
+    from modules.service_catalog import get_service_catalog
+
+    services = read_services(args.service, args.services_file)
+    if not services:
+        emit({'type': 'error', 'message': "没有要查询的服务，请使用 --service 或 --services-file"})
+        return 2
+
+    environments = list(dict.fromkeys(args.env or ['preprod']))
+    started = time.perf_counter()
+    counts = {'success': 0, 'failed': 0}
+
+    for environment in environments:
+        token = load_argocd_token(environment)
+        if not token:
+            emit({'type': 'error', 'environment': environment,
+                  'message': f"缺少 token，请设置 ARGOCD_TOKEN_{environment.upper()} 或 ARGOCD_TOKEN"})
+            counts['failed'] += len(services)
+            continue
+        client = ArgoCDClient(environment, token)
+        snapshot = {'success': {}, 'failed': {}}
+
+        # 与页面相同：先用缓存的服务目录在本地校验，不存在的服务不发请求
+        targets = services
+        if not args.no_catalog:
+            try:
+                catalog = get_service_catalog(client)
+            except Exception as e:
+                catalog = None
+                logger.warning(f"{environment} 服务目录加载失败，跳过本地校验: {e}")
+            if catalog is not None:
+                targets = []
+                for service in services:
+                    resolution = catalog.resolve(service)
+                    if resolution['service'] is None:
+                        emit({'type': 'image', 'environment': environment, 'service': service,
+                              'ok': False, 'error': f"应用不存在: {service}"})
+                        snapshot['failed'][service] = f"应用不存在: {service}"
+                        counts['failed'] += 1
+                    elif resolution['status'] == 'suggested' and not args.auto_correct:
+                        suggestions = [name for name, _ in resolution['suggestions']]
+                        emit({'type': 'image', 'environment': environment, 'service': service, 'ok': False,
+                              'error': f"应用不存在: {service}", 'suggestions': suggestions})
+                        snapshot['failed'][service] = f"应用不存在: {service}"
+                        counts['failed'] += 1
+                    else:
+                        if resolution['service'] != service:
+                            emit({'type': 'corrected', 'environment': environment,
+                                  'input': service, 'service': resolution['service']})
+                        targets.append(resolution['service'])
+
+        for item in client.iter_service_images(targets, max_workers=args.workers):
+            record = {'type': 'image', 'environment': environment, 'service': item['service'],
+                      'ok': item['error'] is None, 'elapsed': round(item['elapsed'], 3)}
+            if item['error'] is None:
+                record['images'] = item['images']
+                snapshot['success'].update(item['images'])
+                counts['success'] += 1
+            else:
+                record['error'] = item['error']
+                snapshot['failed'][item['service']] = item['error']
+                counts['failed'] += 1
+            emit(record)
+
+        if not args.no_record:
+            from modules.snapshot_store import get_snapshot_store
+            try:
+                get_snapshot_store().record_query(environment, snapshot, source='cli')
+            except sqlite3.Error as e:
+                logger.warning(f"记录部署快照失败: {e}")
+
+    emit({
+        'type': 'summary',
+        'environments': environments,
+        'services': len(services),
+        'success': counts['success'],
+        'failed': counts['failed'],
+        'elapsed': round(time.perf_counter() - started, 3),
+        'finished_at': datetime.now().isoformat(timespec='seconds')
+    })
+    return 1 if counts['failed'] else 0
+
+
+def run_webhook(args) -> int:
+    """提取一次过滤器作为初始数据，然后接收 Jira webhook 并逐条输出应用结果"""
+    from modules.jira_extractor import JiraExtractor
+    from modules.live_issues import LiveIssueStore, set_live_store
+    from modules.webhook_receiver import WebhookReceiver
+
+    credentials = load_jira_credentials(args.base_url, args.email)
+    if not credentials['base_url'] or not credentials['api_token']:
+        emit({'type': 'error', 'message': "缺少 Jira 凭证，请设置 JIRA_BASE_URL 和 JIRA_API_TOKEN"})
+        return 2
+
+    filter_id = (args.filter or credentials['filter_id']).strip()
+    extractor = JiraExtractor(credentials['base_url'], credentials['api_token'], credentials['email'])
+    field_id = resolve_field_id(extractor, args.field_id or credentials['field_id'], filter_id)
+    if not field_id:
+        emit({'type': 'error', 'message': "无法检测 Affects Project 字段 ID，请使用 --field-id 或设置 JIRA_FIELD_ID"})
+        return 2
+    store = LiveIssueStore(extractor, field_id, filter_id=filter_id)
+    if not args.no_seed:
+        store.seed(extractor.get_affects_projects_compact(filter_id, field_id))
+    set_live_store(store)
+
+    def on_event(result):
+        emit(dict(result, type='event', project_count=len(store.counts)))
+
+    receiver = WebhookReceiver(args.host, args.port, on_event=on_event)
+    emit({'type': 'listening', 'host': args.host, 'port': receiver.port, 'path': f"/webhook?filter={filter_id}",
+          'filter_id': filter_id, 'issues': len(store)})
+    try:
+        receiver.serve_forever()
+    finally:
+        receiver.server.server_close()
+    return 0
+
+
+def run_importtime(args) -> int:
+    """逐个模块在独立子进程中测量导入耗时，输出每个模块的总耗时和最重的直接依赖"""
+    from modules.import_profile import DEFAULT_IMPORT_TARGETS, measure_import
+
+    targets = [m.strip() for arg in args.module or [] for m in arg.split(',') if m.strip()] or DEFAULT_IMPORT_TARGETS
+    failed = 0
+    for target in targets:
+        record = measure_import(target, repeat=args.repeat, top=args.top)
+        if 'error' in record:
+            failed += 1
+            emit({'type': 'error', 'module': target, 'message': record['error']})
+        else:
+            emit(dict(record, type='import'))
+
+    emit({
+        'type': 'summary',
+        'modules': len(targets),
+        'failed': failed,
+        'repeat': args.repeat,
+        'finished_at': datetime.now().isoformat(timespec='seconds')
+    })
+    return 1 if failed else 0
+
+
+def parse_int_list(value: str) -> List[int]:
+    """解析逗号分隔的整数列表（命令行参数类型）"""
+    try:
+        return [int(v) for v in value.split(',') if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"应为逗号分隔的整数: {value}")
+
+
+def run_bench_argocd(args) -> int:
+    """针对本地模拟 ArgoCD 服务运行客户端基准测试，每个场景输出一行 benchmark 记录"""
+    from modules.argocd_benchmark import COMPARED_METRICS, SCENARIO_KEYS, run_argocd_benchmark
+    from modules.benchmark import attach_baseline, load_records, run_metadata
+
+    metadata = run_metadata(args.label)
+    records = run_argocd_benchmark(
+        service_counts=args.services,
+        concurrency=args.concurrency,
+        repeat=args.repeat,
+        samples=args.samples,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        manifests_per_app=args.manifests,
+        manifest_bytes=args.manifest_bytes,
+        operations=args.operation
+    )
+    if args.baseline:
+        records = attach_baseline(records, load_records(args.baseline), SCENARIO_KEYS, COMPARED_METRICS)
+
+    started = time.perf_counter()
+    scenarios = 0
+    for record in records:
+        scenarios += 1
+        emit(dict(record, type='benchmark', label=args.label))
+    emit(dict(metadata, type='summary', scenarios=scenarios, elapsed=round(time.perf_counter() - started, 3)))
+    return 0
+
+
+def run_bench_jira(args) -> int:
+    """用合成问题逐级测量 Jira 提取流水线各阶段的耗时和峰值内存，每个 (问题数, 阶段) 输出一行 benchmark 记录"""
+    from modules.benchmark import attach_baseline, load_records, run_metadata
+    from modules.jira_benchmark import COMPARED_METRICS, SCENARIO_KEYS, run_jira_benchmark
+    from modules.jira_mock import FIELD_SHAPES
+
+    shapes = [shape.strip() for shape in args.shapes.split(',') if shape.strip()] if args.shapes else list(FIELD_SHAPES)
+    unknown = [shape for shape in shapes if shape not in FIELD_SHAPES]
+    if unknown:
+        emit({'type': 'error', 'message': f"未知的字段形态: {', '.join(unknown)}（可选 {', '.join(FIELD_SHAPES)}）"})
+        return 2
+
+    metadata = run_metadata(args.label)
+    records = run_jira_benchmark(
+        issue_counts=args.issues,
+        project_count=args.projects,
+        mapping_count=args.mappings,
+        shapes=shapes,
+        repeat=args.repeat,
+        memory=not args.no_memory,
+        full_fetch=args.full_fetch,
+        latency=args.latency_ms / 1000,
+        stages=args.stage
+    )
+    if args.baseline:
+        records = attach_baseline(records, load_records(args.baseline), SCENARIO_KEYS, COMPARED_METRICS)
+
+    started = time.perf_counter()
+    scenarios = 0
+    for record in records:
+        scenarios += 1
+        emit(dict(record, type='benchmark', label=args.label))
+    emit(dict(metadata, type='summary', scenarios=scenarios, elapsed=round(time.perf_counter() - started, 3)))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog="python -m modules", description="DevOps 工具集命令行（JSON Lines 输出）")
+    parser.add_argument('-v', '--verbose', action='store_true', help="在标准错误输出 INFO 日志")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    jira = subparsers.add_parser('jira', help="提取 Jira 过滤器的 Affects Project")
+    jira.add_argument('--filter', action='append', help="过滤器 ID，可重复或逗号分隔；默认取配置文件")
+    jira.add_argument('--field-id', help="Affects Project 字段 ID，留空自动检测")
+    jira.add_argument('--base-url', help="Jira 地址，默认取 JIRA_BASE_URL")
+    jira.add_argument('--email', help="Jira 邮箱，默认取 JIRA_EMAIL")
+    jira.add_argument('--workers', type=int, default=5, help="多个过滤器时的最大并发请求数")
+    jira.add_argument('--projects-only', action='store_true', help="只输出项目汇总，不输出每个问题")
+    jira.add_argument('--archive', action='store_true', help="同时把结果写入 results/archive")
+    jira.set_defaults(handler=run_jira)
+
+    argocd = subparsers.add_parser('argocd', help="查询 ArgoCD 服务镜像版本")
+    argocd.add_argument('--env', action='append', choices=['preprod', 'staging', 'prod'],
+                        help="环境，可重复；默认 preprod")
+    argocd.add_argument('--service', action='append', help="服务名，可重复或逗号分隔")
+    argocd.add_argument('--services-file', help="服务列表文件（每行一个，- 表示标准输入）；都未指定时读取配置文件")
+    argocd.add_argument('--workers', type=int, default=8, help="最大并发请求数")
+    argocd.add_argument('--no-catalog', action='store_true', help="不使用服务目录做本地校验")
+    argocd.add_argument('--auto-correct', action='store_true', help="自动使用最相近的服务名建议")
+    argocd.add_argument('--no-record', action='store_true', help="不把结果记录到部署快照库")
+    argocd.set_defaults(handler=run_argocd)
+
+    webhook = subparsers.add_parser('webhook', help="接收 Jira webhook 并增量更新过滤器结果")
+    webhook.add_argument('--filter', help="作为初始数据的过滤器 ID；默认取配置文件")
+    webhook.add_argument('--field-id', help="Affects Project 字段 ID，留空自动检测")
+    webhook.add_argument('--base-url', help="Jira 地址，默认取 JIRA_BASE_URL")
+    webhook.add_argument('--email', help="Jira 邮箱，默认取 JIRA_EMAIL")
+    webhook.add_argument('--host', default="127.0.0.1", help="监听地址")
+    webhook.add_argument('--port', type=int, default=8765, help="监听端口")
+    webhook.add_argument('--no-seed', action='store_true', help="不先提取过滤器，从空数据开始")
+    webhook.set_defaults(handler=run_webhook)
+
+    importtime = subparsers.add_parser('importtime', help="测量模块导入耗时（冷启动分析）")
+    importtime.add_argument('--module', action='append', help="模块全名，可重复或逗号分隔；默认测量页面用到的业务模块和主要依赖")
+    importtime.add_argument('--repeat', type=int, default=1, help="每个模块重复测量次数，取最快的一次")
+    importtime.add_argument('--top', type=int, default=5, help="每个模块列出耗时最多的直接依赖个数")
+    importtime.set_defaults(handler=run_importtime)
+
+    bench_argocd = subparsers.add_parser('bench-argocd', help="针对本地模拟 ArgoCD 服务的客户端基准测试")
+    bench_argocd.add_argument('--services', type=parse_int_list, default=[10, 50, 200], help="服务数列表，逗号分隔")
+    bench_argocd.add_argument('--concurrency', type=parse_int_list, default=[1, 4, 8, 16], help="并发数列表，逗号分隔")
+    bench_argocd.add_argument('--operation', action='append', choices=['get_service_images', 'query_multiple_services'],
+                              help="只运行指定操作，可重复；默认全部")
+    bench_argocd.add_argument('--repeat', type=int, default=3, help="每个批量场景的重复次数")
+    bench_argocd.add_argument('--samples', type=int, default=50, help="get_service_images 的调用次数")
+    bench_argocd.add_argument('--latency-ms', type=float, default=20, help="模拟服务每个请求的固定延迟（毫秒）")
+    bench_argocd.add_argument('--jitter-ms', type=float, default=0, help="在固定延迟上增加的随机延迟上限（毫秒）")
+    bench_argocd.add_argument('--failure-rate', type=float, default=0.0, help="注入失败的概率（0-1）")
+    bench_argocd.add_argument('--failure-status', type=int, default=500, help="注入失败的状态码（502/503/504 会触发熔断器）")
+    bench_argocd.add_argument('--manifests', type=int, default=3, help="每个应用的 manifest 个数")
+    bench_argocd.add_argument('--manifest-bytes', type=int, default=2048, help="每个 manifest 的大致大小（字节）")
+    bench_argocd.add_argument('--label', default="", help="本次运行的标签（如提交号），写入每条记录")
+    bench_argocd.add_argument('--baseline', help="之前保存的输出文件，附加每个场景与之相比的变化")
+    bench_argocd.set_defaults(handler=run_bench_argocd)
+
+    bench_jira = subparsers.add_parser('bench-jira', help="用合成问题测量 Jira 提取流水线各阶段的耗时和内存")
+    bench_jira.add_argument('--issues', type=parse_int_list, default=[100, 1000, 10000, 100000],
+                            help="问题数列表，逗号分隔（从小到大）")
+    bench_jira.add_argument('--projects', type=int, default=200, help="项目池大小")
+    bench_jira.add_argument('--mappings', type=int, default=50, help="项目映射规则数")
+    bench_jira.add_argument('--shapes', help="字段形态，逗号分隔（string,list,option,options,adf）；默认全部轮流使用")
+    bench_jira.add_argument('--stage', action='append',
+                            choices=['generate', 'fetch', 'parse_adf_content', 'extract_projects_from_text',
+                                     'apply_project_mappings', 'extract_affects_projects', 'to_dicts'],
+                            help="只运行指定阶段，可重复；默认全部")
+    bench_jira.add_argument('--repeat', type=int, default=3, help="每个阶段的计时次数")
+    bench_jira.add_argument('--latency-ms', type=float, default=0, help="模拟搜索服务每个请求的固定延迟（毫秒）")
+    bench_jira.add_argument('--full-fetch', action='store_true',
+                            help="模拟服务忽略 maxResults 一次返回全部问题（默认与 Jira 一样最多返回 1000 个）")
+    bench_jira.add_argument('--no-memory', action='store_true', help="不测量峰值内存（tracemalloc 较慢）")
+    bench_jira.add_argument('--label', default="", help="本次运行的标签（如提交号），写入每条记录")
+    bench_jira.add_argument('--baseline', help="之前保存的输出文件，附加每个场景与之相比的变化")
+    bench_jira.set_defaults(handler=run_bench_jira)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行主函数
+
+    Returns:
+        退出码：0 全部成功，1 部分失败，2 参数或凭证错误
+    """
+    args = build_parser().parse_args(argv)
+    # 日志统一输出到标准错误，标准输出只保留 JSON Lines
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr, force=True)
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        emit({'type': 'error', 'message': "已中断"})
+        return 130
+    except Exception as e:
+        emit({'type': 'error', 'message': str(e)})
+        return 1
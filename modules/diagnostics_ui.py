@@ -0,0 +1,58 @@
+"""
+诊断面板模块
+两个页面共用的「🩺 诊断信息」折叠面板，展示进程内指标注册表（modules.metrics）的内容
+"""
+
+from datetime import datetime
+
+import streamlit as st
+
+from modules.metrics import get_metrics_registry
+
+
+# 局部重跑：刷新、清空指标不重跑整个页面
+@st.fragment
+def render_diagnostics_panel(client_name: str):
+    """
+    展示进程内指标：各阶段耗时、接口请求耗时、缓存命中率和最近的请求 span，可导出 Prometheus 文本
+
+    Args:
+        client_name: 'argocd' | 'jira'，只展示该客户端的阶段和请求（缓存命中率展示全部）
+    """
+    metrics = get_metrics_registry()
+    with st.expander("🩺 诊断信息（耗时与缓存）"):
+        st.caption("进程内累计（所有会话、后台任务和预热调度器共享）；render 为页面脚本整体运行耗时")
+        ratios = metrics.cache_ratios()
+        if ratios:
+            cols = st.columns(min(len(ratios), 4))
+            for i, (cache, entry) in enumerate(ratios.items()):
+                with cols[i % len(cols)]:
+                    st.metric(f"缓存 {cache}", f"{entry['ratio'] * 100:.0f}%",
+                              help=f"命中 {entry['hits']} / 未命中 {entry['misses']}")
+        stages = metrics.stage_summary(client_name)
+        if stages:
+            st.markdown("**阶段耗时**")
+            st.dataframe(stages, use_container_width=True, hide_index=True)
+        endpoints = metrics.endpoint_summary(client_name)
+        if endpoints:
+            st.markdown("**接口请求**")
+            st.dataframe(endpoints, use_container_width=True, hide_index=True)
+        spans = metrics.recent_spans(50, client_name)
+        if spans:
+            st.markdown("**最近的请求**（ttfb 为收到响应头的耗时，含 DNS / 连接 / TLS 和服务器处理）")
+            st.dataframe(
+                [dict(span, time=datetime.fromtimestamp(span['time']).strftime('%H:%M:%S')) for span in spans],
+                use_container_width=True, hide_index=True
+            )
+        if not (stages or endpoints or spans):
+            st.info("还没有记录，执行一次查询后再查看")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.button("🔄 刷新", key=f"diagnostics_refresh_{client_name}")
+        with col2:
+            st.download_button("📥 导出 Prometheus 指标", metrics.to_prometheus(), file_name="metrics.prom",
+                               mime="text/plain", on_click="ignore", key=f"diagnostics_export_{client_name}")
+        with col3:
+            if st.button("🗑️ 清空指标", key=f"diagnostics_reset_{client_name}"):
+                metrics.reset()
+                st.rerun(scope="fragment")
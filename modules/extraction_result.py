@@ -0,0 +1,215 @@
+"""
+紧凑的列式提取结果模块
+每个字段一列，状态和项目名称通过字典编码为整数 ID，避免每行重复存储相同的字符串
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Iterator, Optional
+
+
+class ResultRow(Mapping):
+    """单行结果的只读字典视图（按需从列中读取，不复制数据）"""
+
+    __slots__ = ('_result', '_pos')
+
+    def __init__(self, result: "ExtractionResult", pos: int):
+        self._result = result
+        self._pos = pos
+
+    def __getitem__(self, key: str):
+        return self._result.value(self._pos, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ExtractionResult.COLUMNS)
+
+    def __len__(self) -> int:
+        return len(ExtractionResult.COLUMNS)
+
+    def to_dict(self) -> Dict:
+        """转换为普通字典"""
+        return {key: self[key] for key in ExtractionResult.COLUMNS}
+
+    def __repr__(self) -> str:
+        return f"ResultRow({self.to_dict()!r})"
+
+
+class ExtractionResult(Sequence):
+    """
+    列式存储的 Affects Project 提取结果
+
+    - issue_key / summary: 字符串列
+    - status: 状态字典 + uint16 编码列
+    - affects_projects: 项目字典 + CSR 格式（offsets + ids）的 uint32 编码列
+    - affects_projects_raw: 仅在与 ", ".join(projects) 不同时单独保存
+    """
+
+    COLUMNS = ('issue_key', 'summary', 'status', 'affects_projects', 'affects_projects_raw')
+
+    def __init__(self):
+        self.issue_keys: List[str] = []
+        self.summaries: List[str] = []
+        self.status_codes = array('H')
+        self.statuses: List[str] = []
+        self.project_offsets = array('I', [0])
+        self.project_ids = array('I')
+        self.project_names: List[str] = []
+        self._status_ids: Dict[str, int] = {}
+        self._project_ids: Dict[str, int] = {}
+        self._key_positions: Dict[str, int] = {}
+        self._raw_overrides: Dict[int, str] = {}
+
+    # ------------------------------------------------------------------
+    # 构建
+    # ------------------------------------------------------------------
+
+    def encode_project(self, name: str) -> int:
+        """获取项目名称对应的 ID（不存在时分配新的 ID，名称会被 intern）"""
+        project_id = self._project_ids.get(name)
+        if project_id is None:
+            name = sys.intern(name)
+            project_id = len(self.project_names)
+            self.project_names.append(name)
+            self._project_ids[name] = project_id
+        return project_id
+
+    def _encode_status(self, status: str) -> int:
+        """获取状态对应的编码（不存在时分配新的编码）"""
+        code = self._status_ids.get(status)
+        if code is None:
+            code = len(self.statuses)
+            self.statuses.append(sys.intern(status))
+            self._status_ids[status] = code
+        return code
+
+    def append(self, issue_key: str, summary: str, status: str, projects: List[str], raw: str = None):
+        """
+        追加一行结果
+
+        Args:
+            issue_key: 问题 Key
+            summary: 问题摘要
+            status: 问题状态
+            projects: 影响的项目列表
+            raw: 原始项目字符串，为 None 时等于 ", ".join(projects)
+        """
+        pos = len(self.issue_keys)
+        self.issue_keys.append(issue_key)
+        self.summaries.append(summary)
+        self.status_codes.append(self._encode_status(status))
+        self.project_ids.extend(self.encode_project(p) for p in projects)
+        self.project_offsets.append(len(self.project_ids))
+        self._key_positions.setdefault(issue_key, pos)
+        if raw is not None and raw != ", ".join(projects):
+            self._raw_overrides[pos] = raw
+
+    @classmethod
+    def from_dicts(cls, results: List[Dict]) -> "ExtractionResult":
+        """从旧的 list-of-dicts 结果构建"""
+        compact = cls()
+        for result in results:
+            compact.append(
+                result.get('issue_key', ''),
+                result.get('summary', ''),
+                result.get('status', ''),
+                result.get('affects_projects', []) or [],
+                result.get('affects_projects_raw', '')
+            )
+        return compact
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def project_id_slice(self, pos: int) -> array:
+        """获取某一行的项目 ID 列表"""
+        return self.project_ids[self.project_offsets[pos]:self.project_offsets[pos + 1]]
+
+    def projects_of(self, pos: int) -> List[str]:
+        """获取某一行的项目名称列表"""
+        names = self.project_names
+        return [names[i] for i in self.project_id_slice(pos)]
+
+    def value(self, pos: int, column: str):
+        """读取某一行某一列的值"""
+        if column == 'issue_key':
+            return self.issue_keys[pos]
+        if column == 'summary':
+            return self.summaries[pos]
+        if column == 'status':
+            return self.statuses[self.status_codes[pos]]
+        if column == 'affects_projects':
+            return self.projects_of(pos)
+        if column == 'affects_projects_raw':
+            raw = self._raw_overrides.get(pos)
+            return raw if raw is not None else ", ".join(self.projects_of(pos))
+        raise KeyError(column)
+
+    def find(self, issue_key: str) -> Optional[ResultRow]:
+        """按问题 Key 查找行"""
+        pos = self._key_positions.get(issue_key)
+        return ResultRow(self, pos) if pos is not None else None
+
+    def positions(self, issue_keys: List[str]) -> List[int]:
+        """把问题 Key 列表转换为行号列表（忽略不存在的 Key）"""
+        key_positions = self._key_positions
+        return [key_positions[key] for key in issue_keys if key in key_positions]
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [ResultRow(self, i) for i in range(*pos.indices(len(self)))]
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError(pos)
+        return ResultRow(self, pos)
+
+    def __len__(self) -> int:
+        return len(self.issue_keys)
+
+    def to_dicts(self) -> List[Dict]:
+        """转换为旧的 list-of-dicts 格式（用于 JSON 导出和向后兼容）"""
+        return [ResultRow(self, pos).to_dict() for pos in range(len(self))]
+
+    def to_dataframe(self):
+        """
+        转换为 pandas DataFrame
+
+        状态列直接以编码数组构建 Categorical（共享底层缓冲区），
+        字符串列共享同一批 str 对象，不复制字符串内容。
+
+        Returns:
+            pandas.DataFrame
+        """
+        import numpy as np
+        import pandas as pd
+
+        count = len(self)
+        codes = np.frombuffer(self.status_codes, dtype=np.uint16) if count else np.array([], dtype=np.uint16)
+        status = pd.Categorical.from_codes(codes, categories=pd.Index(self.statuses, dtype=object))
+
+        # 列表列必须逐行填充 object 数组，避免 numpy 把等长列表展开成二维
+        projects = np.empty(count, dtype=object)
+        raws = np.empty(count, dtype=object)
+        for pos in range(count):
+            projects[pos] = self.projects_of(pos)
+            raws[pos] = self.value(pos, 'affects_projects_raw')
+
+        return pd.DataFrame({
+            'issue_key': np.array(self.issue_keys, dtype=object),
+            'summary': np.array(self.summaries, dtype=object),
+            'status': status,
+            'affects_projects': projects,
+            'affects_projects_raw': raws
+        }, copy=False)
+
+    def memory_usage(self) -> int:
+        """估算列数据占用的字节数（不含共享的字符串对象）"""
+        return (
+            self.status_codes.itemsize * len(self.status_codes)
+            + self.project_ids.itemsize * len(self.project_ids)
+            + self.project_offsets.itemsize * len(self.project_offsets)
+            + sys.getsizeof(self.issue_keys) + sys.getsizeof(self.summaries)
+            + sys.getsizeof(self.project_names) + sys.getsizeof(self._raw_overrides)
+        )
@@ -0,0 +1,140 @@
+"""
+导入耗时测量模块
+在独立的子进程中用 python -X importtime 导入每个模块，解析输出得到该模块的总耗时、
+自身耗时以及耗时最多的直接依赖，用于检查冷启动时哪些模块拖慢了页面首次打开
+
+用法示例：
+    python -m modules importtime
+    python -m modules importtime --module modules.argocd_client --module pandas --repeat 3
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# 默认测量的模块：页面直接导入的业务模块，以及作为参照的重量级依赖
+DEFAULT_IMPORT_TARGETS = [
+    'modules.argocd_client',
+    'modules.jira_extractor',
+    'modules.release_pipeline',
+    'modules.snapshot_store',
+    'modules.prewarm',
+    'modules.live_issues',
+    'modules.webhook_receiver',
+    'streamlit',
+    'pandas',
+    'numpy',
+    'requests',
+    'yaml'
+]
+
+# 业务模块不应在导入时加载的依赖（出现在 heavy 中说明延迟导入失效）
+HEAVY_DEPENDENCIES = ('pandas', 'numpy', 'yaml', 'requests', 'urllib3')
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """
+    解析 -X importtime 的输出
+
+    Args:
+        output: 子进程的标准错误输出
+
+    Returns:
+        [{'module', 'depth', 'self_us', 'cumulative_us'}, ...]（与输出顺序相同，依赖在前）
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # 跳过表头
+            continue
+        name = parts[2].rstrip()
+        # 名称前固定一个空格，之后每层嵌套缩进两个空格
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append({
+            'module': name.strip(),
+            'depth': depth,
+            'self_us': int(parts[0]),
+            'cumulative_us': int(parts[1])
+        })
+    return entries
+
+
+def summarize_import(entries: List[Dict], target: str, top: int = 5) -> Optional[Dict]:
+    """
+    从解析结果中汇总一个模块的导入耗时
+
+    Args:
+        entries: parse_importtime() 的结果
+        target: 模块全名
+        top: 返回耗时最多的直接依赖个数
+
+    Returns:
+        {'module', 'cumulative_ms', 'self_ms', 'children': [...], 'heavy': {...}}，未找到时返回 None
+    """
+    index = next((i for i, e in enumerate(entries) if e['depth'] == 0 and e['module'] == target), None)
+    if index is None:
+        return None
+
+    # 目标模块导入期间加载的模块紧挨在它之前输出，直到遇到上一个顶层条目
+    start = index
+    while start > 0 and entries[start - 1]['depth'] > 0:
+        start -= 1
+    nested = entries[start:index]
+    children = sorted((e for e in nested if e['depth'] == 1), key=lambda e: e['cumulative_us'], reverse=True)
+    heavy = {e['module']: round(e['cumulative_us'] / 1000, 1) for e in nested if e['module'] in HEAVY_DEPENDENCIES}
+
+    return {
+        'module': target,
+        'cumulative_ms': round(entries[index]['cumulative_us'] / 1000, 1),
+        'self_ms': round(entries[index]['self_us'] / 1000, 1),
+        'children': [{'module': e['module'], 'cumulative_ms': round(e['cumulative_us'] / 1000, 1)} for e in children[:top]],
+        'heavy': heavy
+    }
+
+
+def measure_import(target: str, repeat: int = 1, top: int = 5, cwd: Optional[str] = None) -> Dict:
+    """
+    在新的子进程中导入模块并测量耗时（每次都是冷导入，不受当前进程已加载模块影响）
+
+    Args:
+        target: 模块全名
+        repeat: 重复次数，取总耗时最少的一次
+        top: 返回耗时最多的直接依赖个数
+        cwd: 子进程工作目录，默认为项目根目录（保证 modules 包可以导入）
+
+    Returns:
+        summarize_import() 的结果，失败时为 {'module', 'error'}
+    """
+    cwd = cwd or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best = None
+    for _ in range(max(1, repeat)):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {target}"],
+            cwd=cwd, capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            error = process.stderr.strip().splitlines()
+            return {'module': target, 'error': error[-1] if error else f"exit {process.returncode}"}
+        summary = summarize_import(parse_importtime(process.stderr), target, top)
+        if summary and (best is None or summary['cumulative_ms'] < best['cumulative_ms']):
+            best = summary
+    return best or {'module': target, 'error': "未找到导入记录"}
+
+
+def measure_imports(targets: Optional[List[str]] = None, repeat: int = 1, top: int = 5) -> List[Dict]:
+    """
+    逐个测量模块导入耗时
+
+    Args:
+        targets: 模块列表，默认 DEFAULT_IMPORT_TARGETS
+        repeat: 每个模块的重复次数
+        top: 每个模块返回的直接依赖个数
+
+    Returns:
+        measure_import() 结果列表（与 targets 顺序相同）
+    """
+    return [measure_import(target, repeat, top) for target in targets or DEFAULT_IMPORT_TARGETS]
@@ -0,0 +1,203 @@
+"""
+Jira 提取流水线基准测试模块
+用合成问题（modules.jira_mock）逐级测量提取流水线各阶段在 100 到 100k 个问题时的耗时和峰值内存：
+
+    generate                  生成合成问题（输入数据本身的大小）
+    fetch                     通过本地模拟搜索接口获取问题（search_issues，含 JSON 解码）
+    parse_adf_content         解析 ADF 形态的字段值
+    extract_projects_from_text  从字段文本中拆分项目
+    apply_project_mappings    应用项目映射规则
+    extract_affects_projects  完整解析（字段解析 + 映射 + 项目汇总 + 倒排索引，列式结果）
+    to_dicts                  列式结果转换为 list-of-dicts（_extract_affects_projects 的最后一步）
+
+每个阶段先计时（重复 repeat 次），再在 tracemalloc 下单独运行一次测量峰值内存（tracemalloc 会拖慢执行，不与计时混用）
+
+用法示例：
+    python -m modules bench-jira --issues 100,1000,10000,100000 > jira_before.jsonl
+    python -m modules bench-jira --issues 10000 --mappings 500 --shapes adf --baseline jira_before.jsonl
+"""
+
+import gc
+import logging
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from modules.benchmark import summarize_latencies
+from modules.jira_extractor import JiraExtractor
+from modules.jira_mock import (DEFAULT_FIELD_ID, FIELD_SHAPES, MockJiraServer, generate_issues,
+                               synthetic_mappings, synthetic_projects)
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('generate', 'fetch', 'parse_adf_content', 'extract_projects_from_text', 'apply_project_mappings',
+          'extract_affects_projects', 'to_dicts')
+
+# search_issues 请求的 maxResults（与 get_affects_projects_compact 一致）
+FETCH_MAX_RESULTS = 1000
+
+# 标识同一场景的字段和对比的指标（用于 attach_baseline）
+SCENARIO_KEYS = ('operation', 'issues', 'projects', 'mappings', 'shapes')
+COMPARED_METRICS = {
+    'p50_ms': ('latency_ms', 'p50'),
+    'peak_kb': ('peak_kb',),
+    'throughput': ('throughput',)
+}
+
+
+def _field_text(extractor: JiraExtractor, value) -> str:
+    """把合成字段值转换为 extract_projects_from_text 的输入文本（与 _parse_affects_project_field 一致）"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return " ".join(str(item.get('value', item)) if isinstance(item, dict) else str(item) for item in value)
+    if isinstance(value, dict):
+        if 'type' in value and 'content' in value:
+            return extractor.parse_adf_content(value)
+        return str(value.get('value', value))
+    return str(value) if value else ""
+
+
+def measure(func: Callable[[], object], repeat: int, memory: bool) -> Tuple[object, List[float], Optional[int]]:
+    """
+    计时并（可选）测量峰值内存
+
+    Args:
+        func: 无参函数
+        repeat: 计时次数
+        memory: 是否在 tracemalloc 下再运行一次测量峰值内存
+
+    Returns:
+        (最后一次的返回值, 每次耗时（秒）, 峰值内存增量（字节）或 None)
+    """
+    result = None
+    durations = []
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started)
+
+    peak = None
+    if memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            result = func()
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+    return result, durations, peak
+
+
+def run_jira_benchmark(issue_counts: Sequence[int] = (100, 1000, 10000, 100000), project_count: int = 200,
+                       mapping_count: int = 50, shapes: Sequence[str] = FIELD_SHAPES, repeat: int = 3,
+                       memory: bool = True, full_fetch: bool = False, latency: float = 0.0,
+                       stages: Optional[Sequence[str]] = None, field_id: str = DEFAULT_FIELD_ID) -> Iterator[Dict]:
+    """
+    按问题数逐级运行各阶段
+
+    Args:
+        issue_counts: 问题数列表（从小到大）
+        project_count: 项目池大小
+        mapping_count: 映射规则数
+        shapes: 字段形态
+        repeat: 每个阶段的计时次数
+        memory: 是否测量峰值内存
+        full_fetch: 模拟服务忽略 maxResults，一次返回全部问题（默认与 Jira 一样按 maxResults 截断）
+        latency: 模拟服务每个请求的固定延迟（秒）
+        stages: 只运行这些阶段，默认全部
+        field_id: 'Affects Project' 字段 ID
+
+    Yields:
+        每个 (问题数, 阶段) 一条记录；relative_per_issue 为单个问题耗时相对最小问题数时的倍数，
+        明显大于 1 说明该阶段开始非线性增长
+    """
+    stages = stages or STAGES
+    projects = synthetic_projects(project_count)
+    extractor = JiraExtractor("http://127.0.0.1", "benchmark-token", "benchmark@example.com")
+    extractor.project_mappings = synthetic_mappings(projects, mapping_count)
+    smallest_per_issue: Dict[str, float] = {}
+    scenario = {'projects': project_count, 'mappings': mapping_count, 'shapes': ",".join(shapes)}
+
+    def record(stage: str, count: int, durations: List[float], peak: Optional[int], items: int,
+               processed: Optional[int] = None, **extra) -> Dict:
+        # processed: 实际处理的问题数（fetch 被 maxResults 截断时小于 count），用于计算单个问题耗时和吞吐
+        processed = count if processed is None else processed
+        p50 = summarize_latencies(durations)['p50'] / 1000
+        per_issue = p50 / processed * 1e6 if processed else 0.0
+        smallest_per_issue.setdefault(stage, per_issue)
+        base = smallest_per_issue[stage]
+        return dict(
+            scenario,
+            operation=stage,
+            issues=count,
+            items=items,
+            samples=len(durations),
+            latency_ms=summarize_latencies(durations),
+            per_issue_us=round(per_issue, 3),
+            relative_per_issue=round(per_issue / base, 2) if base else None,
+            throughput=round(processed / p50, 1) if p50 else 0.0,
+            peak_kb=round(peak / 1024, 1) if peak is not None else None,
+            **extra
+        )
+
+    for count in issue_counts:
+        issues, durations, peak = measure(
+            lambda: generate_issues(count, projects, field_id, shapes), 1, memory
+        )
+        if 'generate' in stages:
+            yield record('generate', count, durations, peak, len(issues))
+
+        if 'fetch' in stages:
+            server = MockJiraServer(issues, latency=latency, ignore_max_results=full_fetch).start()
+            try:
+                client = JiraExtractor(server.url, "benchmark-token", "benchmark@example.com")
+                # 预热一次，建立连接，不计入统计
+                client.search_issues("benchmark", field_id, max_results=1)
+                server.reset_counts()
+                fetched, durations, peak = measure(
+                    lambda: client.search_issues("benchmark", field_id, max_results=FETCH_MAX_RESULTS), repeat, memory
+                )
+                requests = server.reset_counts()
+            finally:
+                server.stop()
+            yield record('fetch', count, durations, peak, len(fetched), processed=len(fetched), fetched=len(fetched),
+                         truncated=len(fetched) < count, requests=requests)
+
+        values = [issue['fields'].get(field_id) for issue in issues]
+        if 'parse_adf_content' in stages:
+            adf_values = [v for v in values if isinstance(v, dict) and 'type' in v and 'content' in v]
+            _, durations, peak = measure(lambda: [extractor.parse_adf_content(v) for v in adf_values], repeat, memory)
+            yield record('parse_adf_content', count, durations, peak, len(adf_values))
+
+        texts = [_field_text(extractor, v) for v in values]
+        project_lists, durations, peak = measure(
+            lambda: [extractor.extract_projects_from_text(text) for text in texts], repeat, memory
+        )
+        if 'extract_projects_from_text' in stages:
+            yield record('extract_projects_from_text', count, durations, peak, len(texts))
+
+        if 'apply_project_mappings' in stages:
+            non_empty = [projects_ for projects_ in project_lists if projects_]
+            _, durations, peak = measure(
+                lambda: [extractor._apply_project_mappings(projects_) for projects_ in non_empty], repeat, memory
+            )
+            yield record('apply_project_mappings', count, durations, peak, len(non_empty))
+
+        if 'extract_affects_projects' in stages or 'to_dicts' in stages:
+            results, durations, peak = measure(
+                lambda: extractor._extract_affects_projects_compact(issues, field_id), repeat, memory
+            )
+            if 'extract_affects_projects' in stages:
+                yield record('extract_affects_projects', count, durations, peak, len(results),
+                             unique_projects=len(extractor.get_unique_projects()))
+            if 'to_dicts' in stages:
+                _, durations, peak = measure(results.to_dicts, repeat, memory)
+                yield record('to_dicts', count, durations, peak, len(results))
+
+        # 释放本轮数据，避免影响下一轮的内存测量
+        del issues, values, texts, project_lists
+        gc.collect()
@@ -1,24 +1,44 @@
 # jira_extractor.py
-import requests
 import json
 import csv
+import io
 import os
 import logging
 import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
+
+from modules.extraction_result import ExtractionResult
+from modules.lazy_import import lazy_module
+from modules.metrics import get_metrics_registry
+from modules.project_index import ProjectIndex
+from modules.results_archive import ResultsArchive, prune_files
+
+# requests 在创建提取器时才导入，页面冷启动不承担这部分开销
+requests = lazy_module('requests')
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class JiraExtractor:
-    def __init__(self, base_url: str, api_token: str, email: str):
+    # 批量 key 查询时每个 JQL 包含的问题数
+    BATCH_KEY_CHUNK_SIZE = 100
+
+    def __init__(self, base_url: str, api_token: str, email: str, pool_size: int = 10):
         self.base_url = base_url.rstrip('/')
         self.api_token = api_token
         self.email = email
         self.session = requests.Session()
         
+        # 连接池：并发批量提取时复用同一个 Session 的连接
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
         # 设置认证头
         if email:
             # 基本认证（邮箱 + API 令牌）
@@ -38,6 +58,39 @@ class JiraExtractor:
         
         # 加载项目映射配置
         self.project_mappings = self._load_project_mappings()
+        
+        # 最近一次提取建立的 项目 -> 问题 倒排索引
+        self.project_index = ProjectIndex()
+        
+        # 最近一次提取的项目汇总（频次、首次/最后出现的问题、映射来源）
+        self.project_aggregation = self._new_project_aggregation()
+        
+        # 解析过程中应用项目映射的累计耗时（秒），每次提取结束时计入 map 阶段
+        self._mapping_seconds = 0.0
+
+    def _request(self, method: str, url: str, endpoint: str, **kwargs) -> "requests.Response":
+        """
+        通过 Session 发送请求，并记录请求 span（接口、状态码、字节数、耗时）
+        
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            endpoint: 接口名（用于指标标签，如 'search'、'search_jql'）
+            
+        Returns:
+            响应
+        """
+        metrics = get_metrics_registry()
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            metrics.record_request('jira', method, endpoint, None, 0, time.perf_counter() - started, error=str(e))
+            raise
+        # elapsed 为收到响应头的耗时（DNS、连接、TLS 和 Jira 查询），其余为下载响应体
+        metrics.record_request('jira', method, endpoint, response.status_code, len(response.content),
+                               time.perf_counter() - started, ttfb=response.elapsed.total_seconds())
+        return response
 
     def _load_project_mappings(self) -> Dict[str, List[str]]:
         """加载项目映射配置"""
@@ -124,7 +177,7 @@ class JiraExtractor:
             logger.info(f"URL: {url}")
             logger.info(f"JQL: {jql}")
             
-            response = self.session.post(url, json=payload)
+            response = self._request('POST', url, 'search_jql', json=payload)
             
             if response.status_code == 410:
                 logger.warning(f"增强 JQL API 返回 410 Gone，尝试传统 API...")
@@ -182,7 +235,7 @@ class JiraExtractor:
                 }
                 
                 logger.info(f"尝试传统 API v{api_version}...")
-                response = self.session.get(url, params=params)
+                response = self._request('GET', url, f'search_v{api_version}', params=params)
                 
                 if response.status_code == 410:
                     logger.warning(f"传统 API v{api_version} 返回 410 Gone")
@@ -234,7 +287,7 @@ class JiraExtractor:
         }
         
         try:
-            response = self.session.get(url, params=params)
+            response = self._request('GET', url, 'search', params=params)
             
             # 如果过滤器 API 返回 410，尝试使用直接 JQL 查询
             if response.status_code == 410:
@@ -362,7 +415,7 @@ class JiraExtractor:
                     'startAt': 0
                 }
                 
-                response = self.session.get(url, params=params)
+                response = self._request('GET', url, 'search', params=params)
                 response.raise_for_status()
                 issues = response.json().get('issues', [])
             
@@ -375,7 +428,7 @@ class JiraExtractor:
             for issue in issues:
                 issue_key = issue.get('key', '')
                 issue_url = f"{self.base_url}/rest/api/3/issue/{issue_key}?expand=names"
-                issue_data = self.session.get(issue_url).json()
+                issue_data = self._request('GET', issue_url, 'issue').json()
                 fields = issue_data.get('fields', {})
                 names = issue_data.get('names', {})
 
@@ -403,29 +456,234 @@ class JiraExtractor:
 
     def get_affects_projects(self, filter_id, custom_field_id: Optional[str]) -> List[Dict]:
         """获取影响项目列表（使用新的API）"""
+        return self.get_affects_projects_compact(filter_id, custom_field_id).to_dicts()
+
+    def can_view_filter(self, filter_id) -> bool:
+        """当前凭证能否查看过滤器（凭证无效、无权限或请求失败时返回 False）"""
         try:
-            # 首先尝试使用过滤器搜索
-            issues = self.search_issues(filter_id, custom_field_id, max_results=1000)
-        except Exception as e:
-            logger.error(f"使用过滤器搜索失败: {e}")
-            # 如果失败，尝试使用直接JQL查询
-            fallback_jql = (
-                'project = SP '
-                'AND issuetype IN (standardIssueTypes(), subTaskIssueTypes()) '
-                'AND status = Done '
-                'AND resolution = "Waiting to Release" '
-                'AND updated >= -100d '
-                'AND "sp team[dropdown]" != Titan '
-                'ORDER BY Key ASC'
-            )
-            issues = self.search_issues_by_jql(fallback_jql, custom_field_id, max_results=1000)
-        
-        return self._extract_affects_projects(issues, custom_field_id)
+            response = self._request('GET', f"{self.base_url}/rest/api/3/filter/{filter_id}", 'filter', timeout=10)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"过滤器 {filter_id} 权限校验失败: {e}")
+            return False
+        return response.status_code == 200
+
+    def get_affects_projects_compact(self, filter_id, custom_field_id: Optional[str]) -> ExtractionResult:
+        """获取影响项目列表（列式紧凑结果）"""
+        with get_metrics_registry().stage('jira', 'fetch'):
+            try:
+                # 首先尝试使用过滤器搜索
+                issues = self.search_issues(filter_id, custom_field_id, max_results=1000)
+            except Exception as e:
+                logger.error(f"使用过滤器搜索失败: {e}")
+                # 如果失败，尝试使用直接JQL查询
+                fallback_jql = (
+                    'project = SP '
+                    'AND issuetype IN (standardIssueTypes(), subTaskIssueTypes()) '
+                    'AND status = Done '
+                    'AND resolution = "Waiting to Release" '
+                    'AND updated >= -100d '
+                    'AND "sp team[dropdown]" != Titan '
+                    'ORDER BY Key ASC'
+                )
+                issues = self.search_issues_by_jql(fallback_jql, custom_field_id, max_results=1000)
+        
+        return self._extract_affects_projects_compact(issues, custom_field_id)
+
+    def get_affects_projects_batch(self, filter_ids: List[str], custom_field_id: Optional[str],
+                                   max_workers: int = 5,
+                                   progress: Optional[Callable[[int, int, str], None]] = None) -> Dict:
+        """
+        并发提取多个过滤器的影响项目
+        
+        先并发获取每个过滤器的问题 Key 列表（不含 Affects Project 字段），
+        再按 Key 批量获取所有过滤器问题的并集，每个问题只获取和解析一次。
+        
+        Args:
+            filter_ids: 过滤器 ID 列表
+            custom_field_id: 'Affects Project' 字段 ID
+            max_workers: 最大并发请求数
+            progress: 进度回调 progress(done, total, message)，每个请求完成后调用；
+                      回调抛出异常时取消剩余请求并向上抛出（用于取消后台任务）
+            
+        Returns:
+            {
+                'results': ExtractionResult,              # 所有过滤器问题的并集
+                'filters': {filter_id: [issue_key, ...]},
+                'filter_projects': {filter_id: [project, ...]},
+                'failed': {filter_id: error_message},
+                'union_projects': [project, ...],
+                'intersection_projects': [project, ...]
+            }
+        """
+        filter_ids = list(dict.fromkeys(str(f).strip() for f in filter_ids if str(f).strip()))
+        filters = {}
+        failed = {}
+        
+        # 总请求数 = 过滤器数 + Key 分批数（第二步开始前才知道分批数，先按过滤器数计）
+        done = 0
+        total = len(filter_ids)
+        
+        def report(message):
+            nonlocal done
+            done += 1
+            if progress:
+                progress(done, total, message)
+        
+        # 两步请求合计为 fetch 阶段
+        fetch_started = time.perf_counter()
+        
+        # 第一步：并发获取每个过滤器的问题 Key
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.search_issues_by_jql, f'filter={filter_id}', None, 1000): filter_id
+                for filter_id in filter_ids
+            }
+            try:
+                for future in as_completed(futures):
+                    filter_id = futures[future]
+                    try:
+                        filters[filter_id] = [issue.get('key', '') for issue in future.result()]
+                    except Exception as e:
+                        logger.error(f"过滤器 {filter_id} 查询失败: {e}")
+                        failed[filter_id] = str(e)
+                    report(f"过滤器 {filter_id}")
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        
+        # 第二步：按 Key 分批并发获取所有问题的并集（每个问题只获取一次）
+        union_keys = list(dict.fromkeys(key for filter_id in filter_ids for key in filters.get(filter_id, []) if key))
+        chunks = [union_keys[i:i + self.BATCH_KEY_CHUNK_SIZE] for i in range(0, len(union_keys), self.BATCH_KEY_CHUNK_SIZE)]
+        issues_by_key = {}
+        total += len(chunks)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.search_issues_by_jql, f"key in ({','.join(chunk)})", custom_field_id, len(chunk))
+                for chunk in chunks
+            ]
+            try:
+                for future in as_completed(futures):
+                    for issue in future.result():
+                        issues_by_key[issue.get('key', '')] = issue
+                    report(f"已获取 {len(issues_by_key)}/{len(union_keys)} 个问题")
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        
+        get_metrics_registry().observe('stage_duration_seconds', time.perf_counter() - fetch_started,
+                                       client='jira', stage='fetch')
+        logger.info(f"批量提取: {len(filter_ids)} 个过滤器, {len(union_keys)} 个唯一问题")
+        
+        # 第三步：每个问题只解析一次
+        results = self._extract_affects_projects_compact(
+            [issues_by_key[key] for key in union_keys if key in issues_by_key], custom_field_id
+        )
+        
+        filter_projects = {}
+        for filter_id, keys in filters.items():
+            projects = set()
+            for key in keys:
+                row = results.find(key)
+                if row is not None:
+                    projects.update(row['affects_projects'])
+            filter_projects[filter_id] = sorted(projects)
+        
+        project_sets = [set(filter_projects[filter_id]) for filter_id in filter_ids if filter_id in filter_projects]
+        return {
+            'results': results,
+            'filters': {filter_id: filters[filter_id] for filter_id in filter_ids if filter_id in filters},
+            'filter_projects': {filter_id: filter_projects[filter_id] for filter_id in filter_ids if filter_id in filter_projects},
+            'failed': failed,
+            'union_projects': sorted(set().union(*project_sets)) if project_sets else [],
+            'intersection_projects': sorted(set.intersection(*project_sets)) if project_sets else []
+        }
+
+    def _parse_affects_project_field(self, fields: Dict, custom_field_id: Optional[str]):
+        """
+        解析单个问题的 'Affects Project' 字段
+        
+        Args:
+            fields: 问题的 fields 字典
+            custom_field_id: 'Affects Project' 字段 ID
+            
+        Returns:
+            (projects, direct_projects, affects_project_str): 映射后的项目列表、
+            字段中直接出现的项目集合、项目字符串表示
+        """
+        # 如果没有字段ID，跳过 Affects Project 提取
+        if custom_field_id is None:
+            affects_project_raw = ''
+        else:
+            affects_project_raw = fields.get(custom_field_id, '')
+        
+        # 处理不同类型的字段值
+        projects = []
+        direct_projects = set()
+        affects_project_str = ""
+        
+        if affects_project_raw:
+            if isinstance(affects_project_raw, str):
+                # 字符串类型，直接处理
+                affects_project_str = affects_project_raw
+                projects = self.extract_projects_from_text(affects_project_str)
+            elif isinstance(affects_project_raw, list):
+                # 数组类型，提取每个元素的值
+                project_texts = []
+                for item in affects_project_raw:
+                    if isinstance(item, dict):
+                        # 检查是否是 ADF 格式
+                        if 'type' in item and 'content' in item:
+                            text = self.parse_adf_content(item)
+                            project_texts.append(text)
+                        else:
+                            # 普通对象，尝试提取 value 或 name 字段
+                            value = item.get('value', item.get('name', str(item)))
+                            project_texts.append(str(value))
+                    else:
+                        project_texts.append(str(item))
+                
+                affects_project_str = " ".join(project_texts)
+                projects = self.extract_projects_from_text(affects_project_str)
+            elif isinstance(affects_project_raw, dict):
+                # 对象类型，检查是否是 ADF 格式
+                if 'type' in affects_project_raw and 'content' in affects_project_raw:
+                    # ADF 格式，解析文本内容
+                    affects_project_str = self.parse_adf_content(affects_project_raw)
+                    projects = self.extract_projects_from_text(affects_project_str)
+                else:
+                    # 普通对象，尝试提取值
+                    value = affects_project_raw.get('value', affects_project_raw.get('name', str(affects_project_raw)))
+                    affects_project_str = str(value)
+                    projects = self.extract_projects_from_text(affects_project_str)
+            else:
+                # 其他类型，转换为字符串
+                affects_project_str = str(affects_project_raw)
+                projects = self.extract_projects_from_text(affects_project_str)
+            
+            # 应用项目映射
+            direct_projects = set(projects)
+            if projects:
+                mapping_started = time.perf_counter()
+                projects = self._apply_project_mappings(projects)
+                self._mapping_seconds += time.perf_counter() - mapping_started
+                # 重新生成字符串表示
+                affects_project_str = ", ".join(projects)
+        
+        return projects, direct_projects, affects_project_str
 
     def _extract_affects_projects(self, issues: List[Dict], custom_field_id: Optional[str]) -> List[Dict]:
         """从问题列表中提取 'Affects Project' 信息"""
-        results = []
-        all_projects = set()
+        return self._extract_affects_projects_compact(issues, custom_field_id).to_dicts()
+
+    def _extract_affects_projects_compact(self, issues: List[Dict], custom_field_id: Optional[str]) -> ExtractionResult:
+        """从问题列表中提取 'Affects Project' 信息（列式紧凑结果）"""
+        started = time.perf_counter()
+        self._mapping_seconds = 0.0
+        results = ExtractionResult()
+        project_index = ProjectIndex()
+        aggregation = self._new_project_aggregation()
         
         for issue in issues:
             fields = issue.get('fields', {})
@@ -433,78 +691,99 @@ class JiraExtractor:
             summary = fields.get('summary', '')
             status = fields.get('status', {}).get('name', '')
             
-            # 如果没有字段ID，跳过 Affects Project 提取
-            if custom_field_id is None:
-                affects_project_raw = ''
-            else:
-                affects_project_raw = fields.get(custom_field_id, '')
-            
-            # 处理不同类型的字段值
-            projects = []
-            affects_project_str = ""
+            projects, direct_projects, affects_project_str = self._parse_affects_project_field(fields, custom_field_id)
+            if projects:
+                self._aggregate_issue_projects(aggregation, issue_key, projects, direct_projects)
             
-            if affects_project_raw:
-                if isinstance(affects_project_raw, str):
-                    # 字符串类型，直接处理
-                    affects_project_str = affects_project_raw
-                    projects = self.extract_projects_from_text(affects_project_str)
-                elif isinstance(affects_project_raw, list):
-                    # 数组类型，提取每个元素的值
-                    project_texts = []
-                    for item in affects_project_raw:
-                        if isinstance(item, dict):
-                            # 检查是否是 ADF 格式
-                            if 'type' in item and 'content' in item:
-                                text = self.parse_adf_content(item)
-                                project_texts.append(text)
-                            else:
-                                # 普通对象，尝试提取 value 或 name 字段
-                                value = item.get('value', item.get('name', str(item)))
-                                project_texts.append(str(value))
-                        else:
-                            project_texts.append(str(item))
-                    
-                    affects_project_str = " ".join(project_texts)
-                    projects = self.extract_projects_from_text(affects_project_str)
-                elif isinstance(affects_project_raw, dict):
-                    # 对象类型，检查是否是 ADF 格式
-                    if 'type' in affects_project_raw and 'content' in affects_project_raw:
-                        # ADF 格式，解析文本内容
-                        affects_project_str = self.parse_adf_content(affects_project_raw)
-                        projects = self.extract_projects_from_text(affects_project_str)
-                    else:
-                        # 普通对象，尝试提取值
-                        value = affects_project_raw.get('value', affects_project_raw.get('name', str(affects_project_raw)))
-                        affects_project_str = str(value)
-                        projects = self.extract_projects_from_text(affects_project_str)
-                else:
-                    # 其他类型，转换为字符串
-                    affects_project_str = str(affects_project_raw)
-                    projects = self.extract_projects_from_text(affects_project_str)
-                
-                # 应用项目映射
-                if projects:
-                    projects = self._apply_project_mappings(projects)
-                    # 重新生成字符串表示
-                    affects_project_str = ", ".join(projects)
-                
-                # 添加项目到总列表
-                all_projects.update(projects)
-            
-            results.append({
-                'issue_key': issue_key,
-                'summary': summary,
-                'status': status,
-                'affects_projects': projects,
-                'affects_projects_raw': affects_project_str
-            })
+            results.append(issue_key, summary, status, projects, affects_project_str)
+            project_index.add_issue(issue_key, status, projects)
         
+        all_projects = aggregation['counts']
         logger.info(f"发现 {len(all_projects)} 个唯一项目")
         if all_projects:
             logger.info(f"项目: {sorted(all_projects)}")
         
+        self.project_index = project_index
+        self.project_aggregation = aggregation
+        
+        # parse 阶段不含项目映射的耗时（映射单独计为 map 阶段）
+        metrics = get_metrics_registry()
+        metrics.observe('stage_duration_seconds', time.perf_counter() - started - self._mapping_seconds,
+                        client='jira', stage='parse')
+        metrics.observe('stage_duration_seconds', self._mapping_seconds, client='jira', stage='map')
         return results
 
+    @staticmethod
+    def _new_project_aggregation() -> Dict:
+        """创建空的项目汇总结构"""
+        return {
+            'counts': Counter(),         # 项目 -> 影响的问题数
+            'direct_counts': Counter(),  # 项目 -> 直接出现在字段中的问题数
+            'mapped_counts': Counter(),  # 项目 -> 由映射规则添加的问题数
+            'first_seen': {},            # 项目 -> 首次出现的问题 Key
+            'last_seen': {}              # 项目 -> 最后出现的问题 Key
+        }
+
+    @staticmethod
+    def _aggregate_issue_projects(aggregation: Dict, issue_key: str, projects: List[str], direct_projects: set):
+        """把单个问题的项目累加到汇总结构中（每个问题内的重复项目只计一次）"""
+        for project in dict.fromkeys(projects):
+            aggregation['counts'][project] += 1
+            if project in direct_projects:
+                aggregation['direct_counts'][project] += 1
+            else:
+                aggregation['mapped_counts'][project] += 1
+            aggregation['first_seen'].setdefault(project, issue_key)
+            aggregation['last_seen'][project] = issue_key
+
+    def get_project_aggregation(self) -> Dict:
+        """
+        获取最近一次提取的项目汇总
+        
+        Returns:
+            {
+                'counts': Counter({项目: 问题数}),
+                'direct_counts': Counter, 'mapped_counts': Counter,
+                'first_seen': {项目: 问题Key}, 'last_seen': {项目: 问题Key}
+            }
+        """
+        return self.project_aggregation
+
+    def get_unique_projects(self) -> List[str]:
+        """获取最近一次提取的去重项目列表（按名称排序）"""
+        return sorted(self.project_aggregation['counts'])
+
+    def get_project_aggregation_rows(self) -> List[Dict]:
+        """
+        生成按频次排序的项目汇总表（频次降序、名称升序）
+        
+        Returns:
+            [{'project', 'issue_count', 'first_seen', 'last_seen', 'source'}, ...]
+        """
+        return self.aggregation_rows(self.project_aggregation)
+
+    @staticmethod
+    def aggregation_rows(aggregation: Dict) -> List[Dict]:
+        """把项目汇总结构转换为按频次排序的汇总表"""
+        rows = []
+        for project, count in sorted(aggregation['counts'].items(), key=lambda item: (-item[1], item[0])):
+            direct = aggregation['direct_counts'][project]
+            mapped = aggregation['mapped_counts'][project]
+            if direct and mapped:
+                source = f"直接 {direct} / 映射 {mapped}"
+            elif mapped:
+                source = "映射"
+            else:
+                source = "直接"
+            rows.append({
+                'project': project,
+                'issue_count': count,
+                'first_seen': aggregation['first_seen'][project],
+                'last_seen': aggregation['last_seen'][project],
+                'source': source
+            })
+        return rows
+
     def _process_field_value(self, field_val):
         """处理字段值（保持向后兼容）"""
         if isinstance(field_val, str):
@@ -519,18 +798,20 @@ class JiraExtractor:
         else:
             return "", []
 
-    def save_results_to_file(self, results: List[Dict]):
-        """保存结果到文件"""
-        results_dir = "results"
-        os.makedirs(results_dir, exist_ok=True)
-
-        prefix = f"jira_affects_projects_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        json_path = os.path.join(results_dir, f"{prefix}.json")
-        csv_path = os.path.join(results_dir, f"{prefix}.csv")
+    def export_results(self, results) -> Tuple[str, str]:
+        """
+        在内存中生成 JSON 和 CSV 导出内容
         
-        # 保存JSON文件
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        Args:
+            results: ExtractionResult 或 list-of-dicts 结果
+            
+        Returns:
+            (json_content, csv_content)
+        """
+        if isinstance(results, ExtractionResult):
+            results = results.to_dicts()
+        
+        json_content = json.dumps(results, ensure_ascii=False, indent=2)
         
         # 准备CSV数据，确保列名匹配
         csv_data = []
@@ -544,16 +825,66 @@ class JiraExtractor:
             }
             csv_data.append(csv_row)
         
+        buffer = io.StringIO(newline="")
+        if csv_data:
+            fieldnames = list(csv_data[0].keys())
+            writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(csv_data)
+        
+        return json_content, buffer.getvalue()
+
+    def archive_results(self, results, filter_id: str = "", archive: Optional[ResultsArchive] = None) -> Dict:
+        """
+        把结果保存为压缩快照（带索引和保留策略）
+        
+        Args:
+            results: ExtractionResult 或 list-of-dicts 结果
+            filter_id: 过滤器 ID
+            archive: 归档实例，默认使用 results/archive
+            
+        Returns:
+            归档索引条目
+        """
+        archive = archive or ResultsArchive()
+        return archive.save(results, filter_id)
+
+    def save_results_to_file(self, results, max_files: int = 40, max_age_days: float = 30):
+        """
+        保存结果到文件（支持 list-of-dicts 和 ExtractionResult）
+        
+        保存后按数量和时间清理旧的导出文件，避免 results/ 目录无限增长
+        """
+        json_content, csv_content = self.export_results(results)
+        
+        results_dir = "results"
+        os.makedirs(results_dir, exist_ok=True)
+
+        prefix = f"jira_affects_projects_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        json_path = os.path.join(results_dir, f"{prefix}.json")
+        csv_path = os.path.join(results_dir, f"{prefix}.csv")
+        
+        # 保存JSON文件
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(json_content)
+        
         # 保存CSV文件
         with open(csv_path, "w", newline="", encoding="utf-8") as f:
-            if csv_data:
-                fieldnames = list(csv_data[0].keys())
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(csv_data)
+            f.write(csv_content)
+        
+        # 清理旧的导出文件（JSON + CSV 成对出现）
+        prune_files(results_dir, "jira_affects_projects_", max_age_days=max_age_days, max_files=max_files)
         
         return json_path, csv_path
 
+    def get_project_index(self) -> ProjectIndex:
+        """获取最近一次提取建立的 项目 -> 问题 倒排索引"""
+        return self.project_index
+
+    def find_issues_by_project(self, project: str) -> List[str]:
+        """查询影响指定项目的问题 Key 列表（基于最近一次提取）"""
+        return self.project_index.get_issues(project)
+
     def get_project_mappings(self) -> Dict[str, List[str]]:
         """获取当前项目映射配置"""
         return self.project_mappings.copy()
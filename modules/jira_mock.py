@@ -0,0 +1,239 @@
+"""
+合成 Jira 数据和本地模拟搜索服务模块
+生成不同字段形态（字符串、列表、选项对象、ADF）的 'Affects Project' 问题，
+并在后台线程中提供 JiraExtractor 用到的搜索接口，用于基准测试和本地调试
+
+    GET  /rest/api/3/search?jql=filter=...&startAt=&maxResults=
+    GET  /rest/api/2/search
+    POST /rest/api/3/search/jql   {"jql": "key in (...)", "maxResults": ...}
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIELD_ID = "customfield_12605"
+
+# 'Affects Project' 字段在 Jira 中出现过的形态
+FIELD_SHAPES = ('string', 'list', 'option', 'options', 'adf')
+
+STATUSES = ("Done", "In Progress", "To Do", "Waiting to Release")
+
+
+def synthetic_projects(count: int) -> List[str]:
+    """生成 count 个合成项目名（proj-000, proj-001, ...）"""
+    return [f"proj-{i:03d}" for i in range(count)]
+
+
+def synthetic_mappings(projects: Sequence[str], count: int) -> Dict[str, List[str]]:
+    """为前 count 个项目生成映射规则（proj-001 -> [proj-001-cn]）"""
+    return {project: [f"{project}-cn"] for project in projects[:count]}
+
+
+def _adf_document(text: str) -> Dict:
+    """把文本包装为 ADF 文档（每个项目一个段落）"""
+    return {
+        'type': 'doc',
+        'version': 1,
+        'content': [
+            {'type': 'paragraph', 'content': [{'type': 'text', 'text': part}]}
+            for part in text.split(', ')
+        ]
+    }
+
+
+def build_field_value(projects: List[str], shape: str):
+    """
+    按指定形态生成 'Affects Project' 字段值
+
+    Args:
+        projects: 项目列表
+        shape: 'string' | 'list'（字符串数组）| 'option'（单个选项对象）| 'options'（选项对象数组）| 'adf'
+
+    Returns:
+        字段值
+    """
+    text = ", ".join(projects)
+    if shape == 'string':
+        return text
+    if shape == 'list':
+        return list(projects)
+    if shape == 'option':
+        return {'value': text, 'id': "10001"}
+    if shape == 'options':
+        return [{'value': project, 'id': str(10000 + i)} for i, project in enumerate(projects)]
+    if shape == 'adf':
+        return _adf_document(text)
+    raise ValueError(f"未知的字段形态: {shape}")
+
+
+def generate_issues(count: int, projects: Sequence[str], field_id: str = DEFAULT_FIELD_ID,
+                    shapes: Sequence[str] = FIELD_SHAPES, max_projects_per_issue: int = 4,
+                    empty_ratio: float = 0.05, seed: int = 0) -> List[Dict]:
+    """
+    生成合成问题（与 Jira 搜索接口返回的 issue 结构相同）
+
+    Args:
+        count: 问题数
+        projects: 项目池
+        field_id: 'Affects Project' 字段 ID
+        shapes: 使用的字段形态，按问题顺序轮流使用
+        max_projects_per_issue: 每个问题最多影响的项目数
+        empty_ratio: 字段为空或 "NA" 的问题比例
+        seed: 随机数种子（相同参数生成相同数据）
+
+    Returns:
+        问题列表
+    """
+    rng = random.Random(seed)
+    issues = []
+    for i in range(count):
+        fields = {
+            'summary': f"Synthetic issue {i}",
+            'status': {'name': STATUSES[i % len(STATUSES)]}
+        }
+        if rng.random() < empty_ratio:
+            fields[field_id] = "NA" if i % 2 else None
+        else:
+            chosen = rng.sample(list(projects), min(len(projects), rng.randint(1, max_projects_per_issue)))
+            fields[field_id] = build_field_value(chosen, shapes[i % len(shapes)])
+        issues.append({'id': str(100000 + i), 'key': f"SP-{i + 1}", 'fields': fields})
+    return issues
+
+
+class MockJiraHandler(BaseHTTPRequestHandler):
+    """处理模拟搜索请求"""
+
+    server_version = "MockJira/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def _send_bytes(self, status: int, data: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _search(self, jql: str, start_at: int, max_results: int):
+        mock: "MockJiraServer" = self.server.mock
+        mock.count()
+        if mock.latency:
+            time.sleep(mock.latency)
+        self._send_bytes(200, mock.search_body(jql, start_at, max_results))
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path not in ("/rest/api/3/search", "/rest/api/2/search"):
+            self._send_bytes(404, b'{"errorMessages": ["not found"]}')
+            return
+        params = parse_qs(parsed.query)
+        self._search(
+            params.get('jql', [''])[0],
+            int(params.get('startAt', ['0'])[0]),
+            int(params.get('maxResults', ['50'])[0])
+        )
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/rest/api/3/search/jql":
+            self._send_bytes(404, b'{"errorMessages": ["not found"]}')
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+        except ValueError:
+            self._send_bytes(400, b'{"errorMessages": ["invalid json"]}')
+            return
+        self._search(payload.get('jql', ''), int(payload.get('startAt', 0)), int(payload.get('maxResults', 50)))
+
+    def log_message(self, format, *args):
+        logger.debug(f"mock jira {self.address_string()} {format % args}")
+
+
+class MockJiraServer:
+    """在后台线程中运行的模拟 Jira 搜索服务"""
+
+    def __init__(self, issues: List[Dict], latency: float = 0.0, ignore_max_results: bool = False,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        初始化
+
+        Args:
+            issues: 过滤器（filter=...）返回的全部问题
+            latency: 每个请求的固定延迟（秒）
+            ignore_max_results: 忽略请求中的 maxResults，一次返回全部匹配问题（用于测量大结果集的传输和解码）
+            host: 监听地址
+            port: 监听端口（0 表示随机端口）
+        """
+        self.latency = latency
+        self.ignore_max_results = ignore_max_results
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+        # 每个问题预先序列化，分页响应只需拼接字节，测得的是客户端而不是模拟服务的开销
+        self._keys = [issue['key'] for issue in issues]
+        self._encoded = [json.dumps(issue, ensure_ascii=False).encode('utf-8') for issue in issues]
+        self._positions = {key: i for i, key in enumerate(self._keys)}
+
+        self.server = ThreadingHTTPServer((host, port), MockJiraHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self):
+        with self._lock:
+            self.request_count += 1
+
+    def reset_counts(self) -> int:
+        """返回并清零请求数"""
+        with self._lock:
+            count, self.request_count = self.request_count, 0
+        return count
+
+    def search_body(self, jql: str, start_at: int, max_results: int) -> bytes:
+        """
+        按 JQL 生成搜索响应（支持 filter=... 和 key in (...)）
+
+        Returns:
+            JSON 响应体
+        """
+        match = re.search(r'key\s+in\s*\(([^)]*)\)', jql, re.IGNORECASE)
+        if match:
+            keys = [key.strip().strip('"') for key in match.group(1).split(',')]
+            positions = [self._positions[key] for key in keys if key in self._positions]
+        else:
+            positions = range(len(self._encoded))
+        total = len(positions)
+        end = total if self.ignore_max_results else min(total, start_at + max_results)
+        page = [self._encoded[i] for i in positions[start_at:end]]
+        header = json.dumps({'startAt': start_at, 'maxResults': end - start_at, 'total': total})
+        return header[:-1].encode('utf-8') + b', "issues": [' + b','.join(page) + b']}'
+
+    def start(self) -> "MockJiraServer":
+        """在守护线程中启动服务"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-jira", daemon=True)
+        self._thread.start()
+        logger.info(f"模拟 Jira 服务已启动: {self.url}（{len(self._encoded)} 个问题）")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockJiraServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
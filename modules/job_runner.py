@@ -0,0 +1,226 @@
+"""
+后台任务模块
+在进程内的线程池中执行耗时的提取和查询任务，记录进度并支持取消，
+页面只需保存任务 ID 并轮询状态，任务运行期间页面可以正常交互
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """任务被取消"""
+
+
+class Job:
+    """
+    单个后台任务
+
+    任务函数的第一个参数是 Job 本身，通过 update() 汇报进度，
+    在合适的位置调用 check_cancelled()（或读取 cancelled）响应取消
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, kind: str, description: str = "", owner: str = ""):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.description = description
+        self.owner = owner
+        self.status = self.PENDING
+        self.done = 0
+        self.total = 0
+        self.message = ""
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, done: Optional[int] = None, total: Optional[int] = None, message: Optional[str] = None):
+        """
+        汇报进度
+
+        Args:
+            done: 已完成的数量
+            total: 总数量
+            message: 当前进度说明
+        """
+        with self._lock:
+            if done is not None:
+                self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+
+    def cancel(self):
+        """请求取消（协作式：任务函数在检查点停止）"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """已请求取消时抛出 JobCancelled"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"任务 {self.job_id} 已取消")
+
+    @property
+    def finished(self) -> bool:
+        """任务是否已结束（成功、失败或取消）"""
+        return self.status in (self.SUCCEEDED, self.FAILED, self.CANCELLED)
+
+    @property
+    def fraction(self) -> float:
+        """完成比例（0~1），总数未知时为 0"""
+        with self._lock:
+            return min(1.0, self.done / self.total) if self.total else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        """已运行的秒数"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def snapshot(self) -> Dict:
+        """任务状态快照（不含结果），用于列表展示"""
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'kind': self.kind,
+                'description': self.description,
+                'status': self.status,
+                'done': self.done,
+                'total': self.total,
+                'message': self.message,
+                'error': self.error,
+                'created_at': self.created_at,
+                'elapsed': round(self.elapsed, 2)
+            }
+
+
+class JobRunner:
+    """进程内后台任务执行器"""
+
+    def __init__(self, max_workers: int = 4, max_finished: int = 50, finished_ttl: float = 3600):
+        """
+        初始化执行器
+
+        Args:
+            max_workers: 同时运行的最大任务数
+            max_finished: 最多保留的已结束任务数
+            finished_ttl: 已结束任务的保留时间（秒）
+        """
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, func: Callable, *args, description: str = "", owner: str = "", **kwargs) -> Job:
+        """
+        提交任务
+
+        Args:
+            kind: 任务类型（如 'jira_extract'、'argocd_query'）
+            func: 任务函数，签名为 func(job, *args, **kwargs)，返回值作为任务结果
+            description: 任务说明
+            owner: 提交者标识（如 Streamlit 会话 ID），用于筛选
+
+        Returns:
+            Job
+        """
+        job = Job(kind, description, owner)
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, func, args, kwargs)
+        logger.info(f"已提交任务 {job.job_id}: {kind} {description}")
+        return job
+
+    def _run(self, job: Job, func: Callable, args: tuple, kwargs: dict):
+        """在工作线程中执行任务并记录结果"""
+        if job.cancelled:
+            job.status = Job.CANCELLED
+            job.finished_at = time.time()
+            return
+        job.started_at = time.time()
+        job.status = Job.RUNNING
+        try:
+            result = func(job, *args, **kwargs)
+            job.result = result
+            job.status = Job.CANCELLED if job.cancelled else Job.SUCCEEDED
+        except JobCancelled:
+            job.status = Job.CANCELLED
+        except Exception as e:
+            logger.exception(f"任务 {job.job_id} 失败")
+            job.error = str(e)
+            job.status = Job.FAILED
+        finally:
+            job.finished_at = time.time()
+        logger.info(f"任务 {job.job_id} 结束: {job.status} ({job.elapsed:.1f}s)")
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        """按 ID 获取任务，不存在（或已被清理）时返回 None"""
+        if not job_id:
+            return None
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务，返回任务是否存在"""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def list_jobs(self, kind: Optional[str] = None, owner: Optional[str] = None) -> List[Job]:
+        """列出任务（最新的在前）"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if kind is not None:
+            jobs = [job for job in jobs if job.kind == kind]
+        if owner is not None:
+            jobs = [job for job in jobs if job.owner == owner]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def _prune(self):
+        """清理过期和超出数量的已结束任务（调用方持有锁）"""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for position, job in enumerate(finished):
+            too_old = now - job.finished_at > self.finished_ttl
+            too_many = len(finished) - position > self.max_finished
+            if too_old or too_many:
+                self._jobs.pop(job.job_id, None)
+
+
+# 同一进程内所有 Streamlit 会话共享一个执行器
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """获取进程内共享的任务执行器"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
@@ -0,0 +1,67 @@
+"""
+延迟导入模块
+pandas / numpy / yaml / requests 的导入耗时从几十到几百毫秒不等，模块和页面在顶部用
+lazy_module() 占位，第一次访问其属性时才真正导入，冷启动时用不到的依赖不再计入启动时间
+
+用法：
+    from modules.lazy_import import lazy_module
+    pd = lazy_module('pandas')
+    ...
+    df = pd.DataFrame(rows)  # 此时才导入 pandas
+"""
+
+import importlib
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule:
+    """模块占位对象，第一次访问属性时导入真实模块（导入由 importlib 的模块锁保证线程安全）"""
+
+    def __init__(self, name: str):
+        """
+        初始化
+
+        Args:
+            name: 模块全名，如 'pandas'、'requests'
+        """
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        """是否已经导入"""
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        module: Optional[ModuleType] = self.__dict__['_module']
+        return repr(module) if module is not None else f"<lazy module '{self.__dict__['_name']}'>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """
+    返回延迟导入的模块占位对象
+
+    Args:
+        name: 模块全名
+
+    Returns:
+        LazyModule，属性访问与真实模块相同
+    """
+    return LazyModule(name)
@@ -0,0 +1,327 @@
+"""
+实时问题数据模块
+以一次完整提取为基础，逐个应用 Jira webhook 事件（创建/更新/删除），
+只重新解析该问题的 Affects Project 字段并增量更新项目汇总，不需要重新查询过滤器
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from modules.extraction_result import ExtractionResult
+from modules.project_index import ProjectIndex
+
+logger = logging.getLogger(__name__)
+
+ISSUE_CREATED = "jira:issue_created"
+ISSUE_UPDATED = "jira:issue_updated"
+ISSUE_DELETED = "jira:issue_deleted"
+
+
+def parse_event(payload) -> Optional[Tuple[str, Dict, str]]:
+    """
+    校验 webhook 负载
+
+    Args:
+        payload: 解码后的 webhook 请求体
+
+    Returns:
+        (event, issue, issue_key)；负载不是 webhook 事件（如数组、字符串，或 issue 不是对象）时返回 None，应忽略
+
+    Raises:
+        ValueError: 负载中缺少 issue.key
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get('issue') or {}, dict):
+        return None
+    issue = payload.get('issue') or {}
+    issue_key = issue.get('key', '')
+    if not issue_key:
+        raise ValueError("webhook 负载中缺少 issue.key")
+    return payload.get('webhookEvent', ''), issue, issue_key
+
+
+class LiveIssueStore:
+    """
+    可增量更新的提取结果
+
+    行按问题 Key 保存 (summary, status, projects, direct_projects, raw)，
+    项目汇总的计数随事件增减，首次/最后出现的问题在生成快照时按行顺序计算
+    """
+
+    def __init__(self, extractor, custom_field_id: Optional[str], accept_new_issues: bool = True,
+                 filter_id: Optional[str] = None):
+        """
+        初始化
+
+        Args:
+            extractor: JiraExtractor 实例，只用于解析字段和应用项目映射，不会发送请求
+            custom_field_id: 'Affects Project' 字段 ID
+            accept_new_issues: 是否接收不在初始结果中的问题（Jira webhook 按过滤器的 JQL 配置时应为 True）
+            filter_id: 初始数据的过滤器 ID，webhook 地址中的 ?filter= 与之一致时才接收新问题
+        """
+        self.extractor = extractor
+        self.custom_field_id = custom_field_id
+        self.accept_new_issues = accept_new_issues
+        self.filter_id = str(filter_id) if filter_id is not None else None
+        self.rows: "OrderedDict[str, Tuple[str, str, List[str], set, str]]" = OrderedDict()
+        self.counts = Counter()
+        self.direct_counts = Counter()
+        self.mapped_counts = Counter()
+        self.version = 0
+        self.event_count = 0
+        self.updated_at = time.time()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 初始化
+    # ------------------------------------------------------------------
+
+    def seed(self, results):
+        """
+        用一次完整提取的结果初始化
+
+        Args:
+            results: ExtractionResult 或 list-of-dicts 结果
+        """
+        mappings = {source.lower(): targets for source, targets in (self.extractor.project_mappings or {}).items()}
+        with self._lock:
+            self.rows.clear()
+            self.counts.clear()
+            self.direct_counts.clear()
+            self.mapped_counts.clear()
+            for row in results:
+                projects = list(row['affects_projects'] or [])
+                # 结果中不保存哪些项目来自映射，按映射规则推断：被同一问题中其他项目映射出的项目视为映射项目
+                targets = {target for project in projects for target in mappings.get(project.strip().lower(), [])}
+                direct = {project for project in projects if project not in targets}
+                self._add_row(row['issue_key'], row['summary'], row['status'], projects, direct,
+                              row['affects_projects_raw'])
+            self.version += 1
+            self.updated_at = time.time()
+        logger.info(f"实时数据已初始化: {len(self.rows)} 个问题")
+
+    # ------------------------------------------------------------------
+    # 增量更新
+    # ------------------------------------------------------------------
+
+    def _add_row(self, issue_key: str, summary: str, status: str, projects: List[str], direct: set, raw: str):
+        """添加一行并累加计数（调用方持有锁）"""
+        self.rows[issue_key] = (summary, status, projects, direct, raw)
+        for project in dict.fromkeys(projects):
+            self.counts[project] += 1
+            if project in direct:
+                self.direct_counts[project] += 1
+            else:
+                self.mapped_counts[project] += 1
+
+    def _remove_row(self, issue_key: str, keep_position: bool = False) -> Optional[Tuple]:
+        """扣减一行的计数并删除该行（调用方持有锁）；keep_position 时保留行位置，等待随后覆盖"""
+        row = self.rows.get(issue_key) if keep_position else self.rows.pop(issue_key, None)
+        if row is None:
+            return None
+        _, _, projects, direct, _ = row
+        for project in dict.fromkeys(projects):
+            for counter in (self.counts, self.direct_counts if project in direct else self.mapped_counts):
+                counter[project] -= 1
+                if counter[project] <= 0:
+                    del counter[project]
+        return row
+
+    def upsert_issue(self, issue: Dict, allow_create: Optional[bool] = None) -> str:
+        """
+        新增或更新一个问题（只解析该问题的字段）
+
+        Args:
+            issue: Jira 问题对象（webhook 负载中的 issue）
+            allow_create: 是否新增不在结果中的问题，默认取 accept_new_issues
+
+        Returns:
+            'added' | 'updated' | 'ignored'
+        """
+        allow_create = self.accept_new_issues if allow_create is None else allow_create
+        issue_key = issue.get('key', '')
+        fields = issue.get('fields') or {}
+        with self._lock:
+            existing = self.rows.get(issue_key)
+            if existing is None and not allow_create:
+                return 'ignored'
+
+            summary = fields.get('summary', existing[0] if existing else '')
+            status = (fields.get('status') or {}).get('name', existing[1] if existing else '')
+            if self.custom_field_id in fields or existing is None:
+                projects, direct, raw = self.extractor._parse_affects_project_field(fields, self.custom_field_id)
+            else:
+                # 负载中没有该字段时保留原有项目，只更新摘要和状态
+                projects, direct, raw = existing[2], existing[3], existing[4]
+
+            if existing is not None:
+                # 保持问题在结果中的原有位置
+                self._remove_row(issue_key, keep_position=True)
+            self._add_row(issue_key, summary, status, projects, direct, raw)
+            self.version += 1
+            self.updated_at = time.time()
+        return 'updated' if existing is not None else 'added'
+
+    def remove_issue(self, issue_key: str) -> str:
+        """删除问题，返回 'removed' | 'ignored'"""
+        with self._lock:
+            if self._remove_row(issue_key) is None:
+                return 'ignored'
+            self.version += 1
+            self.updated_at = time.time()
+        return 'removed'
+
+    def matches_site(self, issue: Dict) -> bool:
+        """问题是否来自本数据的 Jira 实例（按 issue.self 的地址判断，负载中没有时视为一致）"""
+        issue_url = issue.get('self') or ''
+        base_url = (getattr(self.extractor, 'base_url', '') or '').rstrip('/')
+        return not issue_url or not base_url or issue_url.startswith(base_url + '/')
+
+    def apply_event(self, payload: Dict, allow_create: Optional[bool] = None) -> Dict:
+        """
+        应用一个 Jira webhook 事件
+
+        Args:
+            payload: webhook 请求体
+            allow_create: 是否新增不在结果中的问题，默认取 accept_new_issues
+
+        Returns:
+            {'event', 'issue_key', 'action', 'projects', 'version'}
+        """
+        parsed = parse_event(payload)
+        if parsed is None:
+            # 合法 JSON 但不是 webhook 事件，忽略
+            logger.info("忽略格式不正确的 webhook 负载")
+            return {'event': '', 'issue_key': '', 'action': 'ignored', 'projects': [], 'version': self.version}
+        event, issue, issue_key = parsed
+
+        if event == ISSUE_DELETED:
+            action = self.remove_issue(issue_key)
+        elif event in (ISSUE_CREATED, ISSUE_UPDATED):
+            action = self.upsert_issue(issue, allow_create)
+        else:
+            action = 'ignored'
+
+        with self._lock:
+            self.event_count += 1
+            row = self.rows.get(issue_key)
+            version = self.version
+        logger.info(f"webhook {event} {issue_key}: {action}")
+        return {
+            'event': event,
+            'issue_key': issue_key,
+            'action': action,
+            'projects': list(row[2]) if row else [],
+            'version': version
+        }
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict:
+        """
+        生成当前数据的一致快照（供页面展示）
+
+        Returns:
+            {
+                'results': ExtractionResult,
+                'project_index': ProjectIndex,
+                'aggregation': 与 JiraExtractor.get_project_aggregation() 相同的结构,
+                'version': int, 'event_count': int, 'updated_at': float
+            }
+        """
+        with self._lock:
+            rows = list(self.rows.items())
+            aggregation = {
+                'counts': Counter(self.counts),
+                'direct_counts': Counter(self.direct_counts),
+                'mapped_counts': Counter(self.mapped_counts),
+                'first_seen': {},
+                'last_seen': {}
+            }
+            version, event_count, updated_at = self.version, self.event_count, self.updated_at
+
+        results = ExtractionResult()
+        project_index = ProjectIndex()
+        for issue_key, (summary, status, projects, _, raw) in rows:
+            results.append(issue_key, summary, status, projects, raw)
+            project_index.add_issue(issue_key, status, projects)
+            for project in projects:
+                aggregation['first_seen'].setdefault(project, issue_key)
+                aggregation['last_seen'][project] = issue_key
+
+        return {
+            'results': results,
+            'project_index': project_index,
+            'aggregation': aggregation,
+            'version': version,
+            'event_count': event_count,
+            'updated_at': updated_at
+        }
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+# 同时保留的实时数据上限（超过时丢弃最早注册的，防止已结束的会话未被清理时无限增长）
+MAX_LIVE_STORES = 20
+
+# 进程内的实时数据，按标识（页面会话 ID，命令行为 None）区分，每个标识只保留最新注册的一份
+_live_stores: "OrderedDict[Optional[str], LiveIssueStore]" = OrderedDict()
+_live_lock = threading.Lock()
+
+
+def get_live_store(key: Optional[str] = None) -> Optional[LiveIssueStore]:
+    """
+    获取指定标识的实时数据
+
+    Args:
+        key: 注册时的标识，不存在时返回 None
+    """
+    with _live_lock:
+        return _live_stores.get(key)
+
+
+def get_live_stores() -> List[LiveIssueStore]:
+    """获取全部实时数据（webhook 事件会应用到每一个）"""
+    with _live_lock:
+        return list(_live_stores.values())
+
+
+def set_live_store(store: Optional[LiveIssueStore], key: Optional[str] = None):
+    """
+    注册实时数据，替换同一标识之前的数据，不影响其他标识
+
+    Args:
+        store: 实时数据，None 表示注销该标识
+        key: 标识（页面会话 ID）
+    """
+    with _live_lock:
+        _live_stores.pop(key, None)
+        if store is not None:
+            _live_stores[key] = store
+            while len(_live_stores) > MAX_LIVE_STORES:
+                evicted, _ = _live_stores.popitem(last=False)
+                logger.info(f"实时数据数量超过上限，已丢弃: {evicted}")
+
+
+def prune_live_stores(is_active: Callable[[str], bool]) -> int:
+    """
+    注销已结束会话的实时数据（命令行注册的数据不受影响）
+
+    Args:
+        is_active: 判断会话是否仍然存在的函数，参数为注册时的标识
+
+    Returns:
+        注销的数量
+    """
+    with _live_lock:
+        stale = [key for key in _live_stores if key is not None and not is_active(key)]
+        for key in stale:
+            del _live_stores[key]
+    if stale:
+        logger.info(f"已注销 {len(stale)} 个已结束会话的实时数据")
+    return len(stale)
@@ -0,0 +1,304 @@
+"""
+指标与埋点模块
+ArgoCDClient 和 JiraExtractor 的每个 HTTP 请求记录一个 span（接口、状态码、字节数、耗时），
+fetch / parse / map / render 各阶段记录耗时，各级缓存记录命中与未命中；
+数据保存在进程内的注册表中，页面诊断面板和 Prometheus 文本导出（webhook 接收器的 /metrics）共用
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Prometheus 指标名前缀
+METRIC_PREFIX = "devops_"
+
+# 耗时直方图的桶上限（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 每个直方图保留的最近样本数（用于面板中的 p50 / p95）
+RECENT_SAMPLES = 500
+
+METRIC_HELP = {
+    'http_request_duration_seconds': "HTTP 请求耗时（含响应体下载）",
+    'http_response_bytes_total': "HTTP 响应体字节数",
+    'http_requests_total': "HTTP 请求数",
+    'stage_duration_seconds': "fetch / parse / map / render 各阶段耗时",
+    'cache_requests_total': "缓存查找次数（result=hit|miss）"
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    线性插值的百分位数
+
+    Args:
+        values: 样本
+        q: 百分位（0-100）
+
+    Returns:
+        百分位数，样本为空时返回 0.0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class _Histogram:
+    """累计直方图（Prometheus 语义）加最近样本"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+    def summary(self) -> Dict:
+        recent = list(self.recent)
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 1),
+            'mean_ms': round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            'p50_ms': round(percentile(recent, 50) * 1000, 2),
+            'p95_ms': round(percentile(recent, 95) * 1000, 2),
+            'max_ms': round(self.max * 1000, 2)
+        }
+
+
+class MetricsRegistry:
+    """进程内指标注册表（线程安全，所有会话、后台任务和调度器共享）"""
+
+    def __init__(self, max_spans: int = 500):
+        """
+        初始化
+
+        Args:
+            max_spans: 保留的最近请求 span 数
+        """
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels):
+        """记录一个耗时样本（秒）"""
+        key = (name, _labels(**labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """计数器累加"""
+        key = (name, _labels(**labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def record_request(self, client: str, method: str, endpoint: str, status: Optional[int], size: int,
+                       duration: float, ttfb: Optional[float] = None, error: str = ""):
+        """
+        记录一个 HTTP 请求
+
+        Args:
+            client: 'argocd' | 'jira'
+            method: HTTP 方法
+            endpoint: 接口名（不含具体应用名或问题 Key，避免标签数量无限增长）
+            status: 状态码，请求未完成（连接失败、超时）时为 None
+            size: 响应体字节数
+            duration: 总耗时（秒，含响应体下载）
+            ttfb: 收到响应头的耗时（秒，含 DNS、连接、TLS 和服务器处理）
+            error: 错误信息
+        """
+        status_label = str(status) if status is not None else 'error'
+        self.observe('http_request_duration_seconds', duration, client=client, endpoint=endpoint, status=status_label)
+        self.inc('http_requests_total', client=client, endpoint=endpoint, status=status_label)
+        if size:
+            self.inc('http_response_bytes_total', size, client=client, endpoint=endpoint)
+        with self._lock:
+            self._spans.append({
+                'time': time.time(),
+                'client': client,
+                'method': method,
+                'endpoint': endpoint,
+                'status': status_label,
+                'bytes': size,
+                'duration_ms': round(duration * 1000, 2),
+                'ttfb_ms': round(ttfb * 1000, 2) if ttfb is not None else None,
+                'download_ms': round((duration - ttfb) * 1000, 2) if ttfb is not None else None,
+                'error': error
+            })
+
+    @contextmanager
+    def stage(self, client: str, stage: str) -> Iterator[None]:
+        """
+        记录代码块的阶段耗时（异常时同样记录）
+
+        用法：
+            with get_metrics_registry().stage('argocd', 'parse'):
+                ...
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_duration_seconds', time.perf_counter() - started, client=client, stage=stage)
+
+    def record_cache(self, cache: str, hit: bool, count: int = 1):
+        """记录缓存查找结果（count 为批量查找时的条目数）"""
+        if count:
+            self.inc('cache_requests_total', count, cache=cache, result='hit' if hit else 'miss')
+
+    def recent_spans(self, limit: int = 100, client: Optional[str] = None) -> List[Dict]:
+        """最近的请求 span（最新的在前）"""
+        with self._lock:
+            spans = list(self._spans)
+        spans = [span for span in reversed(spans) if client is None or span['client'] == client]
+        return spans[:limit]
+
+    def _histogram_rows(self, name: str, client: Optional[str]) -> List[Dict]:
+        with self._lock:
+            items = [(dict(labels), histogram.summary()) for (metric, labels), histogram in self._histograms.items()
+                     if metric == name]
+        return sorted(
+            (dict(labels, **summary) for labels, summary in items if client is None or labels.get('client') == client),
+            key=lambda row: -row['total_ms']
+        )
+
+    def stage_summary(self, client: Optional[str] = None) -> List[Dict]:
+        """
+        各阶段耗时汇总
+
+        Returns:
+            [{'client', 'stage', 'count', 'total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms'}, ...]，按总耗时降序
+        """
+        return self._histogram_rows('stage_duration_seconds', client)
+
+    def endpoint_summary(self, client: Optional[str] = None) -> List[Dict]:
+        """
+        按接口和状态码的请求耗时汇总
+
+        Returns:
+            [{'client', 'endpoint', 'status', 'count', ..., 'bytes'}, ...]，按总耗时降序
+        """
+        rows = self._histogram_rows('http_request_duration_seconds', client)
+        with self._lock:
+            sizes = {labels: value for (metric, labels), value in self._counters.items()
+                     if metric == 'http_response_bytes_total'}
+        for row in rows:
+            row['bytes'] = int(sizes.get(_labels(client=row['client'], endpoint=row['endpoint']), 0))
+        return rows
+
+    def cache_ratios(self) -> Dict[str, Dict]:
+        """
+        各缓存的命中率
+
+        Returns:
+            {cache: {'hits', 'misses', 'ratio'}}，ratio 为 0-1
+        """
+        ratios: Dict[str, Dict] = {}
+        with self._lock:
+            items = [(dict(labels), value) for (metric, labels), value in self._counters.items()
+                     if metric == 'cache_requests_total']
+        for labels, value in items:
+            entry = ratios.setdefault(labels['cache'], {'hits': 0, 'misses': 0, 'ratio': 0.0})
+            entry['hits' if labels['result'] == 'hit' else 'misses'] += int(value)
+        for entry in ratios.values():
+            lookups = entry['hits'] + entry['misses']
+            entry['ratio'] = round(entry['hits'] / lookups, 3) if lookups else 0.0
+        return dict(sorted(ratios.items()))
+
+    def to_prometheus(self) -> str:
+        """
+        导出为 Prometheus 文本格式（text/plain; version=0.0.4）
+
+        Returns:
+            指标文本
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                ((key, histogram.count, histogram.total, list(histogram.buckets))
+                 for key, histogram in self._histograms.items()),
+                key=lambda item: item[0]
+            )
+
+        lines = []
+        described = set()
+
+        def describe(name: str, kind: str):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {METRIC_PREFIX}{name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), count, total, buckets in histograms:
+            describe(name, 'histogram')
+            for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {bucket_count}")
+            lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """清空所有指标和 span"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._spans.clear()
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# 进程内共享的注册表
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """获取进程内共享的指标注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
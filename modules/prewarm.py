@@ -0,0 +1,316 @@
+"""
+预热调度模块
+发布窗口期间大家查询的通常是同一个默认过滤器和同一份服务列表（config/argocd_config.json），
+可选的后台调度器按固定间隔用服务账号凭证刷新这些默认查询并写入进程内共享缓存，
+用户第一次点击即可直接使用缓存结果（页面显示数据时间）
+
+启用方式：config/prewarm_config.json 中 "enabled": true，或设置环境变量 PREWARM_ENABLED=1
+服务账号凭证只从环境变量读取：
+    Jira:   JIRA_BASE_URL / JIRA_API_TOKEN / JIRA_EMAIL
+    ArgoCD: ARGOCD_TOKEN_<ENV>（如 ARGOCD_TOKEN_PROD）或 ARGOCD_TOKEN
+预热结果是用服务账号凭证获取的，返回给会话前先用会话自己的凭证校验：
+Jira 检查能否查看该过滤器（verify_jira_access），ArgoCD 检查 Token 是否可用（ArgoCDClient.preflight）
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from modules.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+PREWARM_CONFIG_FILE = "config/prewarm_config.json"
+JIRA_CONFIG_FILE = "config/jira_config.json"
+ARGOCD_CONFIG_FILE = "config/argocd_config.json"
+
+DEFAULT_PREWARM_CONFIG = {
+    'enabled': False,
+    'interval_minutes': 15,
+    # 超过该时间的预热结果不再使用（默认两个刷新周期）
+    'max_age_minutes': 30,
+    # 为空时使用 config/jira_config.json 中的 filter_id / field_id
+    'jira_filter_ids': [],
+    'jira_field_id': '',
+    'argocd_environments': ['preprod', 'staging', 'prod'],
+    # 为空时使用 config/argocd_config.json 中的 services
+    'argocd_services': []
+}
+
+
+# 解析后的预热配置：配置文件路径 -> (各配置文件和环境变量的签名, config)
+_config_cache: Dict[str, Tuple[Tuple, Dict]] = {}
+_config_lock = threading.Lock()
+
+
+# 已通过校验的会话凭证：(base_url, token 摘要, email, filter_id) -> 校验时间
+_verified_access: Dict[Tuple[str, str, str, str], float] = {}
+_verified_lock = threading.Lock()
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_json(path: str) -> Dict:
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取配置文件 {path} 失败: {e}")
+    return {}
+
+
+def load_prewarm_config(config_file: str = PREWARM_CONFIG_FILE) -> Dict:
+    """
+    加载预热配置（环境变量 PREWARM_ENABLED / PREWARM_INTERVAL_MINUTES 优先）
+
+    页面每次重跑都会调用，按三个配置文件的修改时间和大小以及环境变量缓存，未变化时不重新读取
+
+    Returns:
+        合并默认值后的配置，jira_filter_ids / argocd_services 已解析为实际列表
+    """
+    signature = (
+        tuple(_file_signature(path) for path in (config_file, JIRA_CONFIG_FILE, ARGOCD_CONFIG_FILE)),
+        os.environ.get('PREWARM_ENABLED'),
+        os.environ.get('PREWARM_INTERVAL_MINUTES')
+    )
+    with _config_lock:
+        cached = _config_cache.get(config_file)
+    hit = bool(cached and cached[0] == signature)
+    get_metrics_registry().record_cache('prewarm_config', hit)
+    if hit:
+        return dict(cached[1])
+
+    config = dict(DEFAULT_PREWARM_CONFIG)
+    config.update(_load_json(config_file))
+    if os.environ.get('PREWARM_ENABLED'):
+        config['enabled'] = os.environ['PREWARM_ENABLED'].lower() in ('1', 'true', 'yes')
+    if os.environ.get('PREWARM_INTERVAL_MINUTES'):
+        config['interval_minutes'] = float(os.environ['PREWARM_INTERVAL_MINUTES'])
+
+    jira_config = _load_json(JIRA_CONFIG_FILE)
+    if not config['jira_filter_ids'] and jira_config.get('filter_id'):
+        config['jira_filter_ids'] = [jira_config['filter_id']]
+    config['jira_field_id'] = config['jira_field_id'] or jira_config.get('field_id', '')
+    if not config['argocd_services']:
+        config['argocd_services'] = list(_load_json(ARGOCD_CONFIG_FILE).get('services', []))
+    with _config_lock:
+        _config_cache[config_file] = (signature, config)
+    return dict(config)
+
+
+class WarmCache:
+    """预热结果的进程内共享缓存（所有 Streamlit 会话共用）"""
+
+    def __init__(self):
+        # (base_url, filter_id, field_id) -> (JiraExtractor, ExtractionResult, fetched_at)
+        self._jira: Dict[Tuple[str, str, str], Tuple[object, object, float]] = {}
+        # (environment, service) -> ({service: tag}, fetched_at)
+        self._images: Dict[Tuple[str, str], Tuple[Dict[str, str], float]] = {}
+        self._lock = threading.Lock()
+
+    def put_jira(self, base_url: str, filter_id: str, field_id: str, extractor, results):
+        """写入一次过滤器提取结果（连同提取器，保留其项目索引和汇总）"""
+        with self._lock:
+            self._jira[(base_url.rstrip('/'), str(filter_id), field_id or '')] = (extractor, results, time.time())
+
+    def get_jira(self, base_url: str, filter_id: str, field_id: str, max_age: float) -> Optional[Tuple]:
+        """
+        读取过滤器提取结果
+
+        Returns:
+            (extractor, results, fetched_at)，不存在或已过期时返回 None
+        """
+        with self._lock:
+            entry = self._jira.get((base_url.rstrip('/'), str(filter_id), field_id or ''))
+        if entry and time.time() - entry[2] <= max_age:
+            return entry
+        return None
+
+    def put_images(self, environment: str, service: str, images: Dict[str, str]):
+        """写入一个服务的镜像信息"""
+        with self._lock:
+            self._images[(environment, service)] = (images, time.time())
+
+    def get_images(self, environment: str, services: List[str], max_age: float) -> Dict[str, Tuple[Dict[str, str], float]]:
+        """
+        批量读取服务镜像信息
+
+        Returns:
+            {service: (images, fetched_at)}，只包含未过期的服务
+        """
+        now = time.time()
+        with self._lock:
+            entries = {service: self._images.get((environment, service)) for service in services}
+        return {service: entry for service, entry in entries.items() if entry and now - entry[1] <= max_age}
+
+    def clear(self):
+        with self._lock:
+            self._jira.clear()
+            self._images.clear()
+
+
+class PrewarmScheduler:
+    """按固定间隔刷新默认查询的后台线程"""
+
+    def __init__(self, config: Dict, cache: WarmCache):
+        self.config = config
+        self.cache = cache
+        self.interval = max(60.0, float(config['interval_minutes']) * 60)
+        self.last_run: Optional[float] = None
+        self.last_errors: Dict[str, str] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动调度线程（守护线程，随进程退出）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="prewarm", daemon=True)
+        self._thread.start()
+        logger.info(f"预热调度已启动，间隔 {self.interval:.0f} 秒")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            self.refresh()
+            self._stop_event.wait(self.interval)
+
+    def refresh(self):
+        """立即刷新一次所有默认查询（单个查询失败不影响其他查询）"""
+        errors = {}
+        try:
+            errors.update(self.refresh_jira())
+        except Exception as e:
+            errors['jira'] = str(e)
+        try:
+            errors.update(self.refresh_argocd())
+        except Exception as e:
+            errors['argocd'] = str(e)
+        for name, error in errors.items():
+            logger.warning(f"预热失败 {name}: {error}")
+        self.last_errors = errors
+        self.last_run = time.time()
+
+    def refresh_jira(self) -> Dict[str, str]:
+        """刷新默认过滤器，返回 {名称: 错误信息}"""
+        from modules.jira_extractor import JiraExtractor
+
+        base_url = os.environ.get('JIRA_BASE_URL', '')
+        api_token = os.environ.get('JIRA_API_TOKEN', '')
+        field_id = self.config['jira_field_id']
+        if not (base_url and api_token and field_id and self.config['jira_filter_ids']):
+            return {}
+
+        errors = {}
+        for filter_id in self.config['jira_filter_ids']:
+            try:
+                # 每个过滤器使用独立的提取器，缓存中保留其项目索引和汇总
+                extractor = JiraExtractor(base_url, api_token, os.environ.get('JIRA_EMAIL', ''))
+                results = extractor.get_affects_projects_compact(filter_id, field_id)
+                self.cache.put_jira(base_url, filter_id, field_id, extractor, results)
+                logger.info(f"已预热 Jira 过滤器 {filter_id}: {len(results)} 个问题")
+            except Exception as e:
+                errors[f"jira:{filter_id}"] = str(e)
+        return errors
+
+    def refresh_argocd(self) -> Dict[str, str]:
+        """刷新默认服务列表的镜像信息，返回 {名称: 错误信息}"""
+        from modules.argocd_client import ArgoCDClient
+        from modules.snapshot_store import get_snapshot_store
+
+        services = self.config['argocd_services']
+        if not services:
+            return {}
+
+        errors = {}
+        for environment in self.config['argocd_environments']:
+            token = os.environ.get(f"ARGOCD_TOKEN_{environment.upper()}") or os.environ.get('ARGOCD_TOKEN')
+            if not token:
+                continue
+            client = ArgoCDClient(environment, token)
+            snapshot = {'success': {}, 'failed': {}}
+            for item in client.iter_service_images(services):
+                if item['error'] is None:
+                    self.cache.put_images(environment, item['service'], item['images'])
+                    snapshot['success'].update(item['images'])
+                else:
+                    errors[f"argocd:{environment}:{item['service']}"] = item['error']
+                    snapshot['failed'][item['service']] = item['error']
+            get_snapshot_store().record_query(environment, snapshot, source='prewarm')
+            logger.info(f"已预热 ArgoCD {environment}: {len(services)} 个服务")
+        return errors
+
+
+# 进程内共享的缓存和调度器
+_warm_cache = WarmCache()
+_scheduler: Optional[PrewarmScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_warm_cache() -> WarmCache:
+    """获取进程内共享的预热缓存"""
+    return _warm_cache
+
+
+def get_max_age() -> float:
+    """预热结果的最长使用时间（秒）"""
+    return float(load_prewarm_config()['max_age_minutes']) * 60
+
+
+def verify_jira_access(base_url: str, api_token: str, email: str, filter_id: str, max_age: float) -> bool:
+    """
+    校验会话自己的 Jira 凭证能否查看过滤器（通过的结果缓存 max_age 秒）
+
+    预热结果是用服务账号凭证获取的，会话凭证没有该过滤器的权限时不能使用
+
+    Returns:
+        是否可以使用该过滤器的预热结果
+    """
+    from modules.jira_extractor import JiraExtractor
+
+    key = (base_url.rstrip('/'), hashlib.sha256((api_token or '').encode('utf-8')).hexdigest(), email or '', str(filter_id))
+    with _verified_lock:
+        verified_at = _verified_access.get(key)
+    hit = verified_at is not None and time.time() - verified_at <= max_age
+    get_metrics_registry().record_cache('warm_jira_access', hit)
+    if hit:
+        return True
+    if not JiraExtractor(base_url, api_token, email).can_view_filter(filter_id):
+        logger.warning(f"会话凭证无权查看过滤器 {filter_id}，不使用预热结果")
+        return False
+    with _verified_lock:
+        _verified_access[key] = time.time()
+    return True
+
+
+def start_prewarm_scheduler() -> Optional[PrewarmScheduler]:
+    """
+    按配置启动预热调度器（每个进程只启动一次，未启用时不做任何事）
+
+    Returns:
+        调度器，未启用时返回 None
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            return _scheduler
+        config = load_prewarm_config()
+        if not config['enabled']:
+            return None
+        _scheduler = PrewarmScheduler(config, _warm_cache)
+        _scheduler.start()
+        return _scheduler
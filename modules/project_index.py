@@ -0,0 +1,150 @@
+"""
+项目倒排索引模块
+在提取过程中建立 项目 -> 问题 的倒排索引，支持按项目快速查询和过滤
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Iterable
+
+
+class ProjectIndex:
+    """项目 -> 问题 Key 的倒排索引"""
+
+    def __init__(self):
+        # 项目名称 -> 问题 Key 列表（保持提取顺序）
+        self._issues_by_project: Dict[str, List[str]] = defaultdict(list)
+        # 项目名称 -> {状态: 数量}
+        self._status_by_project: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # 问题 Key -> 状态
+        self._issue_status: Dict[str, str] = {}
+        # 小写项目名称 -> 原始项目名称（大小写不敏感查询）
+        self._name_lookup: Dict[str, str] = {}
+
+    def add_issue(self, issue_key: str, status: str, projects: Iterable[str]):
+        """
+        将一个问题加入索引
+
+        Args:
+            issue_key: 问题 Key
+            status: 问题状态
+            projects: 问题影响的项目列表
+        """
+        self._issue_status[issue_key] = status
+        for project in dict.fromkeys(projects):
+            self._issues_by_project[project].append(issue_key)
+            self._status_by_project[project][status] += 1
+            self._name_lookup.setdefault(project.lower(), project)
+
+    @classmethod
+    def from_results(cls, results: List[Dict]) -> "ProjectIndex":
+        """
+        从提取结果列表构建索引
+
+        Args:
+            results: _extract_affects_projects 返回的结果列表
+
+        Returns:
+            ProjectIndex 实例
+        """
+        index = cls()
+        for result in results:
+            index.add_issue(
+                result.get('issue_key', ''),
+                result.get('status', ''),
+                result.get('affects_projects', []) or []
+            )
+        return index
+
+    def _resolve(self, project: str) -> Optional[str]:
+        """解析项目名称（先精确匹配，再大小写不敏感匹配）"""
+        if project in self._issues_by_project:
+            return project
+        return self._name_lookup.get(project.strip().lower())
+
+    def get_issues(self, project: str) -> List[str]:
+        """
+        获取影响指定项目的问题 Key 列表
+
+        Args:
+            project: 项目名称（大小写不敏感）
+
+        Returns:
+            问题 Key 列表，项目不存在时返回空列表
+        """
+        name = self._resolve(project)
+        if name is None:
+            return []
+        return list(self._issues_by_project[name])
+
+    def get_count(self, project: str) -> int:
+        """获取影响指定项目的问题数量"""
+        name = self._resolve(project)
+        return len(self._issues_by_project[name]) if name is not None else 0
+
+    def get_status_breakdown(self, project: str) -> Dict[str, int]:
+        """
+        获取指定项目的问题状态分布
+
+        Args:
+            project: 项目名称（大小写不敏感）
+
+        Returns:
+            {状态: 问题数量} 字典
+        """
+        name = self._resolve(project)
+        if name is None:
+            return {}
+        return dict(self._status_by_project[name])
+
+    def filter_issues(self, projects: List[str], status: Optional[str] = None, match_all: bool = False) -> List[str]:
+        """
+        按项目（和状态）过滤问题
+
+        Args:
+            projects: 项目名称列表
+            status: 只返回该状态的问题，None 表示不过滤
+            match_all: True 表示问题必须影响所有项目，False 表示影响任一项目即可
+
+        Returns:
+            问题 Key 列表（按首次出现顺序）
+        """
+        issue_sets = [self.get_issues(project) for project in projects]
+        if not issue_sets:
+            return []
+
+        if match_all:
+            common = set(issue_sets[0]).intersection(*issue_sets[1:])
+            keys = [key for key in issue_sets[0] if key in common]
+        else:
+            keys = list(dict.fromkeys(key for issues in issue_sets for key in issues))
+
+        if status is not None:
+            keys = [key for key in keys if self._issue_status.get(key) == status]
+        return keys
+
+    def list_projects(self) -> List[str]:
+        """列出索引中的所有项目（按问题数量降序、名称升序）"""
+        return sorted(self._issues_by_project, key=lambda p: (-len(self._issues_by_project[p]), p))
+
+    def summary_rows(self) -> List[Dict]:
+        """
+        生成每个项目的汇总行（适合直接展示为表格）
+
+        Returns:
+            [{'project', 'issue_count', 'status_breakdown'}, ...]
+        """
+        rows = []
+        for project in self.list_projects():
+            breakdown = self._status_by_project[project]
+            rows.append({
+                'project': project,
+                'issue_count': len(self._issues_by_project[project]),
+                'status_breakdown': ", ".join(f"{s}: {c}" for s, c in sorted(breakdown.items()))
+            })
+        return rows
+
+    def __contains__(self, project: str) -> bool:
+        return self._resolve(project) is not None
+
+    def __len__(self) -> int:
+        return len(self._issues_by_project)
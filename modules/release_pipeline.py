@@ -0,0 +1,229 @@
+"""
+Jira -> ArgoCD 发布就绪检查模块
+把 Jira 提取出的影响项目映射为 ArgoCD 服务名，并发查询各环境的镜像版本，生成一张就绪表
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from modules.argocd_client import ArgoCDClient
+from modules.service_catalog import get_service_catalog
+
+logger = logging.getLogger(__name__)
+
+SERVICE_MAPPING_FILE = "config/service_mapping.json"
+
+# 默认的 Jira 项目 -> ArgoCD 服务名映射；未配置的项目直接使用项目名作为服务名，
+# 映射为空列表表示该项目没有对应的 ArgoCD 应用
+DEFAULT_SERVICE_MAPPINGS = {
+    "aims-service": ["aims-service-cloud"],
+    "aims-web": ["aims-web-cloud"],
+    "aca": ["aca-new"],
+    "program-service": ["program-service-cloud"],
+    "program-web": ["program-web-cloud"],
+    "lt-external-service": ["lt-external-service-cloud"]
+}
+
+
+def load_service_mappings(mapping_file: str = SERVICE_MAPPING_FILE) -> Dict[str, List[str]]:
+    """加载 Jira 项目 -> ArgoCD 服务名映射"""
+    try:
+        if os.path.exists(mapping_file):
+            with open(mapping_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('service_mappings', {})
+    except Exception as e:
+        logger.error(f"加载服务映射失败: {e}")
+    return dict(DEFAULT_SERVICE_MAPPINGS)
+
+
+def save_service_mappings(mappings: Dict[str, List[str]], mapping_file: str = SERVICE_MAPPING_FILE) -> bool:
+    """保存 Jira 项目 -> ArgoCD 服务名映射"""
+    try:
+        os.makedirs(os.path.dirname(mapping_file), exist_ok=True)
+        with open(mapping_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                "service_mappings": mappings,
+                "description": "Jira Affects Project 名称到 ArgoCD 服务名的映射，空列表表示该项目不部署到 ArgoCD",
+                "last_updated": datetime.now().strftime("%Y-%m-%d")
+            }, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        logger.error(f"保存服务映射失败: {e}")
+        return False
+
+
+def collect_projects(results) -> List[str]:
+    """
+    从 get_affects_projects 的结果中收集去重后的项目列表
+
+    Args:
+        results: ExtractionResult、list-of-dicts 结果或项目名称列表
+    """
+    projects = []
+    for item in results:
+        if isinstance(item, str):
+            projects.append(item)
+        else:
+            projects.extend(item['affects_projects'] or [])
+    return sorted({p.strip() for p in projects if p and p.strip()})
+
+
+def map_projects_to_services(projects: List[str], mappings: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """
+    把 Jira 项目映射为 ArgoCD 服务
+
+    Args:
+        projects: Jira 项目名称列表
+        mappings: 项目 -> 服务名列表映射（大小写不敏感）
+
+    Returns:
+        {service_name: [来源项目, ...]}（按服务名排序）
+    """
+    lookup = {source.lower(): targets for source, targets in mappings.items()}
+    services: Dict[str, List[str]] = {}
+    for project in projects:
+        targets = lookup.get(project.lower(), [project])
+        for service in targets:
+            services.setdefault(service, [])
+            if project not in services[service]:
+                services[service].append(project)
+    return dict(sorted(services.items()))
+
+
+class ReleaseReadinessPipeline:
+    """发布就绪检查流水线"""
+
+    def __init__(self, tokens: Dict[str, str], environments: Optional[List[str]] = None,
+                 mappings: Optional[Dict[str, List[str]]] = None, max_workers: int = 10,
+                 use_catalog: bool = True):
+        """
+        初始化流水线
+
+        Args:
+            tokens: {environment: token}，缺少 token 的环境会被跳过
+            environments: 要查询的环境列表，默认全部支持的环境
+            mappings: 项目 -> 服务映射，默认从配置文件加载
+            max_workers: 最大并发请求数
+            use_catalog: 是否先用服务目录在本地校验/纠正服务名
+        """
+        self.environments = [env for env in (environments or ArgoCDClient.list_environments()) if tokens.get(env)]
+        self.clients = {env: ArgoCDClient(env, tokens[env]) for env in self.environments}
+        self.mappings = mappings if mappings is not None else load_service_mappings()
+        self.max_workers = max_workers
+        self.use_catalog = use_catalog
+
+    def run(self, results, progress: Optional[Callable[[int, int, str], None]] = None) -> List[Dict]:
+        """
+        执行就绪检查
+
+        Args:
+            results: JiraExtractor.get_affects_projects 的结果（或项目名称列表）
+            progress: 进度回调 progress(done, total, message)，每个环境预检和每个镜像请求完成后调用；
+                      回调抛出异常时取消剩余请求并向上抛出（用于取消后台任务）
+
+        Returns:
+            就绪表行列表: [{'service', 'projects', <env>: tag, ..., 'readiness'}, ...]
+        """
+        services = map_projects_to_services(collect_projects(results), self.mappings)
+        tags: Dict[str, Dict[str, str]] = {service: {} for service in services}
+        errors: Dict[str, Dict[str, str]] = {service: {} for service in services}
+        notes: Dict[str, List[str]] = {service: [] for service in services}
+
+        # 总请求数 = 环境数 + 镜像请求数（预检完成后才知道镜像请求数，先按环境数计）
+        done = 0
+        total = len(self.environments)
+
+        def report(message):
+            nonlocal done
+            done += 1
+            if progress:
+                progress(done, total, message)
+
+        # 先用服务目录在本地解析服务名：不存在的服务不发请求，只自动纠正大小写和高相似度的名称，
+        # 其他相近的名称作为建议记录在备注中（不替换查询，避免把另一个服务的标签当成本服务的）；
+        # 预检不通过的环境（服务器不可达或 Token 不可用）所有服务直接记为失败
+        targets = {}
+        for env in self.environments:
+            reachable, message = self.clients[env].preflight()
+            report(f"{env} 预检完成")
+            if not reachable:
+                for service in services:
+                    errors[service][env] = message
+                continue
+            catalog = self._load_catalog(env)
+            for service in services:
+                if catalog is None:
+                    targets[(env, service)] = service
+                    continue
+                resolution = catalog.resolve(service)
+                if resolution['status'] == 'suggested':
+                    hint = ", ".join(name for name, _ in resolution['suggestions'][:3])
+                    errors[service][env] = f"应用不存在: {service}，是否是: {hint}"
+                    continue
+                if resolution['service'] is None:
+                    errors[service][env] = f"应用不存在: {service}"
+                    continue
+                if resolution['service'] != service:
+                    note = f"{env}: {service} → {resolution['service']}"
+                    if note not in notes[service]:
+                        notes[service].append(note)
+                targets[(env, service)] = resolution['service']
+
+        total += len(targets)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.clients[env].get_service_images, target): (env, service, target)
+                for (env, service), target in targets.items()
+            }
+            try:
+                for future in as_completed(futures):
+                    env, service, target = futures[future]
+                    try:
+                        images = future.result()
+                        tags[service][env] = images.get(target, next(iter(images.values()), 'N/A'))
+                    except Exception as e:
+                        errors[service][env] = str(e)
+                    report(f"已完成: {env} · {service}")
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        rows = []
+        for service, projects in services.items():
+            row = {'service': service, 'projects': ", ".join(projects)}
+            for env in self.environments:
+                row[env] = tags[service].get(env) or f"❌ {errors[service].get(env, '无镜像')}"
+            row['readiness'] = self._readiness(tags[service], errors[service])
+            row['note'] = "; ".join(notes[service])
+            rows.append(row)
+
+        logger.info(f"发布就绪检查完成: {len(services)} 个服务, {len(self.environments)} 个环境")
+        return rows
+
+    def _load_catalog(self, env: str):
+        """加载环境的服务目录，失败时返回 None（退化为不校验）"""
+        if not self.use_catalog:
+            return None
+        try:
+            return get_service_catalog(self.clients[env])
+        except Exception as e:
+            logger.warning(f"{env} 服务目录加载失败，跳过本地校验: {e}")
+            return None
+
+    def _readiness(self, tags: Dict[str, str], errors: Dict[str, str]) -> str:
+        """根据各环境的镜像标签判断就绪状态"""
+        if errors and not tags:
+            return "❌ 查询失败"
+        if errors:
+            return "⚠️ 部分环境失败"
+        distinct = {tags[env] for env in self.environments if env in tags}
+        if len(distinct) <= 1:
+            return "✅ 各环境一致"
+        if 'prod' in tags and 'preprod' in tags and tags['prod'] != tags['preprod']:
+            return "🚀 待发布 (preprod ≠ prod)"
+        return "🔄 版本不一致"
@@ -0,0 +1,334 @@
+"""
+Release 项目集合存储模块
+把每个 release 的影响项目集合编码为位图（基于全局项目字典），
+支持并集、交集、差集表达式，数百个历史 release 也可以即时计算
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 同一文件的保存在进程内串行执行（每次页面重跑都会创建新的 ReleaseStore 实例，实例锁无法互斥）
+_path_locks: Dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+
+def _path_lock(path: str) -> threading.Lock:
+    """获取文件路径对应的进程内共享锁"""
+    key = os.path.abspath(path)
+    with _path_locks_guard:
+        lock = _path_locks.get(key)
+        if lock is None:
+            lock = _path_locks[key] = threading.Lock()
+        return lock
+
+
+class ReleaseExpressionError(ValueError):
+    """Release 集合表达式错误"""
+
+
+class ReleaseStore:
+    """
+    基于位图的 release 项目集合存储
+
+    表达式语法（优先级从高到低）：
+        -  差集      A - B
+        &  交集      A & B
+        ^  对称差    A ^ B
+        |  并集      A | B（也可用 +）
+    名称可以是字母、数字、下划线和点组成的标识符；包含其他字符的已存在名称可直接使用，
+    也可以用引号或反引号括起来，例如: `2024-11-R1` & ("2024-12-R1" | hotfix)
+    已存在的名称按最长优先整体匹配后才把 "-" 当作差集运算符，例如存在 2024-11-R1 和 hot 时，
+    2024-11-R1-hot 表示 2024-11-R1 - hot；若存在名为 2024-11-R1-hot 的 release，则表示该 release
+    """
+
+    _TOKEN_RE = re.compile(r'\s*(?:(?P<op>[|&^+()-])|`(?P<bq>[^`]+)`|"(?P<dq>[^"]+)"|\'(?P<sq>[^\']+)\'|(?P<name>[\w.]+))')
+    _PRECEDENCE = {'|': 1, '+': 1, '^': 2, '&': 3, '-': 4}
+
+    def __init__(self, path: Optional[str] = "results/releases.json"):
+        """
+        初始化存储
+
+        Args:
+            path: 持久化文件路径，None 表示只在内存中使用
+        """
+        self.path = path
+        self.project_names: List[str] = []
+        self._project_bits: Dict[str, int] = {}
+        self.releases: Dict[str, int] = {}
+        self.release_info: Dict[str, Dict] = {}
+        # 尚未保存的修改：release 名称 -> (项目列表, 信息)，None 表示删除；保存时合并到文件中的最新内容
+        self._pending: Dict[str, Optional[Tuple[List[str], Dict]]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    # ------------------------------------------------------------------
+    # 编码
+    # ------------------------------------------------------------------
+
+    def _project_bit(self, project: str) -> int:
+        """获取项目的位序号（不存在时分配新位）"""
+        bit = self._project_bits.get(project)
+        if bit is None:
+            bit = len(self.project_names)
+            self.project_names.append(project)
+            self._project_bits[project] = bit
+        return bit
+
+    def encode(self, projects: Iterable[str]) -> int:
+        """把项目集合编码为位图"""
+        bitmap = 0
+        for project in projects:
+            project = project.strip()
+            if project:
+                bitmap |= 1 << self._project_bit(project)
+        return bitmap
+
+    def decode(self, bitmap: int) -> List[str]:
+        """把位图解码为项目列表（按名称排序）"""
+        names = []
+        while bitmap:
+            low = bitmap & -bitmap
+            names.append(self.project_names[low.bit_length() - 1])
+            bitmap ^= low
+        return sorted(names)
+
+    # ------------------------------------------------------------------
+    # Release 管理
+    # ------------------------------------------------------------------
+
+    def add_release(self, name: str, projects: Iterable[str], source: str = "") -> int:
+        """
+        添加或覆盖一个 release
+
+        Args:
+            name: release 名称
+            projects: 影响的项目列表
+            source: 数据来源说明（如过滤器 ID、归档运行 ID）
+
+        Returns:
+            release 包含的项目数
+        """
+        name = name.strip()
+        if not name:
+            raise ValueError("release 名称不能为空")
+        with self._lock:
+            bitmap = self.encode(projects)
+            self.releases[name] = bitmap
+            self.release_info[name] = {
+                'source': source,
+                'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self._pending[name] = (self.decode(bitmap), self.release_info[name])
+        return bin(bitmap).count('1')
+
+    def remove_release(self, name: str) -> bool:
+        """删除 release"""
+        with self._lock:
+            self.release_info.pop(name, None)
+            self._pending[name] = None
+            return self.releases.pop(name, None) is not None
+
+    def list_releases(self) -> List[Dict]:
+        """列出所有 release 及其项目数"""
+        return [
+            {
+                'release': name,
+                'project_count': bin(bitmap).count('1'),
+                'source': self.release_info.get(name, {}).get('source', ''),
+                'created_at': self.release_info.get(name, {}).get('created_at', '')
+            }
+            for name, bitmap in sorted(self.releases.items())
+        ]
+
+    def get_projects(self, name: str) -> List[str]:
+        """获取 release 的项目列表"""
+        if name not in self.releases:
+            raise KeyError(f"release 不存在: {name}")
+        return self.decode(self.releases[name])
+
+    # ------------------------------------------------------------------
+    # 集合运算
+    # ------------------------------------------------------------------
+
+    def union(self, names: Iterable[str]) -> List[str]:
+        """多个 release 的并集"""
+        bitmap = 0
+        for name in names:
+            bitmap |= self._bitmap(name)
+        return self.decode(bitmap)
+
+    def intersection(self, names: Iterable[str]) -> List[str]:
+        """多个 release 的交集（例如所有 release train 都涉及的项目）"""
+        bitmap = None
+        for name in names:
+            bitmap = self._bitmap(name) if bitmap is None else bitmap & self._bitmap(name)
+        return self.decode(bitmap or 0)
+
+    def difference(self, left: str, right: str) -> List[str]:
+        """在 left 中但不在 right 中的项目"""
+        return self.decode(self._bitmap(left) & ~self._bitmap(right))
+
+    def _bitmap(self, name: str) -> int:
+        try:
+            return self.releases[name]
+        except KeyError:
+            raise ReleaseExpressionError(f"release 不存在: {name}")
+
+    def _tokenize(self, expression: str) -> List[tuple]:
+        tokens = []
+        pos = 0
+        expression = expression.rstrip()
+        # 优先匹配已有的 release 全名（最长优先），允许名称中直接包含 "-"（如 2024-11-R1），
+        # 名称后紧跟 "-" 时按差集运算符处理（如 2024-11-R1-hot）
+        known_names = sorted(self.releases, key=len, reverse=True)
+        while pos < len(expression):
+            while pos < len(expression) and expression[pos].isspace():
+                pos += 1
+            known = next((n for n in known_names if expression.startswith(n, pos)
+                          and (pos + len(n) == len(expression) or expression[pos + len(n)] in ' |&^+()-')), None)
+            if known:
+                tokens.append(('name', known))
+                pos += len(known)
+                continue
+            match = self._TOKEN_RE.match(expression, pos)
+            if not match or match.end() == pos:
+                raise ReleaseExpressionError(f"无法解析表达式（位置 {pos}）: {expression[pos:]}")
+            if match.group('op'):
+                tokens.append(('op', match.group('op')))
+            else:
+                tokens.append(('name', match.group('bq') or match.group('dq') or match.group('sq') or match.group('name')))
+            pos = match.end()
+        return tokens
+
+    def evaluate(self, expression: str) -> List[str]:
+        """
+        计算集合表达式
+
+        Args:
+            expression: 例如 "R1 - R2"、"R1 & R2 & R3"、"(R1 | R2) - R3"
+
+        Returns:
+            结果项目列表（按名称排序）
+        """
+        tokens = self._tokenize(expression)
+        if not tokens:
+            raise ReleaseExpressionError("表达式为空")
+        position = 0
+
+        def parse(min_precedence: int) -> int:
+            nonlocal position
+            left = parse_operand()
+            while position < len(tokens):
+                kind, value = tokens[position]
+                if kind != 'op' or value not in self._PRECEDENCE or self._PRECEDENCE[value] < min_precedence:
+                    break
+                position += 1
+                right = parse(self._PRECEDENCE[value] + 1)
+                if value in ('|', '+'):
+                    left |= right
+                elif value == '&':
+                    left &= right
+                elif value == '^':
+                    left ^= right
+                else:
+                    left &= ~right
+            return left
+
+        def parse_operand() -> int:
+            nonlocal position
+            if position >= len(tokens):
+                raise ReleaseExpressionError("表达式不完整")
+            kind, value = tokens[position]
+            position += 1
+            if kind == 'name':
+                return self._bitmap(value)
+            if value == '(':
+                result = parse(1)
+                if position >= len(tokens) or tokens[position] != ('op', ')'):
+                    raise ReleaseExpressionError("缺少右括号")
+                position += 1
+                return result
+            raise ReleaseExpressionError(f"意外的符号: {value}")
+
+        bitmap = parse(1)
+        if position != len(tokens):
+            raise ReleaseExpressionError(f"意外的符号: {tokens[position][1]}")
+        return self.decode(bitmap)
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def save(self):
+        """
+        保存到文件（位图以十六进制字符串存储）
+
+        在文件锁内先重新加载文件，再合并本实例尚未保存的添加和删除，
+        其他会话在此期间保存的 release 不会被覆盖
+        """
+        if not self.path:
+            return
+        with _path_lock(self.path):
+            with self._lock:
+                pending = dict(self._pending)
+            if os.path.exists(self.path):
+                self.load()
+            with self._lock:
+                for name, change in pending.items():
+                    if change is None:
+                        self.releases.pop(name, None)
+                        self.release_info.pop(name, None)
+                    else:
+                        projects, info = change
+                        self.releases[name] = self.encode(projects)
+                        self.release_info[name] = info
+                    if self._pending.get(name) is change:
+                        del self._pending[name]
+                data = {
+                    'version': 1,
+                    'projects': list(self.project_names),
+                    'releases': {
+                        name: dict(self.release_info.get(name, {}), bitmap=format(bitmap, 'x'))
+                        for name, bitmap in self.releases.items()
+                    }
+                }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # 每次保存使用唯一的临时文件，写完后原子替换
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory or ".",
+                                             prefix=f"{os.path.basename(self.path)}.", suffix=".tmp",
+                                             delete=False) as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                tmp_path = f.name
+            os.replace(tmp_path, self.path)
+
+    def load(self):
+        """从文件加载"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"加载 release 存储失败: {e}")
+            return
+        with self._lock:
+            self._apply_data(data)
+
+    def _apply_data(self, data: Dict):
+        """用文件内容替换内存中的数据（调用方持有锁）"""
+        self.project_names = list(data.get('projects', []))
+        self._project_bits = {name: bit for bit, name in enumerate(self.project_names)}
+        self.releases = {}
+        self.release_info = {}
+        for name, info in data.get('releases', {}).items():
+            self.releases[name] = int(info.get('bitmap', '0'), 16)
+            self.release_info[name] = {k: v for k, v in info.items() if k != 'bitmap'}
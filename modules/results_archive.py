@@ -0,0 +1,215 @@
+"""
+提取结果归档模块
+以紧凑的 gzip JSON 快照保存每次提取结果，维护一个小的索引文件，
+并按时间和总大小执行保留策略，避免 results/ 目录无限增长
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 同一进程内多个 Streamlit 会话共享归档目录，索引读写需要加锁
+_index_lock = threading.Lock()
+
+
+def prune_files(directory: str, prefix: str = "", max_age_days: Optional[float] = None,
+                max_files: Optional[int] = None) -> List[str]:
+    """
+    按时间和数量清理目录中的文件
+
+    Args:
+        directory: 目录路径
+        prefix: 只处理以该前缀开头的文件
+        max_age_days: 删除修改时间早于该天数的文件，None 表示不限制
+        max_files: 最多保留的文件数（保留最新的），None 表示不限制
+
+    Returns:
+        被删除的文件路径列表
+    """
+    if not os.path.isdir(directory):
+        return []
+
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(prefix) and os.path.isfile(path):
+            entries.append((os.path.getmtime(path), path))
+    entries.sort(reverse=True)
+
+    cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+    removed = []
+    for position, (mtime, path) in enumerate(entries):
+        too_old = cutoff is not None and mtime < cutoff
+        too_many = max_files is not None and position >= max_files
+        if too_old or too_many:
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError as e:
+                logger.warning(f"删除文件失败 {path}: {e}")
+
+    if removed:
+        logger.info(f"已清理 {directory} 中的 {len(removed)} 个文件")
+    return removed
+
+
+class ResultsArchive:
+    """提取结果的压缩归档（gzip 快照 + 索引 + 保留策略）"""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, archive_dir: str = "results/archive", max_age_days: float = 30,
+                 max_total_bytes: int = 100 * 1024 * 1024, max_runs: int = 200):
+        """
+        初始化归档
+
+        Args:
+            archive_dir: 归档目录
+            max_age_days: 快照最长保留天数
+            max_total_bytes: 所有快照的最大总大小（字节）
+            max_runs: 最多保留的快照数量
+        """
+        self.archive_dir = archive_dir
+        self.max_age_days = max_age_days
+        self.max_total_bytes = max_total_bytes
+        self.max_runs = max_runs
+        self.index_path = os.path.join(archive_dir, self.INDEX_FILE)
+
+    def _read_index(self) -> List[Dict]:
+        """读取索引（按创建时间升序）"""
+        if not os.path.exists(self.index_path):
+            return []
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f).get('runs', [])
+        except (OSError, ValueError) as e:
+            logger.error(f"读取归档索引失败: {e}")
+            return []
+
+    def _write_index(self, runs: List[Dict]):
+        """原子地写入索引"""
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'version': 1, 'runs': runs}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+    def save(self, results, filter_id: str = "") -> Dict:
+        """
+        保存一次提取结果的压缩快照
+
+        Args:
+            results: ExtractionResult 或 list-of-dicts 结果
+            filter_id: 过滤器 ID
+
+        Returns:
+            索引条目
+        """
+        rows = results.to_dicts() if hasattr(results, 'to_dicts') else list(results)
+        created_at = datetime.now()
+        run_id = f"{created_at.strftime('%Y%m%d_%H%M%S_%f')}_{filter_id}"
+        file_name = f"{run_id}.json.gz"
+        path = os.path.join(self.archive_dir, file_name)
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        payload = json.dumps({
+            'run_id': run_id,
+            'filter_id': str(filter_id),
+            'created_at': created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            'results': rows
+        }, ensure_ascii=False, separators=(',', ':'))
+        with gzip.open(path, "wb", compresslevel=6) as f:
+            f.write(payload.encode('utf-8'))
+
+        projects = {p for row in rows for p in row.get('affects_projects', []) or []}
+        entry = {
+            'run_id': run_id,
+            'filter_id': str(filter_id),
+            'created_at': created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            'timestamp': created_at.timestamp(),
+            'file': file_name,
+            'issue_count': len(rows),
+            'project_count': len(projects),
+            'bytes': os.path.getsize(path)
+        }
+
+        with _index_lock:
+            runs = self._read_index()
+            runs.append(entry)
+            runs = self._apply_retention(runs)
+            self._write_index(runs)
+
+        logger.info(f"已归档提取结果: {file_name} ({entry['bytes']} 字节)")
+        return entry
+
+    def _apply_retention(self, runs: List[Dict]) -> List[Dict]:
+        """按时间、数量和总大小淘汰最旧的快照，返回保留的索引条目"""
+        cutoff = time.time() - self.max_age_days * 86400
+        kept = [run for run in runs if run['timestamp'] >= cutoff]
+        if len(kept) > self.max_runs:
+            kept = kept[-self.max_runs:]
+        total = sum(run['bytes'] for run in kept)
+        while len(kept) > 1 and total > self.max_total_bytes:
+            total -= kept.pop(0)['bytes']
+
+        kept_files = {run['file'] for run in kept}
+        for run in runs:
+            if run['file'] not in kept_files:
+                try:
+                    os.remove(os.path.join(self.archive_dir, run['file']))
+                except OSError:
+                    pass
+                logger.info(f"保留策略删除归档: {run['run_id']}")
+        return kept
+
+    def apply_retention(self) -> int:
+        """
+        立即执行保留策略
+
+        Returns:
+            删除的快照数量
+        """
+        with _index_lock:
+            runs = self._read_index()
+            kept = self._apply_retention(runs)
+            if len(kept) != len(runs):
+                self._write_index(kept)
+        return len(runs) - len(kept)
+
+    def list_runs(self, filter_id: Optional[str] = None) -> List[Dict]:
+        """
+        列出归档的运行（只读索引，不解压快照），最新的在前
+
+        Args:
+            filter_id: 只列出该过滤器的运行，None 表示全部
+        """
+        runs = self._read_index()
+        if filter_id is not None:
+            runs = [run for run in runs if run['filter_id'] == str(filter_id)]
+        return list(reversed(runs))
+
+    def load(self, run_id: str) -> List[Dict]:
+        """
+        加载某次运行的完整结果
+
+        Args:
+            run_id: 运行 ID
+
+        Returns:
+            list-of-dicts 结果
+        """
+        for run in self._read_index():
+            if run['run_id'] == run_id:
+                with gzip.open(os.path.join(self.archive_dir, run['file']), "rb") as f:
+                    return json.loads(f.read().decode('utf-8'))['results']
+        raise KeyError(f"归档中不存在运行: {run_id}")
+
+    def total_bytes(self) -> int:
+        """所有快照的总大小（字节）"""
+        return sum(run['bytes'] for run in self._read_index())
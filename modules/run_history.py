@@ -0,0 +1,187 @@
+"""
+Jira 提取运行历史模块
+为每次提取保存每个问题的指纹表（问题 Key、状态、规范化项目的哈希），
+对比两次运行时只读取指纹表，不需要重新加载完整结果
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from modules.results_archive import prune_files
+
+logger = logging.getLogger(__name__)
+
+# 指纹表: {issue_key: (fingerprint, status, normalized_projects)}
+FingerprintTable = Dict[str, Tuple[str, str, List[str]]]
+
+
+def normalize_projects(projects: List[str]) -> List[str]:
+    """规范化项目列表（去空白、小写、去重、排序）"""
+    return sorted({p.strip().lower() for p in projects if p and p.strip()})
+
+
+def issue_fingerprint(issue_key: str, status: str, normalized_projects: List[str]) -> str:
+    """
+    计算单个问题的指纹
+
+    Args:
+        issue_key: 问题 Key
+        status: 问题状态
+        normalized_projects: 规范化后的项目列表
+
+    Returns:
+        16 位十六进制指纹
+    """
+    raw = "\x1f".join([issue_key, status, "\x1e".join(normalized_projects)])
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def build_fingerprint_table(results) -> FingerprintTable:
+    """
+    从提取结果构建指纹表
+
+    Args:
+        results: ExtractionResult 或 list-of-dicts 结果
+
+    Returns:
+        指纹表
+    """
+    table = {}
+    for row in results:
+        issue_key = row['issue_key']
+        status = row['status']
+        projects = normalize_projects(row['affects_projects'] or [])
+        table[issue_key] = (issue_fingerprint(issue_key, status, projects), status, projects)
+    return table
+
+
+def diff_tables(old: FingerprintTable, new: FingerprintTable) -> Dict:
+    """
+    对比两个指纹表
+
+    Args:
+        old: 较早运行的指纹表
+        new: 较新运行的指纹表
+
+    Returns:
+        {
+            'added': [issue_key, ...],
+            'removed': [issue_key, ...],
+            'status_changed': {issue_key: (old_status, new_status)},
+            'projects_changed': {issue_key: {'added': [...], 'removed': [...]}},
+            'new_projects': [project, ...],      # 本次运行新出现的项目
+            'dropped_projects': [project, ...],  # 本次运行不再出现的项目
+            'unchanged': int
+        }
+    """
+    old_keys = old.keys()
+    new_keys = new.keys()
+
+    status_changed = {}
+    projects_changed = {}
+    unchanged = 0
+    for key in old_keys & new_keys:
+        old_fp, old_status, old_projects = old[key]
+        new_fp, new_status, new_projects = new[key]
+        # 指纹相同即视为未变化，只对变化的问题展开比较
+        if old_fp == new_fp:
+            unchanged += 1
+            continue
+        if old_status != new_status:
+            status_changed[key] = (old_status, new_status)
+        if old_projects != new_projects:
+            old_set, new_set = set(old_projects), set(new_projects)
+            projects_changed[key] = {
+                'added': sorted(new_set - old_set),
+                'removed': sorted(old_set - new_set)
+            }
+
+    old_projects_all = {p for _, _, projects in old.values() for p in projects}
+    new_projects_all = {p for _, _, projects in new.values() for p in projects}
+
+    return {
+        'added': sorted(new_keys - old_keys),
+        'removed': sorted(old_keys - new_keys),
+        'status_changed': dict(sorted(status_changed.items())),
+        'projects_changed': dict(sorted(projects_changed.items())),
+        'new_projects': sorted(new_projects_all - old_projects_all),
+        'dropped_projects': sorted(old_projects_all - new_projects_all),
+        'unchanged': unchanged
+    }
+
+
+class RunHistory:
+    """提取运行历史（每次运行一个紧凑的指纹表文件）"""
+
+    def __init__(self, history_dir: str = "results/runs", max_age_days: float = 90, max_runs: int = 500):
+        self.history_dir = history_dir
+        self.max_age_days = max_age_days
+        self.max_runs = max_runs
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.history_dir, f"{run_id}.json")
+
+    def save_run(self, results, filter_id: str) -> str:
+        """
+        保存一次运行的指纹表
+
+        Args:
+            results: ExtractionResult 或 list-of-dicts 结果
+            filter_id: 过滤器 ID
+
+        Returns:
+            运行 ID
+        """
+        os.makedirs(self.history_dir, exist_ok=True)
+        created_at = datetime.now()
+        table = build_fingerprint_table(results)
+        run_id = f"{created_at.strftime('%Y%m%d_%H%M%S_%f')}_{filter_id}"
+
+        with open(self._path(run_id), "w", encoding="utf-8") as f:
+            json.dump({
+                'run_id': run_id,
+                'filter_id': str(filter_id),
+                'created_at': created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                'issue_count': len(table),
+                'issues': table
+            }, f, ensure_ascii=False, separators=(',', ':'))
+
+        logger.info(f"已保存运行指纹表: {run_id} ({len(table)} 个问题)")
+        prune_files(self.history_dir, max_age_days=self.max_age_days, max_files=self.max_runs)
+        return run_id
+
+    def list_runs(self, filter_id: Optional[str] = None) -> List[str]:
+        """
+        列出运行 ID（最新的在前）
+
+        Args:
+            filter_id: 只列出该过滤器的运行，None 表示全部
+        """
+        if not os.path.isdir(self.history_dir):
+            return []
+        run_ids = [name[:-5] for name in os.listdir(self.history_dir) if name.endswith('.json')]
+        if filter_id is not None:
+            suffix = f"_{filter_id}"
+            run_ids = [run_id for run_id in run_ids if run_id.endswith(suffix)]
+        return sorted(run_ids, reverse=True)
+
+    def load_table(self, run_id: str) -> FingerprintTable:
+        """加载某次运行的指纹表"""
+        with open(self._path(run_id), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {key: (fp, status, projects) for key, (fp, status, projects) in data['issues'].items()}
+
+    def previous_run(self, run_id: str, filter_id: Optional[str] = None) -> Optional[str]:
+        """获取指定运行之前的最近一次运行 ID"""
+        for candidate in self.list_runs(filter_id):
+            if candidate < run_id:
+                return candidate
+        return None
+
+    def diff_runs(self, old_run_id: str, new_run_id: str) -> Dict:
+        """对比两次运行（只读取指纹表）"""
+        return diff_tables(self.load_table(old_run_id), self.load_table(new_run_id))
@@ -0,0 +1,189 @@
+"""
+ArgoCD 服务目录模块
+缓存每个环境的应用名称列表，并建立三元组（trigram）索引做模糊匹配，
+在发送请求前就能在本地校验和纠正服务名，避免 404 往返
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 建议的相似度达到该值（且只有一个这样的候选）时才视为自动纠正；
+# 更低的相似度只作为建议，不自动替换，避免把不存在的服务当成另一个服务查询
+AUTO_CORRECT_SCORE = 0.9
+
+
+def trigrams(text: str) -> set:
+    """生成文本的三元组集合（两侧补空格，大小写不敏感）"""
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """名称的三元组倒排索引"""
+
+    def __init__(self, names: List[str]):
+        self.names = list(dict.fromkeys(names))
+        self._grams = [trigrams(name) for name in self.names]
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for position, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings[gram].append(position)
+
+    def search(self, query: str, limit: int = 5, min_score: float = 0.3) -> List[Tuple[str, float]]:
+        """
+        模糊搜索
+
+        Args:
+            query: 查询字符串
+            limit: 最多返回的结果数
+            min_score: 最低相似度（Dice 系数，0~1）
+
+        Returns:
+            [(name, score), ...]，按相似度降序
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        # 只对至少共享一个三元组的候选计算相似度
+        overlaps: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            for position in self._postings.get(gram, ()):
+                overlaps[position] += 1
+
+        scored = []
+        for position, overlap in overlaps.items():
+            score = 2 * overlap / (len(query_grams) + len(self._grams[position]))
+            # 查询是候选名的前缀时（如 aca -> aca-new）适当加分
+            if self.names[position].lower().startswith(query.lower()):
+                score = min(1.0, score + 0.1)
+            if score >= min_score:
+                scored.append((self.names[position], round(score, 3)))
+
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class ServiceCatalog:
+    """某个环境的服务目录（服务名 = 去掉环境前后缀的应用名）"""
+
+    def __init__(self, environment: str, services: List[str], fetched_at: Optional[float] = None):
+        self.environment = environment
+        self.services = sorted(set(services))
+        self.fetched_at = fetched_at or time.time()
+        self._exact = set(self.services)
+        self._lower = {service.lower(): service for service in self.services}
+        self.index = TrigramIndex(self.services)
+
+    @classmethod
+    def from_client(cls, client) -> "ServiceCatalog":
+        """通过 ArgoCDClient 拉取应用列表构建目录（一次请求）"""
+        services = []
+        for app_name in client.list_applications():
+            service = client.get_service_name(app_name)
+            if service:
+                services.append(service)
+        logger.info(f"已加载 {client.environment} 服务目录: {len(services)} 个服务")
+        return cls(client.environment, services)
+
+    def suggest(self, name: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """获取服务名建议"""
+        return self.index.search(name.strip(), limit=limit)
+
+    def resolve(self, name: str) -> Dict:
+        """
+        在本地校验服务名
+
+        Args:
+            name: 用户输入的服务名
+
+        Returns:
+            {
+                'input': 原始输入,
+                'status': 'exact' | 'corrected' | 'suggested' | 'unknown',
+                'service': 可直接查询的服务名（suggested 时为最相近的建议，需调用方确认；unknown 时为 None）,
+                'suggestions': [(name, score), ...]
+            }
+            corrected 只用于大小写不同或唯一的高相似度（>= AUTO_CORRECT_SCORE）候选
+        """
+        cleaned = name.strip()
+        if cleaned in self._exact:
+            return {'input': name, 'status': 'exact', 'service': cleaned, 'suggestions': []}
+        if cleaned.lower() in self._lower:
+            return {'input': name, 'status': 'corrected', 'service': self._lower[cleaned.lower()], 'suggestions': []}
+
+        suggestions = self.suggest(cleaned)
+        confident = [suggestion for suggestion in suggestions if suggestion[1] >= AUTO_CORRECT_SCORE]
+        if len(confident) == 1:
+            return {'input': name, 'status': 'corrected', 'service': confident[0][0], 'suggestions': suggestions}
+        if suggestions:
+            return {'input': name, 'status': 'suggested', 'service': suggestions[0][0], 'suggestions': suggestions}
+        return {'input': name, 'status': 'unknown', 'service': None, 'suggestions': []}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._exact
+
+    def __len__(self) -> int:
+        return len(self.services)
+
+
+# 进程内共享的目录缓存: (environment, token_hash) -> ServiceCatalog
+_catalog_cache: Dict[Tuple[str, str], ServiceCatalog] = {}
+# 拉取失败的记录: (environment, token_hash) -> (失败时间, 错误信息)，避免服务器不可达时每次重跑都等待超时
+_failure_cache: Dict[Tuple[str, str], Tuple[float, str]] = {}
+_catalog_lock = threading.Lock()
+
+
+def get_service_catalog(client, ttl: float = 600, force_refresh: bool = False,
+                        failure_ttl: float = 60) -> ServiceCatalog:
+    """
+    获取环境的服务目录（按环境和 token 缓存，过期后重新拉取）
+
+    Args:
+        client: ArgoCDClient 实例
+        ttl: 缓存有效期（秒）
+        force_refresh: 是否强制刷新
+        failure_ttl: 拉取失败后在该时间内直接抛出上次的错误（秒）
+
+    Returns:
+        ServiceCatalog
+    """
+    key = (client.environment, hashlib.sha256(client.token.encode('utf-8')).hexdigest())
+    now = time.time()
+    with _catalog_lock:
+        catalog = _catalog_cache.get(key)
+        if catalog and not force_refresh and now - catalog.fetched_at < ttl:
+            return catalog
+        failure = _failure_cache.get(key)
+        if failure and not force_refresh and now - failure[0] < failure_ttl:
+            raise Exception(failure[1])
+
+    try:
+        catalog = ServiceCatalog.from_client(client)
+    except Exception as e:
+        with _catalog_lock:
+            _failure_cache[key] = (time.time(), str(e))
+        raise
+    with _catalog_lock:
+        _catalog_cache[key] = catalog
+        _failure_cache.pop(key, None)
+    return catalog
+
+
+def clear_catalog_cache():
+    """清空目录缓存"""
+    with _catalog_lock:
+        _catalog_cache.clear()
+        _failure_cache.clear()
@@ -0,0 +1,273 @@
+"""
+部署快照存储模块
+把每次 ArgoCD 镜像查询记录到本地 SQLite（按 environment, service, queried_at 建索引），
+对比不再依赖会话中的上一次结果，多个用户共享，数月的历史也能毫秒级回答
+“某环境自某时起有哪些变化”和“每个环境每个服务的最新标签”
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DB = "results/snapshots.db"
+
+# 快照默认保留天数（每次记录查询后删除更早的快照）
+DEFAULT_RETENTION_DAYS = 365
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    environment TEXT NOT NULL,
+    queried_at REAL NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    success_count INTEGER NOT NULL DEFAULT 0,
+    failed_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_queries_env_time ON queries (environment, queried_at);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query_id INTEGER NOT NULL REFERENCES queries (id) ON DELETE CASCADE,
+    environment TEXT NOT NULL,
+    service TEXT NOT NULL,
+    queried_at REAL NOT NULL,
+    tag TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_env_service_time ON snapshots (environment, service, queried_at);
+CREATE INDEX IF NOT EXISTS idx_snapshots_query ON snapshots (query_id);
+
+-- 每个环境出现过的服务，按服务逐个走 (environment, service, queried_at) 索引取最新记录，
+-- 查询耗时只与服务数有关，与历史长度无关
+CREATE TABLE IF NOT EXISTS services (
+    environment TEXT NOT NULL,
+    service TEXT NOT NULL,
+    PRIMARY KEY (environment, service)
+) WITHOUT ROWID;
+"""
+
+# 同一进程内首次使用某个数据库文件时建表，之后不再重复执行
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+class SnapshotStore:
+    """基于 SQLite 的部署快照存储（每次调用使用独立连接，可在多个线程中使用）"""
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_DB, max_age_days: float = DEFAULT_RETENTION_DAYS):
+        """
+        初始化存储
+
+        Args:
+            path: SQLite 数据库文件路径
+            max_age_days: 快照最长保留天数
+        """
+        self.path = path
+        self.max_age_days = max_age_days
+        with _init_lock:
+            if path not in _initialized:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with self._connect() as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                _initialized.add(path)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def record_query(self, environment: str, results: Dict, queried_at: Optional[float] = None,
+                     source: str = "ui") -> int:
+        """
+        记录一次查询结果
+
+        Args:
+            environment: 环境名称
+            results: {'success': {service: tag}, 'failed': {service: error}}
+            queried_at: 查询时间戳，默认当前时间
+            source: 查询来源（ui / cli / prewarm）
+
+        Returns:
+            查询 ID
+        """
+        queried_at = queried_at or time.time()
+        success = results.get('success', {})
+        failed = results.get('failed', {})
+        with self._connect() as conn:
+            query_id = conn.execute(
+                "INSERT INTO queries (environment, queried_at, source, success_count, failed_count) VALUES (?, ?, ?, ?, ?)",
+                (environment, queried_at, source, len(success), len(failed))
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO snapshots (query_id, environment, service, queried_at, tag, error) VALUES (?, ?, ?, ?, ?, ?)",
+                [(query_id, environment, service, queried_at, tag, None) for service, tag in success.items()]
+                + [(query_id, environment, service, queried_at, None, error) for service, error in failed.items()]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO services (environment, service) VALUES (?, ?)",
+                [(environment, service) for service in list(success) + list(failed)]
+            )
+        logger.info(f"已记录 {environment} 快照: {len(success)} 成功, {len(failed)} 失败")
+        self.prune()
+        return query_id
+
+    def prune(self, max_age_days: Optional[float] = None) -> int:
+        """
+        删除早于指定天数的快照
+
+        Args:
+            max_age_days: 保留天数，默认使用 self.max_age_days
+
+        Returns:
+            删除的查询数
+        """
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        cutoff = time.time() - max_age_days * 86400
+        with self._connect() as conn:
+            conn.execute("DELETE FROM snapshots WHERE query_id IN (SELECT id FROM queries WHERE queried_at < ?)", (cutoff,))
+            return conn.execute("DELETE FROM queries WHERE queried_at < ?", (cutoff,)).rowcount
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def previous_results(self, environment: str, before_query_id: Optional[int] = None) -> Optional[Dict]:
+        """
+        获取某环境最近一次（在 before_query_id 之前的）查询结果，格式与页面的查询结果相同
+
+        Returns:
+            {'success': {...}, 'failed': {...}, 'query_id', 'queried_at'}，没有记录时返回 None
+        """
+        with self._connect() as conn:
+            sql = "SELECT id, queried_at FROM queries WHERE environment = ?"
+            params = [environment]
+            if before_query_id is not None:
+                sql += " AND id < ?"
+                params.append(before_query_id)
+            query = conn.execute(sql + " ORDER BY queried_at DESC, id DESC LIMIT 1", params).fetchone()
+            if query is None:
+                return None
+            rows = conn.execute("SELECT service, tag, error FROM snapshots WHERE query_id = ?", (query['id'],)).fetchall()
+        return {
+            'success': {row['service']: row['tag'] for row in rows if row['tag'] is not None},
+            'failed': {row['service']: row['error'] for row in rows if row['tag'] is None},
+            'query_id': query['id'],
+            'queried_at': query['queried_at']
+        }
+
+    def latest_tags(self, environment: Optional[str] = None) -> List[Dict]:
+        """
+        每个环境每个服务最近一次成功查询到的标签
+
+        Args:
+            environment: 只查询该环境，None 表示全部
+
+        Returns:
+            [{'environment', 'service', 'tag', 'queried_at'}, ...]（按环境、服务排序）
+        """
+        sql = """
+            SELECT s.environment, s.service, s.tag, s.queried_at
+            FROM services k
+            JOIN snapshots s ON s.id = (
+                SELECT id FROM snapshots
+                WHERE environment = k.environment AND service = k.service AND tag IS NOT NULL
+                ORDER BY queried_at DESC LIMIT 1
+            )
+        """
+        params = []
+        if environment:
+            sql += " WHERE k.environment = ?"
+            params.append(environment)
+        with self._connect() as conn:
+            rows = conn.execute(sql + " ORDER BY s.environment, s.service", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def changes_since(self, environment: str, since: float) -> List[Dict]:
+        """
+        某环境自指定时间以来标签发生变化的服务
+
+        以 since 之前最后一次成功记录的标签为基线，与当前最新标签比较；
+        since 之前没有记录的服务视为新增
+
+        Args:
+            environment: 环境名称
+            since: 起始时间戳
+
+        Returns:
+            [{'service', 'previous_tag', 'current_tag', 'changed_at'}, ...]，changed_at 为首次查询到当前标签的时间
+        """
+        sql = """
+            WITH tags AS (
+                SELECT k.service,
+                       (SELECT tag FROM snapshots
+                        WHERE environment = k.environment AND service = k.service
+                          AND queried_at < ? AND tag IS NOT NULL
+                        ORDER BY queried_at DESC LIMIT 1) AS previous_tag,
+                       (SELECT tag FROM snapshots
+                        WHERE environment = k.environment AND service = k.service
+                          AND queried_at >= ? AND tag IS NOT NULL
+                        ORDER BY queried_at DESC LIMIT 1) AS current_tag
+                FROM services k
+                WHERE k.environment = ?
+            )
+            SELECT service, previous_tag, current_tag,
+                   (SELECT MIN(queried_at) FROM snapshots
+                    WHERE environment = ? AND service = tags.service
+                      AND queried_at >= ? AND tag = tags.current_tag) AS changed_at
+            FROM tags
+            WHERE current_tag IS NOT NULL AND (previous_tag IS NULL OR previous_tag != current_tag)
+            ORDER BY changed_at DESC, service
+        """
+        with self._connect() as conn:
+            rows = conn.execute(sql, (since, since, environment, environment, since)).fetchall()
+        return [dict(row) for row in rows]
+
+    def tag_history(self, environment: str, service: str, limit: int = 50) -> List[Dict]:
+        """某服务在某环境中的查询记录（最新的在前）"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT queried_at, tag, error FROM snapshots WHERE environment = ? AND service = ? "
+                "ORDER BY queried_at DESC LIMIT ?",
+                (environment, service, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_snapshots(self) -> int:
+        """快照总行数"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+
+# 进程内共享的存储实例（页面会话、命令行和预热调度共用）
+_store: Optional[SnapshotStore] = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> SnapshotStore:
+    """获取进程内共享的部署快照存储（路径和保留天数可通过环境变量 SNAPSHOT_DB、SNAPSHOT_RETENTION_DAYS 覆盖）"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore(
+                os.environ.get('SNAPSHOT_DB', DEFAULT_SNAPSHOT_DB),
+                float(os.environ.get('SNAPSHOT_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
+            )
+        return _store
@@ -0,0 +1,188 @@
+"""
+Jira webhook 接收模块
+本地 HTTP 服务，接收 jira:issue_created / jira:issue_updated / jira:issue_deleted 事件
+并应用到进程内注册的实时数据（LiveIssueStore，每个启用实时更新的页面会话一份）：
+只应用到同一 Jira 实例（按 issue.self 判断）的数据；webhook 地址带 ?filter=<过滤器 ID> 时，
+只有该过滤器的数据会新增问题，其他数据只更新或删除已有的问题
+
+本地测试：
+    curl -X POST "http://localhost:8765/webhook?filter=20334" -H "Content-Type: application/json" -d @payload.json
+    curl http://localhost:8765/metrics   # 进程内指标（Prometheus 文本格式）
+可选的共享密钥通过环境变量 JIRA_WEBHOOK_SECRET 设置，请求需带 ?secret=... 或 X-Webhook-Secret 头
+"""
+
+import hmac
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from modules.live_issues import get_live_stores, parse_event
+from modules.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WEBHOOK_PORT = 8765
+
+# 单个 webhook 请求体的大小上限（Jira 问题负载通常远小于此）
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """处理 webhook 请求（POST 应用事件，GET /health 查看状态，GET /metrics 导出指标）"""
+
+    server_version = "JiraWebhookReceiver/1.0"
+
+    def _send_json(self, status: int, body: Dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self) -> bool:
+        secret = self.server.secret
+        if not secret:
+            return True
+        provided = self.headers.get('X-Webhook-Secret') or parse_qs(urlparse(self.path).query).get('secret', [''])[0]
+        return hmac.compare_digest(provided.encode('utf-8'), secret.encode('utf-8'))
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/metrics':
+            data = get_metrics_registry().to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if urlparse(self.path).path != '/health':
+            self._send_json(404, {'error': 'not found'})
+            return
+        stores = self.server.stores_provider()
+        self._send_json(200, {
+            'status': 'ok',
+            'stores': len(stores),
+            'issues': [len(store) for store in stores],
+            'events': sum(store.event_count for store in stores)
+        })
+
+    def do_POST(self):
+        if not self._authorized():
+            self._send_json(401, {'error': 'invalid secret'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self._send_json(400, {'error': 'invalid body size'})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            self._send_json(400, {'error': 'invalid json'})
+            return
+        # 应用到任何一份数据之前先校验负载，避免部分数据已更新后返回 400 导致 Jira 重试
+        try:
+            parsed = parse_event(payload)
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        if parsed is None:
+            self._send_json(200, {'action': 'ignored', 'stores': 0})
+            return
+
+        stores = self.server.stores_provider()
+        if not stores:
+            # 还没有可更新的提取结果，返回 503 让 Jira 稍后重试
+            self._send_json(503, {'error': 'no live extraction'})
+            return
+        filter_id = parse_qs(urlparse(self.path).query).get('filter', [None])[0]
+        results = []
+        for store in stores:
+            if not store.matches_site(parsed[1]):
+                continue
+            # 只有 webhook 地址指定的过滤器对应的数据可以新增问题，其他数据只更新已有的问题
+            allow_create = store.accept_new_issues and filter_id is not None and filter_id == store.filter_id
+            try:
+                results.append(store.apply_event(payload, allow_create=allow_create))
+            except Exception:
+                # 单份数据应用失败只记录日志，不影响其他数据，也不让 Jira 重试已应用的事件
+                logger.exception(f"webhook 事件应用失败: {parsed[2]}")
+                continue
+            if self.server.on_event:
+                self.server.on_event(results[-1])
+        if not results:
+            self._send_json(200, {'event': parsed[0], 'issue_key': parsed[2], 'action': 'ignored', 'stores': 0})
+            return
+        self._send_json(200, dict(results[0], stores=len(results), actions=[result['action'] for result in results]))
+
+    def log_message(self, format, *args):
+        logger.debug(f"webhook {self.address_string()} {format % args}")
+
+
+class WebhookReceiver:
+    """在后台线程中运行的 webhook HTTP 服务"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_WEBHOOK_PORT, secret: Optional[str] = None,
+                 stores_provider: Callable = get_live_stores, on_event: Optional[Callable[[Dict], None]] = None):
+        """
+        初始化
+
+        Args:
+            host: 监听地址
+            port: 监听端口（0 表示随机端口）
+            secret: 共享密钥，默认读取环境变量 JIRA_WEBHOOK_SECRET
+            stores_provider: 返回全部 LiveIssueStore 列表的函数
+            on_event: 每个事件应用后的回调（如命令行输出）
+        """
+        self.server = ThreadingHTTPServer((host, port), WebhookHandler)
+        self.server.daemon_threads = True
+        self.server.secret = secret if secret is not None else os.environ.get('JIRA_WEBHOOK_SECRET', '')
+        self.server.stores_provider = stores_provider
+        self.server.on_event = on_event
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        """在守护线程中启动服务"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="jira-webhook", daemon=True)
+        self._thread.start()
+        logger.info(f"Jira webhook 接收器已启动: http://{self.server.server_address[0]}:{self.port}")
+
+    def serve_forever(self):
+        """在当前线程中运行服务（命令行使用）"""
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# 进程内只启动一个接收器，所有页面会话共用
+_receiver: Optional[WebhookReceiver] = None
+_receiver_lock = threading.Lock()
+
+
+def start_webhook_receiver(port: int = DEFAULT_WEBHOOK_PORT, host: str = "127.0.0.1") -> WebhookReceiver:
+    """
+    启动进程内共享的 webhook 接收器（已启动时直接返回）
+
+    Args:
+        port: 监听端口
+        host: 监听地址
+
+    Returns:
+        WebhookReceiver
+    """
+    global _receiver
+    with _receiver_lock:
+        if _receiver is None:
+            _receiver = WebhookReceiver(host, port)
+            _receiver.start()
+        return _receiver
@@ -1,17 +1,40 @@
 # Jira Affects Project 提取工具
 import streamlit as st
+from streamlit import runtime as streamlit_runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import os
-import pandas as pd
 import json
 import sys
+import hashlib
+import time
+from datetime import datetime
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from modules.jira_extractor import JiraExtractor
+from modules.lazy_import import lazy_module
+from modules.run_history import RunHistory
+from modules.results_archive import ResultsArchive
+from modules.release_store import ReleaseStore, ReleaseExpressionError
+from modules.job_runner import Job, get_job_runner
+from modules.diagnostics_ui import render_diagnostics_panel
+from modules.metrics import get_metrics_registry
+from modules.prewarm import get_max_age, get_warm_cache, start_prewarm_scheduler, verify_jira_access
+from modules.live_issues import LiveIssueStore, get_live_store, prune_live_stores, set_live_store
+from modules.webhook_receiver import DEFAULT_WEBHOOK_PORT, start_webhook_receiver
+
+# pandas 在第一次展示提取结果时才导入，打开页面不承担这部分开销
+pd = lazy_module('pandas')
 
 st.set_page_config(page_title="Jira Affects Project 提取工具", layout="wide")
 
+# 页面脚本整体运行耗时计入 render 阶段
+render_started = time.perf_counter()
+
+# 按配置启动预热调度器（未启用时不做任何事）
+start_prewarm_scheduler()
+
 # 配置文件路径
 CONFIG_FILE = "config/jira_config.json"
 
@@ -105,7 +128,7 @@ def save_project_mappings(mappings):
             "project_mappings": mappings,
             "description": "当检测到左侧项目时，自动添加右侧的关联项目到结果中",
             "version": "1.0.0",
-            "last_updated": pd.Timestamp.now().strftime("%Y-%m-%d")
+            "last_updated": datetime.now().strftime("%Y-%m-%d")
         }
         
         with open("config/project_mapping.json", "w", encoding="utf-8") as f:
@@ -130,11 +153,526 @@ def mask_api_token(token, show_full=False):
     
     return token[:4] + "*" * (len(token) - 8) + token[-4:]
 
+# 提取结果缓存函数
+def extraction_fingerprint(base_url, api_token, email, filter_id, field_id):
+    """根据提取输入生成指纹（Token 只参与哈希，不保存明文）"""
+    mapping_file = "project_mapping.json"
+    mapping_mtime = os.path.getmtime(mapping_file) if os.path.exists(mapping_file) else None
+    raw = json.dumps({
+        'base_url': base_url,
+        'api_token': hashlib.sha256((api_token or '').encode('utf-8')).hexdigest(),
+        'email': email,
+        'filter_id': filter_id,
+        'field_id': field_id,
+        'mapping_mtime': mapping_mtime
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def build_extraction_state(jira_client, results, fingerprint, filter_id):
+    """生成保存在 session state 中的提取结果（含 DataFrame、去重项目和下载内容）"""
+    # 在后台任务中执行，不能直接调用 st.*，警告随结果一起返回
+    warnings = []
+    # 保存本次运行的指纹表，并与同一过滤器的上一次运行对比
+    run_diff = None
+    previous_run_id = None
+    try:
+        history = RunHistory()
+        run_id = history.save_run(results, filter_id)
+        previous_run_id = history.previous_run(run_id, filter_id)
+        if previous_run_id:
+            run_diff = history.diff_runs(previous_run_id, run_id)
+    except Exception as e:
+        warnings.append(f"⚠️ 保存运行历史失败: {e}")
+
+    # 在内存中生成下载内容，后续重跑直接使用；完整结果以压缩快照归档
+    json_content, csv_content = jira_client.export_results(results)
+    try:
+        jira_client.archive_results(results, filter_id)
+    except Exception as e:
+        warnings.append(f"⚠️ 归档提取结果失败: {e}")
+    file_prefix = f"jira_affects_projects_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    df = results.to_dataframe()
+
+    return {
+        'fingerprint': fingerprint,
+        'filter_id': filter_id,
+        'results': results,
+        'df': df,
+        'project_index': jira_client.get_project_index(),
+        'unique_projects': jira_client.get_unique_projects(),
+        'project_rows': pd.DataFrame(jira_client.get_project_aggregation_rows()),
+        'has_mappings': bool(jira_client.get_project_mappings()),
+        'previous_run_id': previous_run_id,
+        'run_diff': run_diff,
+        'json_content': json_content,
+        'json_name': f"{file_prefix}.json",
+        'csv_content': csv_content,
+        'csv_name': f"{file_prefix}.csv",
+        'warnings': warnings
+    }
+
+# 后台任务函数（在工作线程中运行，不访问 session state）
+def extraction_job(job, base_url, api_token, email, filter_id, field_id, fingerprint, use_warm_cache=True):
+    """提取单个过滤器并生成结果状态，没有数据时返回 None"""
+    job.update(done=0, total=2, message="正在从 Jira 获取数据")
+    # 预热调度器刷新过的默认过滤器直接使用缓存结果
+    warm = get_warm_cache().get_jira(base_url, filter_id, field_id, get_max_age()) if use_warm_cache else None
+    # 预热结果来自服务账号，先确认会话自己的凭证能查看该过滤器
+    if warm and not verify_jira_access(base_url, api_token, email, filter_id, get_max_age()):
+        warm = None
+    if use_warm_cache:
+        get_metrics_registry().record_cache('warm_jira', bool(warm))
+    if warm:
+        jira_client, results, data_as_of = warm
+    else:
+        jira_client = JiraExtractor(base_url, api_token, email)
+        results = jira_client.get_affects_projects_compact(filter_id, field_id)
+        data_as_of = time.time()
+    # 取消后不再写入运行历史和归档
+    job.check_cancelled()
+    if not results:
+        return None
+    job.update(done=1, message=f"正在处理 {len(results)} 个问题")
+    state = build_extraction_state(jira_client, results, fingerprint, filter_id)
+    state['data_as_of'] = data_as_of
+    state['from_warm_cache'] = bool(warm)
+    job.update(done=2, message="完成")
+    return state
+
+def batch_extraction_job(job, base_url, api_token, email, filter_ids, field_id):
+    """并发提取多个过滤器，每个请求完成后汇报进度并检查取消"""
+    def progress(done, total, message):
+        job.update(done=done, total=total, message=message)
+        job.check_cancelled()
+
+    jira_client = JiraExtractor(base_url, api_token, email)
+    return jira_client.get_affects_projects_batch(filter_ids, field_id, progress=progress)
+
+@st.fragment(run_every=1)
+def render_extraction_job(state_key, job_key, label):
+    """
+    轮询后台提取任务，结束后把结果写入 session state 并刷新页面
+
+    只在 session state 中有任务 ID 时挂载；任务结束（或已被清理）后移除任务 ID 并整页重跑，轮询随之停止
+
+    Args:
+        state_key: 结果保存的 session state 键
+        job_key: 任务 ID 保存的 session state 键
+        label: 进度条标题
+    """
+    job = get_job_runner().get(st.session_state.get(job_key))
+    if job is None:
+        st.session_state.pop(job_key, None)
+        st.rerun()
+    if not job.finished:
+        st.progress(job.fraction, text=f"🔄 {label}: {job.message or '等待执行...'}")
+        if st.button("⏹️ 取消", key=f"cancel_{job_key}"):
+            job.cancel()
+        return
+
+    st.session_state.pop(job_key, None)
+    if job.status == Job.SUCCEEDED:
+        if job.result:
+            st.session_state[state_key] = job.result
+            notice = None
+        else:
+            st.session_state.pop(state_key, None)
+            notice = ('info', "📭 没有找到匹配的数据")
+    elif job.status == Job.CANCELLED:
+        notice = ('warning', f"⏹️ {label}已取消")
+    else:
+        notice = ('error', f"❌ {label}失败: {job.error}")
+    st.session_state[f"{job_key}_notice"] = notice
+    st.rerun()
+
+def current_session_id():
+    """当前 Streamlit 会话的 ID（实时数据按会话注册）"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else ""
+
+def session_is_active(session_id):
+    """会话是否仍然存在（不在 Streamlit 服务中运行时视为存在）"""
+    return not streamlit_runtime.exists() or streamlit_runtime.get_instance().is_active_session(session_id)
+
+@st.fragment(run_every=2)
+def render_live_updates(session_id):
+    """检查实时数据版本，收到新的 webhook 事件后刷新页面上的提取结果"""
+    live_store = get_live_store(session_id)
+    extraction = st.session_state.get('jira_extraction')
+    if live_store is None or extraction is None:
+        return
+    st.caption(f"📡 已接收 {live_store.event_count} 个事件，当前 {len(live_store)} 个问题")
+    if live_store.version == extraction.get('live_version'):
+        return
+
+    snapshot = live_store.snapshot()
+    results = snapshot['results']
+    json_content, csv_content = live_store.extractor.export_results(results)
+    extraction.update({
+        'results': results,
+        'df': results.to_dataframe(),
+        'project_index': snapshot['project_index'],
+        'unique_projects': sorted(snapshot['aggregation']['counts']),
+        'project_rows': pd.DataFrame(JiraExtractor.aggregation_rows(snapshot['aggregation'])),
+        'json_content': json_content,
+        'csv_content': csv_content,
+        'live_version': snapshot['version'],
+        'live_events': snapshot['event_count'],
+        'data_as_of': snapshot['updated_at']
+    })
+    st.rerun()
+
+def show_job_notice(job_key):
+    """显示任务结束时留下的提示"""
+    notice = st.session_state.pop(f"{job_key}_notice", None)
+    if notice:
+        getattr(st, notice[0])(notice[1])
+
+@st.fragment
+def render_project_list(extraction):
+    """项目列表、项目详情和按项目下钻（在片段中重跑，选择项目不会重新渲染整个页面）"""
+    st.subheader("📋 去重后的项目列表")
+    unique_projects = extraction['unique_projects']
+
+    if unique_projects:
+        # 显示项目数量
+        st.info(f"📊 共找到 {len(unique_projects)} 个唯一项目")
+
+        # 显示项目映射信息
+        if extraction['has_mappings']:
+            st.info("🔗 已应用项目映射规则，自动添加关联项目")
+
+        # 创建可复制的项目列表
+        projects_text = "\n".join(unique_projects)
+
+        # 显示项目列表
+        st.text_area(
+            "📝 项目列表 (可直接复制)",
+            value=projects_text,
+            height=200,
+            help="点击上方文本框，按Ctrl+A全选，然后复制"
+        )
+
+        # 添加复制按钮
+        if st.button("📋 复制到剪贴板", key="copy_projects"):
+            st.write("📋 项目列表已复制到剪贴板！")
+            st.code(projects_text)
+
+        # 项目详情（按频次排序，一次渲染为表格）
+        st.subheader("🏷️ 项目详情")
+        st.dataframe(
+            extraction['project_rows'],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'project': "项目",
+                'issue_count': "问题数",
+                'first_seen': "首次出现",
+                'last_seen': "最后出现",
+                'source': "来源"
+            }
+        )
+
+        # 按项目下钻查看相关问题（基于倒排索引，无需扫描所有结果）
+        st.subheader("🔎 按项目查看问题")
+        project_index = extraction['project_index']
+        drill_projects = st.multiselect(
+            "选择项目",
+            project_index.list_projects(),
+            key="drilldown_projects",
+            help="按影响问题数量排序；选择多个项目时可切换'同时影响所有项目'"
+        )
+        match_all = st.checkbox("同时影响所有选中项目", key="drilldown_match_all")
+
+        if drill_projects:
+            col1, col2 = st.columns(2)
+            for project in drill_projects:
+                breakdown = project_index.get_status_breakdown(project)
+                col1.metric(f"🏷️ {project}", project_index.get_count(project))
+                col2.caption(f"**{project}** 状态分布: " + ", ".join(f"{s}: {c}" for s, c in sorted(breakdown.items())))
+
+            issue_keys = project_index.filter_issues(drill_projects, match_all=match_all)
+            st.info(f"📊 共 {len(issue_keys)} 个相关问题")
+            if issue_keys:
+                st.dataframe(
+                    extraction['df'].iloc[extraction['results'].positions(issue_keys)],
+                    use_container_width=True,
+                    hide_index=True
+                )
+    else:
+        st.warning("📭 未找到项目信息")
+
+@st.fragment
+def render_archive_history():
+    """历史提取记录（只读取归档索引，选中后才解压对应快照；在片段中重跑，不会重新渲染整个页面）"""
+    with st.expander("📚 历史提取记录"):
+        archive = ResultsArchive()
+        archived_runs = archive.list_runs()
+        if archived_runs:
+            st.dataframe(
+                pd.DataFrame(archived_runs)[['run_id', 'filter_id', 'created_at', 'issue_count', 'project_count', 'bytes']],
+                use_container_width=True,
+                hide_index=True
+            )
+            st.caption(f"共 {len(archived_runs)} 个快照，占用 {archive.total_bytes() / 1024:.1f} KB")
+            selected_run = st.selectbox("选择历史运行", [run['run_id'] for run in archived_runs], key="archived_run")
+            if st.button("📂 加载该运行", key="load_archived_run"):
+                try:
+                    archived_results = archive.load(selected_run)
+                    st.session_state.archived_run_view = (selected_run, archived_results)
+                except Exception as e:
+                    st.error(f"❌ 加载失败: {e}")
+            archived_view = st.session_state.get('archived_run_view')
+            if archived_view and archived_view[0] == selected_run:
+                st.dataframe(pd.DataFrame(archived_view[1]), use_container_width=True, hide_index=True)
+                st.download_button(
+                    "📥 下载该运行 JSON",
+                    json.dumps(archived_view[1], ensure_ascii=False, indent=2),
+                    file_name=f"jira_affects_projects_{selected_run}.json",
+                    mime="application/json",
+                    key="download_archived_run",
+                    on_click="ignore"
+                )
+        else:
+            st.info("📭 暂无归档记录")
+
+@st.fragment
+def render_mapping_editor():
+    """项目映射管理（在片段中重跑，增删改映射不会重新渲染主应用）"""
+    st.header("⚙️ 项目映射管理")
+    st.markdown("管理项目映射规则，当检测到特定项目时自动添加关联项目。")
+    
+    # 加载当前映射
+    current_mappings = load_project_mappings()
+    
+    # 显示当前映射
+    st.subheader("🔗 当前项目映射规则")
+    if current_mappings:
+        for source, targets in current_mappings.items():
+            st.write(f"**{source}** → {', '.join(targets)}")
+    else:
+        st.info("📭 暂无项目映射规则")
+    
+    # 添加新映射
+    st.subheader("➕ 添加新映射规则")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        new_source = st.text_input("源项目名称", key="new_source", help="当检测到该项目时，自动添加关联项目")
+    
+    with col2:
+        new_targets = st.text_input("关联项目", key="new_targets", help="用逗号分隔多个关联项目")
+    
+    if st.button("➕ 添加映射规则", key="add_mapping"):
+        if new_source and new_targets:
+            # 解析关联项目
+            target_list = [t.strip() for t in new_targets.split(',') if t.strip()]
+            
+            # 更新映射
+            current_mappings[new_source] = target_list
+            
+            if save_project_mappings(current_mappings):
+                st.success(f"✅ 已添加映射规则: {new_source} → {', '.join(target_list)}")
+                st.rerun(scope="fragment")
+            else:
+                st.error("❌ 保存映射规则失败")
+        else:
+            st.warning("⚠️ 请填写源项目和关联项目")
+    
+    # 编辑现有映射
+    if current_mappings:
+        st.subheader("✏️ 编辑现有映射")
+        
+        for source, targets in current_mappings.items():
+            with st.expander(f"编辑: {source} → {', '.join(targets)}"):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    edited_source = st.text_input("源项目", value=source, key=f"edit_source_{source}")
+                
+                with col2:
+                    edited_targets = st.text_input("关联项目", value=', '.join(targets), key=f"edit_targets_{source}")
+                
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    if st.button("💾 保存", key=f"save_{source}"):
+                        # 更新映射
+                        new_targets_list = [t.strip() for t in edited_targets.split(',') if t.strip()]
+                        
+                        # 删除旧映射，添加新映射
+                        del current_mappings[source]
+                        current_mappings[edited_source] = new_targets_list
+                        
+                        if save_project_mappings(current_mappings):
+                            st.success("✅ 映射规则已更新")
+                            st.rerun(scope="fragment")
+                        else:
+                            st.error("❌ 更新失败")
+                
+                with col2:
+                    if st.button("🗑️ 删除", key=f"delete_{source}"):
+                        del current_mappings[source]
+                        if save_project_mappings(current_mappings):
+                            st.success(f"✅ 已删除映射规则: {source}")
+                            st.rerun(scope="fragment")
+                        else:
+                            st.error("❌ 删除失败")
+                
+                with col3:
+                    if st.button("🔄 重置", key=f"reset_{source}"):
+                        st.rerun(scope="fragment")
+    
+    # 重置所有映射
+    st.subheader("🔄 重置映射")
+    if st.button("🔄 重置为默认映射", key="reset_all_mappings"):
+        default_mappings = {
+            "aca": ["aca-cn"],
+            "public-api": ["public-api-job"],
+            "back-office": ["back-office-job"],
+            "aims-web": ["aims-web-job"],
+            "lt-external-service": ["lt-external-service-job"]
+        }
+        
+        if save_project_mappings(default_mappings):
+            st.success("✅ 已重置为默认映射规则")
+            st.rerun(scope="fragment")
+        else:
+            st.error("❌ 重置失败")
+    
+    # 显示配置文件
+    with st.expander("📄 项目映射配置文件"):
+        if os.path.exists("config/project_mapping.json"):
+            try:
+                with open("config/project_mapping.json", 'r', encoding='utf-8') as f:
+                    file_content = f.read()
+                    st.text_area("配置文件内容", value=file_content, height=200, disabled=True)
+            except Exception as e:
+                st.error(f"读取配置文件失败: {e}")
+        else:
+            st.warning("⚠️ 项目映射配置文件不存在")
+    
+    # 使用说明
+    with st.expander("📖 项目映射使用说明"):
+        st.markdown("""
+        ### 🔗 项目映射功能：
+        - **自动扩展**: 当检测到特定项目时，自动添加关联项目
+        - **智能匹配**: 支持部分匹配和模糊匹配
+        - **可维护**: 通过界面轻松添加、编辑、删除映射规则
+        
+        ### 📝 映射规则格式：
+        - **源项目**: 在JIRA中检测到的项目名称
+        - **关联项目**: 需要自动添加的项目列表（逗号分隔）
+        
+        ### 💡 使用示例：
+        - 当检测到 `aca` 时，自动添加 `aca-cn`
+        - 当检测到 `public-api` 时，自动添加 `public-api-job`
+        
+        ### 🔧 管理操作：
+        - **添加规则**: 填写源项目和关联项目，点击添加
+        - **编辑规则**: 展开现有规则，修改后保存
+        - **删除规则**: 点击删除按钮移除不需要的规则
+        - **重置规则**: 恢复默认的映射配置
+        
+        ### ⚠️ 注意事项：
+        - 映射规则会实时生效
+        - 修改后需要重新提取数据才能看到效果
+        - 建议在测试环境中验证映射规则
+        """)
+
+@st.fragment
+def render_release_compare(filter_id):
+    """Release 对比（在片段中重跑，选择 release 和计算表达式不会重新渲染主应用）"""
+    st.header("🧮 Release 对比")
+    st.markdown("把每个 release 的影响项目保存为集合，用并集、交集、差集表达式快速回答 release 之间的重叠问题。")
+    
+    release_store = ReleaseStore()
+    
+    # 保存 release
+    st.subheader("➕ 保存 release")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**从当前提取结果保存**")
+        current_extraction = st.session_state.get('jira_extraction')
+        release_name = st.text_input("Release 名称", key="release_name", help="例如 2024-11-R1")
+        if st.button("💾 保存当前提取结果", key="save_release", disabled=not (current_extraction and release_name)):
+            count = release_store.add_release(release_name, current_extraction['unique_projects'], source=f"filter {filter_id}")
+            release_store.save()
+            st.success(f"✅ 已保存 {release_name}（{count} 个项目）")
+    
+    with col2:
+        st.markdown("**从批量提取结果保存**")
+        current_batch = st.session_state.get('jira_batch')
+        if current_batch and current_batch['filter_projects']:
+            st.caption("每个过滤器保存为一个 release，名称为 filter-<ID>")
+            if st.button("💾 保存所有过滤器", key="save_batch_releases"):
+                for batch_filter, projects in current_batch['filter_projects'].items():
+                    release_store.add_release(f"filter-{batch_filter}", projects, source=f"filter {batch_filter}")
+                release_store.save()
+                st.success(f"✅ 已保存 {len(current_batch['filter_projects'])} 个 release")
+        else:
+            st.info("📭 暂无批量提取结果")
+    
+    releases = release_store.list_releases()
+    if releases:
+        st.subheader("📚 已保存的 release")
+        st.dataframe(pd.DataFrame(releases), use_container_width=True, hide_index=True)
+        release_names = [r['release'] for r in releases]
+        
+        # 快速对比
+        st.subheader("⚖️ 快速对比")
+        selected_releases = st.multiselect("选择 release", release_names, key="compare_releases")
+        if len(selected_releases) >= 2:
+            col1, col2 = st.columns(2)
+            col1.text_area(
+                f"🎯 所有选中 release 都涉及 ({len(release_store.intersection(selected_releases))})",
+                value="\n".join(release_store.intersection(selected_releases)),
+                height=150
+            )
+            col2.text_area(
+                f"🔗 任一选中 release 涉及 ({len(release_store.union(selected_releases))})",
+                value="\n".join(release_store.union(selected_releases)),
+                height=150
+            )
+            if len(selected_releases) == 2:
+                left, right = selected_releases
+                col1, col2 = st.columns(2)
+                col1.text_area(f"仅在 {left}", value="\n".join(release_store.difference(left, right)), height=150)
+                col2.text_area(f"仅在 {right}", value="\n".join(release_store.difference(right, left)), height=150)
+        
+        # 表达式计算
+        st.subheader("🧮 集合表达式")
+        expression = st.text_input(
+            "表达式",
+            key="release_expression",
+            help="运算符: | 并集, & 交集, - 差集, ^ 对称差，支持括号；已有的 release 名称按全名匹配，如 2024-11-R1-hot 表示 2024-11-R1 - hot；名称含特殊字符时也可用反引号括起来"
+        )
+        if expression:
+            try:
+                expression_result = release_store.evaluate(expression)
+                st.info(f"📊 结果: {len(expression_result)} 个项目")
+                st.text_area("结果项目", value="\n".join(expression_result), height=200)
+            except ReleaseExpressionError as e:
+                st.error(f"❌ {e}")
+        
+        # 删除 release
+        with st.expander("🗑️ 删除 release"):
+            release_to_delete = st.selectbox("选择要删除的 release", release_names, key="release_to_delete")
+            if st.button("🗑️ 删除", key="delete_release"):
+                release_store.remove_release(release_to_delete)
+                release_store.save()
+                st.success(f"✅ 已删除 {release_to_delete}")
+                st.rerun(scope="fragment")
+    else:
+        st.info("📭 暂无已保存的 release")
+
 st.title("📊 Jira Affects Project 提取工具")
 st.markdown("输入你的配置并点击按钮，即可一键提取影响的项目列表并下载。")
 
 # 创建标签页
-tab1, tab2 = st.tabs(["🚀 主应用", "⚙️ 项目映射管理"])
+tab1, tab2, tab3 = st.tabs(["🚀 主应用", "⚙️ 项目映射管理", "🧮 Release 对比"])
 
 with tab1:
     # 侧边栏配置
@@ -259,102 +797,202 @@ with tab1:
                 st.error(f"❌ 检测失败: {str(e)}")
                 st.info("💡 提示：请检查API Token、邮箱和过滤器ID是否正确")
 
+    # 当前输入对应的指纹，用于判断缓存的提取结果是否仍然有效
+    current_field_id = field_id or st.session_state.get('detected_field_id', '')
+    current_fingerprint = extraction_fingerprint(base_url, api_token, email, filter_id, current_field_id)
+
+    # 预热缓存中有当前过滤器的结果时，允许用户选择直接使用
+    warm_entry = get_warm_cache().get_jira(base_url, filter_id, current_field_id, get_max_age())
+    if warm_entry:
+        warm_time = datetime.fromtimestamp(warm_entry[2]).strftime('%H:%M:%S')
+        st.checkbox(f"⚡ 使用预热缓存（数据时间 {warm_time}）", value=True, key="use_warm_cache")
+
     # 提取数据
     if run_button:
-        # 确定使用的字段ID
-        current_field_id = field_id or st.session_state.get('detected_field_id', '')
-        
         if api_token == "your_api_token_here":
             st.error("❌ 请先输入有效的API Token")
         elif not current_field_id:
             st.error("❌ 请先输入或检测 Affects Project 字段 ID")
             st.info("💡 提示：点击'自动检测字段ID'按钮，或手动输入字段ID")
         else:
-            try:
-                jira_client = JiraExtractor(base_url, api_token, email)
-                
-                with st.spinner("🔄 正在从 Jira 获取数据..."):
-                    results = jira_client.get_affects_projects(filter_id, current_field_id)
-
-                if results:
-                    st.success(f"✅ 成功提取 {len(results)} 个问题！")
-                    
-                    # 数据预览
-                    st.subheader("🔍 获取的数据预览")
-                    df = pd.DataFrame(results)
-                    st.dataframe(df.head(50), use_container_width=True)
-                    
-                    # 项目去重和展示
-                    st.subheader("📋 去重后的项目列表")
-                    
-                    # 收集所有项目
-                    all_projects = []
-                    for result in results:
-                        projects = result.get('affects_projects', [])
-                        if isinstance(projects, list):
-                            all_projects.extend(projects)
-                        elif isinstance(projects, str) and projects.strip():
-                            all_projects.extend([p.strip() for p in projects.split(',') if p.strip()])
-                    
-                    # 去重并排序
-                    unique_projects = sorted(list(set([p.strip() for p in all_projects if p.strip() and p.strip().upper() != "NA"])))
-                    
-                    if unique_projects:
-                        # 显示项目数量
-                        st.info(f"📊 共找到 {len(unique_projects)} 个唯一项目")
-                        
-                        # 显示项目映射信息
-                        current_mappings = jira_client.get_project_mappings()
-                        if current_mappings:
-                            st.info("🔗 已应用项目映射规则，自动添加关联项目")
-                        
-                        # 创建可复制的项目列表
-                        projects_text = "\n".join(unique_projects)
-                        
-                        # 显示项目列表
-                        st.text_area(
-                            "📝 项目列表 (可直接复制)",
-                            value=projects_text,
-                            height=200,
-                            help="点击上方文本框，按Ctrl+A全选，然后复制"
-                        )
-                        
-                        # 添加复制按钮
-                        if st.button("📋 复制到剪贴板", key="copy_projects"):
-                            st.write("📋 项目列表已复制到剪贴板！")
-                            st.code(projects_text)
-                        
-                        # 显示每个项目
-                        st.subheader("🏷️ 项目详情")
-                        for i, project in enumerate(unique_projects, 1):
-                            st.write(f"{i}. **{project}**")
-                    else:
-                        st.warning("📭 未找到项目信息")
-                    
-                    # 下载功能
-                    json_path, csv_path = jira_client.save_results_to_file(results)
-                    
-                    st.subheader("💾 下载数据")
-                    col1, col2 = st.columns(2)
-                    with open(json_path, "r", encoding="utf-8") as f:
-                        col1.download_button(
-                            "📥 下载 JSON", 
-                            f.read(), 
-                            file_name=os.path.basename(json_path), 
-                            mime="application/json"
-                        )
-                    with open(csv_path, "r", encoding="utf-8") as f:
-                        col2.download_button(
-                            "📎 下载 CSV", 
-                            f.read(), 
-                            file_name=os.path.basename(csv_path), 
-                            mime="text/csv"
-                        )
-                else:
-                    st.info("📭 没有找到匹配的数据")
-                    
-            except Exception as e:
-                st.error(f"❌ 提取失败: {str(e)}")
+            # 提交后台任务，页面轮询进度，提取期间可以切换标签或继续操作
+            previous_job = get_job_runner().get(st.session_state.get('extraction_job_id'))
+            if previous_job and not previous_job.finished:
+                previous_job.cancel()
+            job = get_job_runner().submit(
+                'jira_extract', extraction_job,
+                base_url, api_token, email, filter_id, current_field_id, current_fingerprint,
+                use_warm_cache=st.session_state.get('use_warm_cache', True),
+                description=f"过滤器 {filter_id}"
+            )
+            st.session_state.extraction_job_id = job.job_id
+
+    if 'extraction_job_id' in st.session_state:
+        render_extraction_job('jira_extraction', 'extraction_job_id', "提取")
+    show_job_notice('extraction_job_id')
+
+    # 显示提取结果（从 session state 读取，按钮触发的重跑不会重新请求 Jira）
+    extraction = st.session_state.get('jira_extraction')
+    if extraction and extraction['fingerprint'] != current_fingerprint:
+        st.info("💡 配置已变更，下方为上次提取的结果，点击'开始提取数据'可刷新")
+    if extraction:
+        results = extraction['results']
+        for warning in extraction.get('warnings', []):
+            st.warning(warning)
+        st.success(f"✅ 成功提取 {len(results)} 个问题！")
+        if extraction.get('data_as_of'):
+            if extraction.get('live_events'):
+                source = f"Jira + {extraction['live_events']} 个 webhook 事件"
+            else:
+                source = "预热缓存" if extraction.get('from_warm_cache') else "Jira"
+            st.caption(f"🕒 数据时间: {datetime.fromtimestamp(extraction['data_as_of']).strftime('%Y-%m-%d %H:%M:%S')}（来源: {source}）")
+        
+        # Jira webhook 实时更新：事件只重新解析对应问题，不重新查询过滤器
+        with st.expander("📡 实时更新（Jira Webhook）"):
+            live_enabled = st.checkbox("启用 webhook 实时更新", key="live_updates")
+            webhook_port = st.number_input("监听端口", min_value=1024, max_value=65535, value=DEFAULT_WEBHOOK_PORT, key="webhook_port")
+            # 实时数据按会话 ID 注册：重新提取时替换本会话的上一份，关闭实时更新时注销，已结束会话的数据随之清理
+            session_id = current_session_id()
+            prune_live_stores(session_is_active)
+            if live_enabled:
+                # 每次新的提取结果使用新的标识，重新初始化实时数据
+                live_key = extraction.setdefault('live_key', f"{extraction['fingerprint']}:{time.time()}")
+                if st.session_state.get('registered_live_key') != live_key or get_live_store(session_id) is None:
+                    live_store = LiveIssueStore(JiraExtractor(base_url, api_token, email), current_field_id,
+                                                filter_id=extraction.get('filter_id', filter_id))
+                    live_store.seed(results)
+                    set_live_store(live_store, session_id)
+                    extraction['live_version'] = live_store.version
+                    st.session_state.registered_live_key = live_key
+            elif st.session_state.pop('registered_live_key', None):
+                set_live_store(None, session_id)
+                try:
+                    receiver = start_webhook_receiver(int(webhook_port), os.environ.get('JIRA_WEBHOOK_HOST', '127.0.0.1'))
+                    st.caption(f"在 Jira webhook 中配置 `http://<本机地址>:{receiver.port}/webhook?filter={extraction.get('filter_id', filter_id)}`，"
+                               f"JQL 与过滤器一致")
+                    render_live_updates(session_id)
+                except OSError as e:
+                    st.error(f"❌ 启动 webhook 接收器失败: {e}")
+        
+        # 数据预览
+        st.subheader("🔍 获取的数据预览")
+        st.dataframe(extraction['df'].head(50), use_container_width=True)
+        
+        render_project_list(extraction)
+        
+        # 与上一次提取的对比
+        run_diff = extraction['run_diff']
+        if run_diff:
+            st.subheader("🔁 与上次提取对比")
+            st.caption(f"上次运行: {extraction['previous_run_id']}")
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("🆕 新增问题", len(run_diff['added']))
+            col2.metric("🗑️ 移除问题", len(run_diff['removed']))
+            col3.metric("🔄 状态变化", len(run_diff['status_changed']))
+            col4.metric("🏷️ 新影响项目", len(run_diff['new_projects']))
+            
+            if run_diff['new_projects']:
+                st.success("🏷️ 新影响的项目: " + ", ".join(run_diff['new_projects']))
+            if run_diff['dropped_projects']:
+                st.warning("📤 不再影响的项目: " + ", ".join(run_diff['dropped_projects']))
+            with st.expander("查看问题级变化"):
+                if run_diff['added']:
+                    st.markdown("**新增问题:** " + ", ".join(run_diff['added']))
+                if run_diff['removed']:
+                    st.markdown("**移除问题:** " + ", ".join(run_diff['removed']))
+                for issue_key, (old_status, new_status) in run_diff['status_changed'].items():
+                    st.markdown(f"**{issue_key}** 状态: `{old_status}` → `{new_status}`")
+                for issue_key, change in run_diff['projects_changed'].items():
+                    st.markdown(
+                        f"**{issue_key}** 项目: +{', '.join(change['added']) or '-'} / -{', '.join(change['removed']) or '-'}"
+                    )
+        
+        # 下载功能
+        st.subheader("💾 下载数据")
+        col1, col2 = st.columns(2)
+        col1.download_button(
+            "📥 下载 JSON", 
+            extraction['json_content'], 
+            file_name=extraction['json_name'], 
+            mime="application/json",
+            on_click="ignore"
+        )
+        col2.download_button(
+            "📎 下载 CSV", 
+            extraction['csv_content'], 
+            file_name=extraction['csv_name'], 
+            mime="text/csv",
+            on_click="ignore"
+        )
+
+    # 多过滤器批量提取
+    st.subheader("📦 多过滤器批量提取")
+    batch_filters_text = st.text_input(
+        "过滤器 ID 列表",
+        value=filter_id,
+        help="多个过滤器用逗号分隔，将并发查询，同时出现在多个过滤器中的问题只获取一次",
+        key="batch_filter_ids"
+    )
+    batch_filter_ids = [f.strip() for f in batch_filters_text.split(',') if f.strip()]
+    batch_button = st.button(
+        "🚀 批量提取",
+        key="run_batch",
+        use_container_width=True,
+        disabled=not batch_filter_ids or not current_field_id
+    )
+    
+    if batch_button:
+        if api_token == "your_api_token_here":
+            st.error("❌ 请先输入有效的API Token")
+        else:
+            previous_job = get_job_runner().get(st.session_state.get('batch_job_id'))
+            if previous_job and not previous_job.finished:
+                previous_job.cancel()
+            job = get_job_runner().submit(
+                'jira_batch', batch_extraction_job,
+                base_url, api_token, email, batch_filter_ids, current_field_id,
+                description=f"{len(batch_filter_ids)} 个过滤器"
+            )
+            st.session_state.batch_job_id = job.job_id
+    
+    if 'batch_job_id' in st.session_state:
+        render_extraction_job('jira_batch', 'batch_job_id', "批量提取")
+    show_job_notice('batch_job_id')
+    
+    batch = st.session_state.get('jira_batch')
+    if batch:
+        st.success(f"✅ 共 {len(batch['filters'])} 个过滤器，{len(batch['results'])} 个唯一问题")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    'filter_id': batch_filter,
+                    'issue_count': len(keys),
+                    'project_count': len(batch['filter_projects'][batch_filter]),
+                    'projects': ", ".join(batch['filter_projects'][batch_filter])
+                }
+                for batch_filter, keys in batch['filters'].items()
+            ]),
+            use_container_width=True,
+            hide_index=True
+        )
+        for batch_filter, error in batch['failed'].items():
+            st.error(f"**{batch_filter}**: {error}")
+        
+        col1, col2 = st.columns(2)
+        col1.text_area(
+            f"🔗 并集 ({len(batch['union_projects'])} 个项目)",
+            value="\n".join(batch['union_projects']),
+            height=200,
+            key="batch_union"
+        )
+        col2.text_area(
+            f"🎯 交集 ({len(batch['intersection_projects'])} 个项目)",
+            value="\n".join(batch['intersection_projects']),
+            height=200,
+            key="batch_intersection"
+        )
+
+    render_archive_history()
 
     # 使用说明
     with st.expander("📖 详细使用说明"):
@@ -442,143 +1080,10 @@ with tab1:
             st.rerun()
 
 with tab2:
-    st.header("⚙️ 项目映射管理")
-    st.markdown("管理项目映射规则，当检测到特定项目时自动添加关联项目。")
-    
-    # 加载当前映射
-    current_mappings = load_project_mappings()
-    
-    # 显示当前映射
-    st.subheader("🔗 当前项目映射规则")
-    if current_mappings:
-        for source, targets in current_mappings.items():
-            st.write(f"**{source}** → {', '.join(targets)}")
-    else:
-        st.info("📭 暂无项目映射规则")
-    
-    # 添加新映射
-    st.subheader("➕ 添加新映射规则")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        new_source = st.text_input("源项目名称", key="new_source", help="当检测到该项目时，自动添加关联项目")
-    
-    with col2:
-        new_targets = st.text_input("关联项目", key="new_targets", help="用逗号分隔多个关联项目")
-    
-    if st.button("➕ 添加映射规则", key="add_mapping"):
-        if new_source and new_targets:
-            # 解析关联项目
-            target_list = [t.strip() for t in new_targets.split(',') if t.strip()]
-            
-            # 更新映射
-            current_mappings[new_source] = target_list
-            
-            if save_project_mappings(current_mappings):
-                st.success(f"✅ 已添加映射规则: {new_source} → {', '.join(target_list)}")
-                st.rerun()
-            else:
-                st.error("❌ 保存映射规则失败")
-        else:
-            st.warning("⚠️ 请填写源项目和关联项目")
-    
-    # 编辑现有映射
-    if current_mappings:
-        st.subheader("✏️ 编辑现有映射")
-        
-        for source, targets in current_mappings.items():
-            with st.expander(f"编辑: {source} → {', '.join(targets)}"):
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    edited_source = st.text_input("源项目", value=source, key=f"edit_source_{source}")
-                
-                with col2:
-                    edited_targets = st.text_input("关联项目", value=', '.join(targets), key=f"edit_targets_{source}")
-                
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    if st.button("💾 保存", key=f"save_{source}"):
-                        # 更新映射
-                        new_targets_list = [t.strip() for t in edited_targets.split(',') if t.strip()]
-                        
-                        # 删除旧映射，添加新映射
-                        del current_mappings[source]
-                        current_mappings[edited_source] = new_targets_list
-                        
-                        if save_project_mappings(current_mappings):
-                            st.success("✅ 映射规则已更新")
-                            st.rerun()
-                        else:
-                            st.error("❌ 更新失败")
-                
-                with col2:
-                    if st.button("🗑️ 删除", key=f"delete_{source}"):
-                        del current_mappings[source]
-                        if save_project_mappings(current_mappings):
-                            st.success(f"✅ 已删除映射规则: {source}")
-                            st.rerun()
-                        else:
-                            st.error("❌ 删除失败")
-                
-                with col3:
-                    if st.button("🔄 重置", key=f"reset_{source}"):
-                        st.rerun()
-    
-    # 重置所有映射
-    st.subheader("🔄 重置映射")
-    if st.button("🔄 重置为默认映射", key="reset_all_mappings"):
-        default_mappings = {
-            "aca": ["aca-cn"],
-            "public-api": ["public-api-job"],
-            "back-office": ["back-office-job"],
-            "aims-web": ["aims-web-job"],
-            "lt-external-service": ["lt-external-service-job"]
-        }
-        
-        if save_project_mappings(default_mappings):
-            st.success("✅ 已重置为默认映射规则")
-            st.rerun()
-        else:
-            st.error("❌ 重置失败")
-    
-    # 显示配置文件
-    with st.expander("📄 项目映射配置文件"):
-        if os.path.exists("config/project_mapping.json"):
-            try:
-                with open("config/project_mapping.json", 'r', encoding='utf-8') as f:
-                    file_content = f.read()
-                    st.text_area("配置文件内容", value=file_content, height=200, disabled=True)
-            except Exception as e:
-                st.error(f"读取配置文件失败: {e}")
-        else:
-            st.warning("⚠️ 项目映射配置文件不存在")
-    
-    # 使用说明
-    with st.expander("📖 项目映射使用说明"):
-        st.markdown("""
-        ### 🔗 项目映射功能：
-        - **自动扩展**: 当检测到特定项目时，自动添加关联项目
-        - **智能匹配**: 支持部分匹配和模糊匹配
-        - **可维护**: 通过界面轻松添加、编辑、删除映射规则
-        
-        ### 📝 映射规则格式：
-        - **源项目**: 在JIRA中检测到的项目名称
-        - **关联项目**: 需要自动添加的项目列表（逗号分隔）
-        
-        ### 💡 使用示例：
-        - 当检测到 `aca` 时，自动添加 `aca-cn`
-        - 当检测到 `public-api` 时，自动添加 `public-api-job`
-        
-        ### 🔧 管理操作：
-        - **添加规则**: 填写源项目和关联项目，点击添加
-        - **编辑规则**: 展开现有规则，修改后保存
-        - **删除规则**: 点击删除按钮移除不需要的规则
-        - **重置规则**: 恢复默认的映射配置
-        
-        ### ⚠️ 注意事项：
-        - 映射规则会实时生效
-        - 修改后需要重新提取数据才能看到效果
-        - 建议在测试环境中验证映射规则
-        """)
+    render_mapping_editor()
+
+with tab3:
+    render_release_compare(filter_id)
+
+render_diagnostics_panel('jira')
+get_metrics_registry().observe('stage_duration_seconds', time.perf_counter() - render_started, client='jira', stage='render')
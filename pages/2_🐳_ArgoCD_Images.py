@@ -3,16 +3,34 @@ ArgoCD 镜像查询 Streamlit 页面
 """
 
 import streamlit as st
-import pandas as pd
 import json
 import sys
 import os
+import itertools
+import logging
+import sqlite3
+import time
 from datetime import datetime
 
 # 添加 modules 路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from modules.argocd_client import ArgoCDClient
+from modules.argocd_client import ArgoCDClient, load_cli_token
+from modules.lazy_import import lazy_module
+from modules.circuit_breaker import get_circuit_breaker
+from modules.service_catalog import get_service_catalog
+from modules.job_runner import Job, get_job_runner
+from modules.diagnostics_ui import render_diagnostics_panel
+from modules.metrics import get_metrics_registry
+from modules.snapshot_store import get_snapshot_store
+from modules.prewarm import get_max_age, get_warm_cache, start_prewarm_scheduler
+from modules.release_pipeline import ReleaseReadinessPipeline, collect_projects, load_service_mappings, save_service_mappings, map_projects_to_services
+
+# pandas / numpy 在第一次展示或对比结果时才导入，打开页面不承担这部分开销
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+
+logger = logging.getLogger(__name__)
 
 # 页面配置
 st.set_page_config(
@@ -21,6 +39,12 @@ st.set_page_config(
     layout="wide"
 )
 
+# 页面脚本整体运行耗时计入 render 阶段
+render_started = time.perf_counter()
+
+# 按配置启动预热调度器（未启用时不做任何事）
+start_prewarm_scheduler()
+
 # 配置文件路径
 CONFIG_FILE = "config/argocd_config.json"
 
@@ -65,58 +89,247 @@ def save_config(config):
         return False
 
 
+# 后台查询任务
+def query_services_job(job, client, services_list, unresolved_services, use_warm_cache=True):
+    """
+    在后台线程中并发查询服务镜像（不访问 session state）
+    
+    Args:
+        job: 后台任务，用于汇报进度和响应取消
+        client: ArgoCDClient 实例
+        services_list: 要查询的服务列表
+        unresolved_services: 本地校验未通过的服务 {service: error_msg}
+        use_warm_cache: 是否使用预热调度器缓存的结果
+        
+    Returns:
+        {'success': {...}, 'failed': {...}, 'details': [...]}，取消时为已完成部分
+    """
+    environment = client.environment
+    results = {
+        'success': {},
+        'failed': {},
+        'details': [],
+        'environment': environment,
+        'service_count': len(services_list)
+    }
+    job.result = results
+    job.update(done=0, total=len(services_list), message="正在查询")
+    
+    # 本地校验未通过的服务直接记为失败，不发送请求
+    for service, error_msg in unresolved_services.items():
+        results['failed'][service] = error_msg
+        results['details'].append({
+            'service': service,
+            'version': 'N/A',
+            'status': f'❌ {error_msg[:50]}...' if len(error_msg) > 50 else f'❌ {error_msg}',
+            'environment': environment.upper(),
+            'latency_ms': None
+        })
+    
+    # 预热缓存中的服务直接使用缓存结果，数据时间取其中最早的一个
+    warm = get_warm_cache().get_images(environment, services_list, get_max_age()) if use_warm_cache else {}
+    # 预热结果来自服务账号，先确认会话自己的 Token 可用（预检结果按服务器和 Token 缓存）
+    if warm and not client.preflight()[0]:
+        warm = {}
+    if use_warm_cache:
+        get_metrics_registry().record_cache('warm_images', True, len(warm))
+        get_metrics_registry().record_cache('warm_images', False, len(services_list) - len(warm))
+    results['data_as_of'] = min((fetched_at for _, fetched_at in warm.values()), default=None)
+    results['warm_services'] = len(warm)
+    cached_items = [{'service': service, 'images': images, 'error': None, 'elapsed': None}
+                    for service, (images, _) in warm.items()]
+    
+    # 并发查询其余服务：按完成顺序追加到 details（页面在查询期间即可显示已完成的行），
+    # 取消时迭代器在 0.2 秒内放弃其余请求，不必等待正在超时的请求
+    items = client.iter_service_images(
+        [service for service in services_list if service not in warm],
+        stop=lambda: job.cancelled
+    )
+    for i, item in enumerate(itertools.chain(cached_items, items), start=1):
+        service = item['service']
+        latency_ms = round(item['elapsed'] * 1000) if item['elapsed'] is not None else None
+        
+        if item['error'] is None:
+            images = item['images']
+            results['success'].update(images)
+            
+            # 记录详细信息
+            for svc, tag in images.items():
+                results['details'].append({
+                    'service': svc,
+                    'version': tag,
+                    'status': '✅ 成功',
+                    'environment': environment.upper(),
+                    'latency_ms': latency_ms
+                })
+        else:
+            error_msg = item['error']
+            results['failed'][service] = error_msg
+            results['details'].append({
+                'service': service,
+                'version': 'N/A',
+                'status': f'❌ {error_msg[:50]}...' if len(error_msg) > 50 else f'❌ {error_msg}',
+                'environment': environment.upper(),
+                'latency_ms': latency_ms
+            })
+        job.update(done=i, message=f"已完成: {service}")
+        
+        if job.cancelled:
+            # 关闭迭代器会丢弃尚未开始的请求
+            items.close()
+            break
+    
+    # 完整的查询记录到部署快照库，并取本环境上一次记录作为对比基线（取消的部分结果不记录）
+    if not job.cancelled:
+        record_snapshot(environment, services_list, results)
+    
+    return results
+
+
+def record_snapshot(environment, services_list, results):
+    """
+    记录查询结果并取上一次快照作为对比基线（写入 results['baseline']，只保留本次查询涉及的服务）
+    
+    快照库不可用时只记录日志，不影响查询结果
+    """
+    try:
+        store = get_snapshot_store()
+        query_id = store.record_query(environment, results)
+        baseline = store.previous_results(environment, before_query_id=query_id)
+    except sqlite3.Error as e:
+        logger.warning(f"记录部署快照失败: {e}")
+        return
+    if baseline:
+        queried = set(services_list) | set(results['success']) | set(results['failed'])
+        results['baseline'] = {
+            'success': {service: tag for service, tag in baseline['success'].items() if service in queried},
+            'queried_at': baseline['queried_at']
+        }
+
+
+def history_job(job, client, services, max_entries):
+    """
+    在后台线程中获取服务的部署历史时间线（每个 revision 的镜像在进程内缓存）
+    
+    Returns:
+        {service: timeline 或 {'error': error_msg}}
+    """
+    histories = {}
+    job.update(done=0, total=len(services), message="正在获取部署历史")
+    for i, service in enumerate(services, start=1):
+        job.check_cancelled()
+        try:
+            histories[service] = client.get_service_history(service, max_entries=max_entries)
+        except Exception as e:
+            histories[service] = {'error': str(e)}
+        job.update(done=i, message=f"已完成: {service}")
+    return histories
+
+
+def readiness_job(job, tokens, environments, mappings, projects):
+    """在后台线程中执行发布就绪检查，每个请求完成后汇报进度并检查取消"""
+    def progress(done, total, message):
+        job.update(done=done, total=total, message=message)
+        job.check_cancelled()
+
+    pipeline = ReleaseReadinessPipeline(tokens, environments, mappings)
+    return pipeline.run(projects, progress=progress)
+
+
 # 对比功能函数
+# 各对比状态的行样式（未变化的行不加样式）
+COMPARISON_STYLES = {
+    'added': 'background-color: #d4edda; color: #155724',    # 绿色 - 新增
+    'updated': 'background-color: #fff3cd; color: #856404',  # 黄色 - 更新
+    'removed': 'background-color: #f8d7da; color: #721c24'   # 红色 - 移除
+}
+
+
 def compare_results(current_results, previous_results):
-    """对比当前结果与上次结果"""
+    """
+    对比当前结果与上次结果（按服务名合并两次结果，一次性算出每个服务的状态）
+    
+    Returns:
+        {'table': DataFrame[service, previous, current, status], 'counts': {status: 数量}}，
+        status 为 added / updated / unchanged / removed；没有上次结果时返回 None
+    """
     if not previous_results or 'success' not in previous_results:
         return None
     
-    comparison = {
-        "added": {},      # 新增的服务
-        "updated": {},    # 更新的服务（镜像标签变化）
-        "unchanged": {},  # 未变化的服务
-        "removed": {}     # 移除的服务
-    }
+    current = pd.DataFrame(list(current_results.get('success', {}).items()), columns=['service', 'current'])
+    previous = pd.DataFrame(list(previous_results.get('success', {}).items()), columns=['service', 'previous'])
+    table = previous.merge(current, on='service', how='outer')
     
-    current_services = current_results.get('success', {})
-    previous_services = previous_results.get('success', {})
+    # 空标签与缺失同样视为没有该服务
+    has_current = table['current'].fillna('').astype(bool)
+    has_previous = table['previous'].fillna('').astype(bool)
+    both = has_current & has_previous
+    table['status'] = np.select(
+        [both & (table['current'] != table['previous']), both, has_current, has_previous],
+        ['updated', 'unchanged', 'added', 'removed'],
+        default=''
+    )
+    table = table[table['status'] != ''].sort_values('service', ignore_index=True)
     
-    # 对比逻辑
-    all_services = set(current_services.keys()) | set(previous_services.keys())
+    counts = table['status'].value_counts()
+    return {
+        'table': table,
+        'counts': {status: int(counts.get(status, 0)) for status in ('added', 'updated', 'unchanged', 'removed')}
+    }
+
+
+def highlight_comparison(df, comparison):
+    """
+    按对比状态列生成整个表格的样式（供 Styler.apply(axis=None) 一次性调用）
     
-    for service in all_services:
-        current_version = current_services.get(service)
-        previous_version = previous_services.get(service)
+    Args:
+        df: 详细结果表格（含 service 列）
+        comparison: compare_results() 的返回值
         
-        if current_version and previous_version:
-            if current_version != previous_version:
-                comparison["updated"][service] = {
-                    "previous": previous_version,
-                    "current": current_version
-                }
-            else:
-                comparison["unchanged"][service] = current_version
-        elif current_version and not previous_version:
-            comparison["added"][service] = current_version
-        elif not current_version and previous_version:
-            comparison["removed"][service] = previous_version
-    
-    return comparison
+    Returns:
+        与 df 形状相同的样式 DataFrame
+    """
+    status = comparison['table'].set_index('service')['status']
+    row_styles = df['service'].map(status).map(COMPARISON_STYLES).fillna('').to_numpy()
+    return pd.DataFrame(np.repeat(row_styles[:, None], len(df.columns), axis=1), index=df.index, columns=df.columns)
+
+
+# 超过该行数的结果表不再逐格着色（Styler 每次重跑都要重新计算样式），只依靠“变化”列区分
+MAX_STYLED_ROWS = 2000
+
+CHANGE_LABELS = {'added': '🆕 新增', 'updated': '🔄 更新', 'removed': '🗑️ 移除', 'unchanged': ''}
 
 
-def highlight_comparison(row, comparison):
-    """为 DataFrame 行添加高亮样式"""
-    service_name = row['service']
+def build_query_view(results, comparison, query_time):
+    """
+    一次性生成结果区域需要的派生数据（表格、样式、导出内容），保存在 session state 中，
+    之后的重跑只读取，不再重新构建 DataFrame 和导出内容
     
-    if comparison:
-        if service_name in comparison.get('added', {}):
-            return ['background-color: #d4edda; color: #155724'] * len(row)  # 绿色 - 新增
-        elif service_name in comparison.get('updated', {}):
-            return ['background-color: #fff3cd; color: #856404'] * len(row)  # 黄色 - 更新
-        elif service_name in comparison.get('removed', {}):
-            return ['background-color: #f8d7da; color: #721c24'] * len(row)  # 红色 - 移除
+    Returns:
+        {'df', 'styled', 'csv', 'json', 'timestamp'}
+    """
+    df = pd.DataFrame(results['details'])
+    if comparison and not df.empty:
+        status = comparison['table'].set_index('service')['status']
+        df['change'] = df['service'].map(status).map(CHANGE_LABELS).fillna('')
+    styled = None
+    if comparison and not df.empty and len(df) <= MAX_STYLED_ROWS:
+        styled = df.style.apply(highlight_comparison, comparison=comparison, axis=None)
     
-    return [''] * len(row)  # 无变化
+    environment = results.get('environment', '')
+    json_data = {
+        "environment": environment.upper(),
+        "query_time": query_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results['success'],
+        "failed": results['failed']
+    }
+    return {
+        'df': df,
+        'styled': styled,
+        'csv': df.to_csv(index=False, encoding='utf-8-sig'),
+        'json': json.dumps(json_data, ensure_ascii=False, indent=2),
+        'timestamp': query_time.strftime("%Y%m%d_%H%M%S")
+    }
 
 
 # 初始化 session state
@@ -159,60 +372,23 @@ ArgoCD 服务器位于公司内网。如果在线版本无法访问，请使用
 st.markdown("---")
 
 
-# 侧边栏配置
-with st.sidebar:
-    st.header("⚙️ 配置设置")
-    
-    # 环境选择
-    st.subheader("🌍 环境配置")
-    environment = st.selectbox(
-        "选择环境",
-        ArgoCDClient.list_environments(),
-        index=ArgoCDClient.list_environments().index(st.session_state.argocd_config.get('environment', 'preprod')),
-        key="environment_select"
-    )
-    
-    # 显示环境信息
-    env_config = ArgoCDClient.get_environment_config(environment)
-    if env_config:
-        st.info(f"🔗 服务器: {env_config['server']}")
-    
+# 尝试从本地 ArgoCD CLI 配置读取 token（配置按文件修改时间缓存，不会每次重跑都重新解析）
+def try_load_token_from_cli(target_environment, fallback_first=True):
+    """尝试从 ArgoCD CLI 配置文件读取 token"""
+    return load_cli_token(target_environment, fallback_first=fallback_first)
+
+
+@st.fragment
+def render_auth_settings(environment):
+    """
+    侧边栏认证设置（局部重跑：输入 Token、检查连通性只重跑这一部分，
+    调整服务列表等其他操作时这里只命中缓存的 CLI 配置和 Token 解码结果）
+    """
     # Token 输入
     st.subheader("🔐 认证设置")
     
-    # 尝试从本地 ArgoCD CLI 配置读取 token
-    def try_load_token_from_cli():
-        """尝试从 ArgoCD CLI 配置文件读取 token"""
-        try:
-            import platform
-            home_dir = os.path.expanduser("~")
-            
-            # ArgoCD CLI 配置文件路径
-            if platform.system() == "Windows":
-                config_path = os.path.join(home_dir, ".argocd", "config")
-            else:
-                config_path = os.path.join(home_dir, ".argocd", "config")
-            
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    import yaml
-                    config = yaml.safe_load(f)
-                    
-                    # 尝试找到当前环境的 token
-                    contexts = config.get('contexts', [])
-                    for context in contexts:
-                        if environment in context.get('server', ''):
-                            return context.get('user', {}).get('auth-token', '')
-                    
-                    # 如果没有找到特定环境，返回第一个 token
-                    if contexts and 'user' in contexts[0]:
-                        return contexts[0].get('user', {}).get('auth-token', '')
-        except Exception:
-            pass
-        return None
-    
     # 尝试自动加载 token
-    auto_token = try_load_token_from_cli()
+    auto_token = try_load_token_from_cli(environment)
     
     if auto_token and not st.session_state.get('user_entered_token', False):
         st.success("✅ 已从 ArgoCD CLI 配置自动加载 Token")
@@ -232,7 +408,7 @@ with st.sidebar:
         try:
             client = ArgoCDClient(environment, token)
             is_valid, message = client.validate_token()
-            
+    
             if is_valid:
                 st.success(f"✅ {message}")
             else:
@@ -240,6 +416,14 @@ with st.sidebar:
                 st.info("💡 如需获取新 Token，请访问 ArgoCD Web 界面")
         except Exception as e:
             st.error(f"❌ Token 验证失败: {str(e)}")
+    
+        # 服务器连通性：熔断器打开时提示，查询会立即失败而不是逐个等待超时
+        breaker = get_circuit_breaker(ArgoCDClient.get_environment_config(environment)['server']).snapshot()
+        if breaker['state'] != 'closed':
+            st.warning(f"🔌 服务器暂时不可达，{breaker['retry_in']:.0f} 秒后自动重试: {breaker['last_error'][:100]}")
+        if st.button("🔌 检查连通性", key="preflight_check", use_container_width=True):
+            reachable, preflight_message = ArgoCDClient(environment, token).preflight(max_age=0)
+            (st.success if reachable else st.error)(f"{'✅' if reachable else '❌'} {preflight_message}")
     else:
         st.warning("⚠️ 请输入 ArgoCD Token")
     
@@ -255,7 +439,35 @@ with st.sidebar:
         6. 粘贴到左侧输入框
         """)
     
+    # 生效的 Token 变化时（输入新 Token、切换环境后自动加载的 Token 不同）刷新整个页面
+    if token != st.session_state.get('argocd_token', ''):
+        st.session_state.argocd_token = token
+        st.rerun()
+    
     st.markdown("---")
+
+
+# 侧边栏配置
+with st.sidebar:
+    st.header("⚙️ 配置设置")
+    
+    # 环境选择
+    st.subheader("🌍 环境配置")
+    environment = st.selectbox(
+        "选择环境",
+        ArgoCDClient.list_environments(),
+        index=ArgoCDClient.list_environments().index(st.session_state.argocd_config.get('environment', 'preprod')),
+        key="environment_select"
+    )
+    
+    # 显示环境信息
+    env_config = ArgoCDClient.get_environment_config(environment)
+    if env_config:
+        st.info(f"🔗 服务器: {env_config['server']}")
+    
+    # 认证设置在局部重跑的片段中渲染，生效的 Token 保存在 session state
+    render_auth_settings(environment)
+    token = st.session_state.get('argocd_token', '')
     
     # 服务列表管理
     st.subheader("📋 服务列表")
@@ -297,6 +509,36 @@ with st.sidebar:
     # 去重
     services_list = list(dict.fromkeys(services_list))
     
+    # 使用缓存的服务目录在本地校验服务名（不存在的服务不会发送请求）
+    unresolved_services = {}
+    if token and services_list:
+        try:
+            catalog = get_service_catalog(ArgoCDClient(environment, token))
+            auto_correct = st.checkbox("🪄 自动纠正为建议的服务名", value=False, key="auto_correct_services",
+                                       help="大小写不同或高度相似的名称总是自动纠正；勾选后相似度较低的建议也会直接查询")
+            validated_services = []
+            for service in services_list:
+                resolution = catalog.resolve(service)
+                if resolution['status'] in ('exact', 'corrected'):
+                    validated_services.append(resolution['service'])
+                    if resolution['status'] == 'corrected':
+                        st.caption(f"🔤 {service} → {resolution['service']}")
+                elif resolution['status'] == 'suggested':
+                    hint = ", ".join(f"{name} ({score:.0%})" for name, score in resolution['suggestions'][:3])
+                    if auto_correct:
+                        validated_services.append(resolution['service'])
+                        st.warning(f"🪄 {service} → {resolution['service']}（候选: {hint}）")
+                    else:
+                        unresolved_services[service] = f"应用不存在: {service}，是否是: {hint}"
+                        st.warning(f"❓ {service} 不存在，是否是: {hint}")
+                else:
+                    unresolved_services[service] = f"应用不存在: {service}"
+                    st.error(f"❌ {service} 在 {environment} 中不存在")
+            services_list = list(dict.fromkeys(validated_services))
+            st.caption(f"📚 服务目录: {len(catalog)} 个服务（缓存于 {datetime.fromtimestamp(catalog.fetched_at).strftime('%H:%M:%S')}）")
+        except Exception as e:
+            st.caption(f"⚠️ 服务目录不可用，跳过本地校验: {e}")
+    
     st.info(f"📊 已选择 {len(services_list)} 个服务")
     
     st.markdown("---")
@@ -349,97 +591,135 @@ with col2:
         disabled=not (token and services_list)
     )
 
-# 执行查询
+# 预热缓存中有所选服务时，允许用户选择直接使用
+warm_count = len(get_warm_cache().get_images(environment, services_list, get_max_age())) if services_list else 0
+if warm_count:
+    st.checkbox(f"⚡ 使用预热缓存（{warm_count}/{len(services_list)} 个服务已预热）", value=True, key="use_warm_cache")
+
+# 执行查询（提交后台任务，页面轮询任务状态，查询期间可以切换标签或继续操作）
 if query_button:
     if not token:
         st.error("❌ 请先输入 ArgoCD Token")
     elif not services_list:
         st.error("❌ 请至少选择一个服务")
     else:
-        try:
-            # 创建客户端
-            client = ArgoCDClient(environment, token)
-            
-            # 显示查询进度
-            st.subheader(f"🔍 查询 {environment.upper()} 环境")
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            results = {
-                'success': {},
-                'failed': {},
-                'details': []
-            }
-            
-            # 查询每个服务
-            for i, service in enumerate(services_list):
-                status_text.text(f"正在查询: {service} ({i+1}/{len(services_list)})")
-                progress_bar.progress((i + 1) / len(services_list))
-                
-                try:
-                    images = client.get_service_images(service)
-                    results['success'].update(images)
-                    
-                    # 记录详细信息
-                    for svc, tag in images.items():
-                        results['details'].append({
-                            'service': svc,
-                            'version': tag,
-                            'status': '✅ 成功',
-                            'environment': environment.upper()
-                        })
-                        
-                except Exception as e:
-                    error_msg = str(e)
-                    results['failed'][service] = error_msg
-                    results['details'].append({
-                        'service': service,
-                        'version': 'N/A',
-                        'status': f'❌ {error_msg[:50]}...' if len(error_msg) > 50 else f'❌ {error_msg}',
-                        'environment': environment.upper()
-                    })
-            
-            # 执行对比（如果有上次结果）
-            comparison = None
-            if st.session_state.previous_results:
-                comparison = compare_results(results, st.session_state.previous_results)
-                st.session_state.comparison_data = comparison
-            
-            # 保存结果
-            st.session_state.previous_results = st.session_state.query_results  # 保存旧结果
-            st.session_state.query_results = results
-            st.session_state.last_query_time = datetime.now()
-            
-            # 清空进度显示
-            status_text.empty()
-            progress_bar.empty()
-            
-            # 显示成功提示
-            if comparison:
-                total_changes = len(comparison['added']) + len(comparison['updated']) + len(comparison['removed'])
-                if total_changes > 0:
-                    st.success(f"✅ 查询完成！发现 {total_changes} 个变化")
-                else:
-                    st.success(f"✅ 查询完成！无变化")
-            else:
-                st.success(f"✅ 查询完成！成功: {len(results['success'])}, 失败: {len(results['failed'])}")
-            
-        except Exception as e:
-            st.error(f"❌ 查询失败: {str(e)}")
+        previous_job = get_job_runner().get(st.session_state.get('query_job_id'))
+        if previous_job and not previous_job.finished:
+            previous_job.cancel()
+        job = get_job_runner().submit(
+            'argocd_query',
+            query_services_job,
+            ArgoCDClient(environment, token),
+            services_list,
+            dict(unresolved_services),
+            use_warm_cache=st.session_state.get('use_warm_cache', True),
+            description=f"{environment.upper()} · {len(services_list)} 个服务"
+        )
+        st.session_state.query_job_id = job.job_id
 
 
-# 显示查询结果
-if st.session_state.query_results:
+@st.fragment(run_every=1)
+def render_query_job():
+    """轮询后台查询任务，结束后写入结果并刷新整个页面（只在有任务 ID 时挂载，任务结束后停止轮询）"""
+    job = get_job_runner().get(st.session_state.get('query_job_id'))
+    if job is None:
+        st.session_state.pop('query_job_id', None)
+        st.rerun()
+    
+    if not job.finished:
+        st.subheader(f"🔍 查询 {job.description}")
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.progress(job.fraction, text=f"{job.message or '等待执行...'} ({job.done}/{job.total})")
+        with col2:
+            if st.button("⏹️ 取消查询", key="cancel_query", use_container_width=True):
+                job.cancel()
+        
+        # 已完成的服务按完成顺序实时显示（任务线程只追加，这里取一份副本）
+        partial = job.result
+        rows = list(partial['details']) if partial else []
+        if rows:
+            live_df = pd.DataFrame(rows)
+            latencies = pd.to_numeric(live_df['latency_ms'], errors='coerce').dropna()
+            if not latencies.empty:
+                st.caption(
+                    f"⏱️ 已返回 {len(latencies)} 个请求，中位耗时 {latencies.median():.0f} ms，"
+                    f"最慢 {latencies.max():.0f} ms（{live_df.loc[latencies.idxmax(), 'service']}）"
+                )
+            st.dataframe(live_df, use_container_width=True, hide_index=True)
+        return
+    
+    st.session_state.pop('query_job_id', None)
+    if job.status == Job.FAILED:
+        st.session_state.query_job_notice = ('error', f"❌ 查询失败: {job.error}")
+        st.rerun()
+    if job.result is None:
+        # 工作线程开始执行前就被取消（共享线程池繁忙时），没有任何结果，保留上一次的查询结果
+        st.session_state.query_job_notice = ('warning', "⏹️ 查询已在开始前取消，保留上一次的结果")
+        st.rerun()
+
+    results = job.result
+    # 执行对比：基线是部署快照库中本环境的上一次查询（任何会话、命令行或预热记录的），
+    # 快照库不可用时退回本会话的上次结果
+    baseline = results.get('baseline') or st.session_state.previous_results
+    comparison = compare_results(results, baseline) if job.status != Job.CANCELLED else None
+    st.session_state.comparison_data = comparison
+    
+    # 保存结果
+    st.session_state.previous_results = st.session_state.query_results  # 保存旧结果
+    st.session_state.query_results = results
+    st.session_state.last_query_time = datetime.now()
+    st.session_state.query_view = build_query_view(results, comparison, st.session_state.last_query_time)
+    
+    if job.status == Job.CANCELLED:
+        notice = ('warning', f"⏹️ 查询已取消，显示已完成的 {job.done}/{job.total} 个服务")
+    elif comparison:
+        counts = comparison['counts']
+        total_changes = counts['added'] + counts['updated'] + counts['removed']
+        if total_changes > 0:
+            notice = ('success', f"✅ 查询完成！发现 {total_changes} 个变化")
+        else:
+            notice = ('success', f"✅ 查询完成！无变化")
+    else:
+        notice = ('success', f"✅ 查询完成！成功: {len(results['success'])}, 失败: {len(results['failed'])}")
+    st.session_state.query_job_notice = notice
+    st.rerun()
+
+
+if 'query_job_id' in st.session_state:
+    render_query_job()
+
+query_notice = st.session_state.pop('query_job_notice', None)
+if query_notice:
+    getattr(st, query_notice[0])(query_notice[1])
+
+
+# 显示查询结果（局部重跑：展开变化列表、下载等操作只重跑结果区域）
+@st.fragment
+def render_query_results():
+    """渲染查询结果（表格和导出内容来自 build_query_view 的缓存）"""
     results = st.session_state.query_results
+    view = st.session_state.get('query_view')
+    if view is None:
+        view = st.session_state.query_view = build_query_view(
+            results, st.session_state.comparison_data, st.session_state.last_query_time or datetime.now()
+        )
+    environment = results.get('environment', '')
+    service_count = results.get('service_count', len(results['success']) + len(results['failed']))
     
     st.markdown("---")
     st.subheader("📊 查询结果")
+    if results.get('data_as_of'):
+        st.caption(
+            f"🕒 数据时间: {datetime.fromtimestamp(results['data_as_of']).strftime('%Y-%m-%d %H:%M:%S')}"
+            f"（{results['warm_services']} 个服务来自预热缓存）"
+        )
     
     # 统计信息
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("🎯 查询服务数", len(services_list))
+        st.metric("🎯 查询服务数", service_count)
     
     with col2:
         st.metric("✅ 成功", len(results['success']))
@@ -448,7 +728,7 @@ if st.session_state.query_results:
         st.metric("❌ 失败", len(results['failed']))
     
     with col4:
-        success_rate = len(results['success']) / len(services_list) * 100 if services_list else 0
+        success_rate = len(results['success']) / service_count * 100 if service_count else 0
         st.metric("📈 成功率", f"{success_rate:.1f}%")
     
     # 结果表格
@@ -458,52 +738,60 @@ if st.session_state.query_results:
         # 如果有对比数据，显示对比分析
         comparison = st.session_state.comparison_data
         if comparison:
-            total_changes = len(comparison['added']) + len(comparison['updated']) + len(comparison['removed'])
-            
+            counts = comparison['counts']
+            total_changes = counts['added'] + counts['updated'] + counts['removed']
+        
             if total_changes > 0:
                 st.markdown("#### 🔍 部署对比分析")
-                
+            
                 # 变化统计
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("🆕 新增", len(comparison['added']), delta=len(comparison['added']) if len(comparison['added']) > 0 else None)
+                    st.metric("🆕 新增", counts['added'], delta=counts['added'] if counts['added'] > 0 else None)
                 with col2:
-                    st.metric("🔄 更新", len(comparison['updated']), delta=len(comparison['updated']) if len(comparison['updated']) > 0 else None)
+                    st.metric("🔄 更新", counts['updated'], delta=counts['updated'] if counts['updated'] > 0 else None)
                 with col3:
-                    st.metric("✅ 不变", len(comparison['unchanged']))
+                    st.metric("✅ 不变", counts['unchanged'])
                 with col4:
-                    st.metric("🗑️ 移除", len(comparison['removed']), delta=-len(comparison['removed']) if len(comparison['removed']) > 0 else None, delta_color="inverse")
-                
+                    st.metric("🗑️ 移除", counts['removed'], delta=-counts['removed'] if counts['removed'] > 0 else None, delta_color="inverse")
+            
                 st.markdown("---")
-                
-                # 显示具体变化
-                if comparison['updated']:
-                    with st.expander(f"🔄 更新的服务 ({len(comparison['updated'])} 个)", expanded=True):
-                        for service, versions in sorted(comparison['updated'].items()):
-                            st.warning(f"""
-                            **{service}**  
-                            📜 之前: `{versions['previous']}`  
-                            🆕 现在: `{versions['current']}`
-                            """)
-                
-                if comparison['added']:
-                    with st.expander(f"🆕 新增的服务 ({len(comparison['added'])} 个)", expanded=False):
-                        for service, version in sorted(comparison['added'].items()):
-                            st.success(f"**{service}**: `{version}`")
-                
-                if comparison['removed']:
-                    with st.expander(f"🗑️ 移除的服务 ({len(comparison['removed'])} 个)", expanded=False):
-                        for service, version in sorted(comparison['removed'].items()):
-                            st.error(f"**{service}**: `{version}` (已移除)")
+            
+                # 显示具体变化（每类一张表，服务很多时也只渲染一个元素）
+                table = comparison['table']
+                if counts['updated']:
+                    with st.expander(f"🔄 更新的服务 ({counts['updated']} 个)", expanded=True):
+                        st.dataframe(
+                            table.loc[table['status'] == 'updated', ['service', 'previous', 'current']]
+                            .rename(columns={'service': '服务', 'previous': '📜 之前', 'current': '🆕 现在'}),
+                            use_container_width=True,
+                            hide_index=True
+                        )
+            
+                if counts['added']:
+                    with st.expander(f"🆕 新增的服务 ({counts['added']} 个)", expanded=False):
+                        st.dataframe(
+                            table.loc[table['status'] == 'added', ['service', 'current']]
+                            .rename(columns={'service': '服务', 'current': '版本'}),
+                            use_container_width=True,
+                            hide_index=True
+                        )
+            
+                if counts['removed']:
+                    with st.expander(f"🗑️ 移除的服务 ({counts['removed']} 个)", expanded=False):
+                        st.dataframe(
+                            table.loc[table['status'] == 'removed', ['service', 'previous']]
+                            .rename(columns={'service': '服务', 'previous': '版本'}),
+                            use_container_width=True,
+                            hide_index=True
+                        )
         
         # 显示数据表格（带高亮）
         st.markdown("#### 📋 完整服务列表")
-        df = pd.DataFrame(results['details'])
         
         # 如果有对比数据，应用高亮样式
         if comparison:
-            styled_df = df.style.apply(lambda row: highlight_comparison(row, comparison), axis=1)
-            st.dataframe(styled_df, use_container_width=True, hide_index=True)
+            st.dataframe(view['styled'] if view['styled'] is not None else view['df'], use_container_width=True, hide_index=True)
             
             # 添加图例说明
             st.markdown("""
@@ -511,41 +799,32 @@ if st.session_state.query_results:
             🟢 绿色 = 新增服务 | 🟡 黄色 = 版本更新 | 🔴 红色 = 已移除
             """)
         else:
-            st.dataframe(df, use_container_width=True, hide_index=True)
+            st.dataframe(view['df'], use_container_width=True, hide_index=True)
             st.info("💡 提示：再次查询后将显示与本次结果的对比")
         
-        # 导出功能
+        # 导出功能（下载不触发重跑）
         st.markdown("---")
         st.subheader("💾 导出数据")
         
         col1, col2 = st.columns(2)
         
         with col1:
-            # CSV 导出
-            csv = df.to_csv(index=False, encoding='utf-8-sig')
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             st.download_button(
                 "📥 下载 CSV",
-                csv,
-                f"argocd_images_{environment}_{timestamp}.csv",
+                view['csv'],
+                f"argocd_images_{environment}_{view['timestamp']}.csv",
                 "text/csv",
+                on_click="ignore",
                 use_container_width=True
             )
         
         with col2:
-            # JSON 导出
-            json_data = {
-                "environment": environment.upper(),
-                "query_time": st.session_state.last_query_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "results": results['success'],
-                "failed": results['failed']
-            }
-            json_str = json.dumps(json_data, ensure_ascii=False, indent=2)
             st.download_button(
                 "📥 下载 JSON",
-                json_str,
-                f"argocd_images_{environment}_{timestamp}.json",
+                view['json'],
+                f"argocd_images_{environment}_{view['timestamp']}.json",
                 "application/json",
+                on_click="ignore",
                 use_container_width=True
             )
     
@@ -559,6 +838,280 @@ if st.session_state.query_results:
                 st.error(f"**{service}**: {error}")
 
 
+if st.session_state.query_results:
+    render_query_results()
+
+
+# 部署快照（所有查询都记录在 results/snapshots.db，按 environment, service, queried_at 建索引）
+st.markdown("---")
+st.header("📈 部署快照")
+st.markdown("每次查询（页面、命令行、预热）都会记录到本地快照库，可以查看一段时间内的变化和各环境的最新标签。")
+
+
+@st.fragment
+def render_snapshot_view(environment):
+    """部署快照视图（局部重跑：切换环境和时间范围只重新执行快照查询）"""
+    snapshot_store = get_snapshot_store()
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        snapshot_environment = st.selectbox(
+            "环境",
+            ArgoCDClient.list_environments(),
+            index=ArgoCDClient.list_environments().index(environment),
+            key="snapshot_environment"
+        )
+    with col2:
+        snapshot_hours = st.number_input("最近多少小时", min_value=1, max_value=24 * 90, value=24, key="snapshot_hours")
+    
+    query_started = time.perf_counter()
+    snapshot_changes = snapshot_store.changes_since(snapshot_environment, time.time() - snapshot_hours * 3600)
+    latest_tags = snapshot_store.latest_tags()
+    snapshot_elapsed = (time.perf_counter() - query_started) * 1000
+    
+    tab_changes, tab_latest = st.tabs([
+        f"🔄 {snapshot_environment.upper()} 最近 {snapshot_hours} 小时的变化 ({len(snapshot_changes)})",
+        "🏷️ 各环境最新标签"
+    ])
+    with tab_changes:
+        if snapshot_changes:
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        '服务': item['service'],
+                        '之前': item['previous_tag'] or '（新增）',
+                        '现在': item['current_tag'],
+                        '首次查询到': datetime.fromtimestamp(item['changed_at']).strftime('%Y-%m-%d %H:%M:%S')
+                    }
+                    for item in snapshot_changes
+                ]),
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("该时间段内没有记录到标签变化")
+    with tab_latest:
+        if latest_tags:
+            latest_df = pd.DataFrame(latest_tags)
+            # 服务为行、环境为列
+            st.dataframe(
+                latest_df.pivot(index='service', columns='environment', values='tag').fillna(''),
+                use_container_width=True
+            )
+        else:
+            st.info("快照库中还没有记录，查询一次后即可查看")
+    st.caption(f"⏱️ 快照查询耗时 {snapshot_elapsed:.1f} ms")
+
+
+render_snapshot_view(environment)
+
+
+@st.fragment(run_every=1)
+def render_history_job():
+    """轮询部署历史任务，结束后保存结果并刷新页面（只在有任务 ID 时挂载）"""
+    job = get_job_runner().get(st.session_state.get('history_job_id'))
+    if job is None:
+        st.session_state.pop('history_job_id', None)
+        st.rerun()
+    if not job.finished:
+        st.progress(job.fraction, text=f"🔄 {job.description}: {job.message} ({job.done}/{job.total})")
+        if st.button("⏹️ 取消", key="cancel_history"):
+            job.cancel()
+        return
+    st.session_state.pop('history_job_id', None)
+    if job.status == Job.SUCCEEDED:
+        st.session_state.history_results = (job.description, job.result)
+    elif job.status == Job.FAILED:
+        st.session_state.history_error = job.error
+    st.rerun()
+
+
+# 部署历史（status.history 中每个 revision 的镜像标签）
+st.markdown("---")
+st.header("🕰️ 部署历史")
+st.markdown("按 ArgoCD 的部署历史解析每次部署的镜像标签，查看标签何时发生变化。")
+
+
+@st.fragment
+def render_history_section(environment, token, services_list):
+    """部署历史（局部重跑：选择服务、加载和查看历史不重跑整个页面）"""
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        history_services = st.multiselect(
+            "选择服务",
+            services_list,
+            default=services_list[:5],
+            key="history_services"
+        )
+    with col2:
+        history_depth = st.number_input("每个服务最多记录数", min_value=1, max_value=100, value=20, key="history_depth")
+    
+    if st.button("🕰️ 查看部署历史", key="load_history", disabled=not (token and history_services)):
+        job = get_job_runner().submit(
+            'argocd_history',
+            history_job,
+            ArgoCDClient(environment, token),
+            list(history_services),
+            int(history_depth),
+            description=f"{environment.upper()} · {len(history_services)} 个服务的部署历史"
+        )
+        st.session_state.history_job_id = job.job_id
+        # 轮询片段在页面主体中，需要整页重跑才能开始显示进度
+        st.rerun()
+    
+    if st.session_state.get('history_error'):
+        st.error(f"❌ 获取部署历史失败: {st.session_state.pop('history_error')}")
+    
+    if st.session_state.get('history_results'):
+        history_label, history_results = st.session_state.history_results
+        st.caption(history_label)
+        for service, timeline in history_results.items():
+            if isinstance(timeline, dict):
+                st.error(f"**{service}**: {timeline['error']}")
+                continue
+            changes = sum(1 for item in timeline if item['changed'])
+            with st.expander(f"📦 {service} — {len(timeline)} 次部署，{changes} 次标签变化", expanded=len(history_results) == 1):
+                st.dataframe(
+                    pd.DataFrame([
+                        {
+                            '部署时间': item['deployed_at'].replace('T', ' ').rstrip('Z'),
+                            '镜像标签': item['tag'] or 'N/A',
+                            '变化': '🔄' if item['changed'] else '',
+                            'revision': item['revision'][:10],
+                            '错误': item['error'] or ''
+                        }
+                        for item in timeline
+                    ]),
+                    use_container_width=True,
+                    hide_index=True
+                )
+
+
+render_history_section(environment, token, services_list)
+# 自动刷新的轮询片段放在页面主体中，不嵌套在历史区域的片段里；只在有任务时挂载
+if 'history_job_id' in st.session_state:
+    render_history_job()
+
+
+# 发布就绪检查（Jira 影响项目 -> ArgoCD 服务 -> 各环境镜像版本）
+st.markdown("---")
+st.header("🚦 发布就绪检查")
+st.markdown("使用 Jira 页面提取出的影响项目，映射为 ArgoCD 服务后并发查询各环境的镜像版本。")
+
+
+@st.fragment
+def render_readiness_section(token):
+    """发布就绪检查（局部重跑：编辑项目列表和服务映射不重跑整个页面）"""
+    jira_extraction = st.session_state.get('jira_extraction')
+    default_projects = "\n".join(jira_extraction['unique_projects']) if jira_extraction else ""
+    if jira_extraction:
+        st.success(f"✅ 已从 Jira 页面载入 {len(jira_extraction['unique_projects'])} 个影响项目")
+    
+    readiness_projects_text = st.text_area(
+        "Jira 影响项目（每行一个）",
+        value=default_projects,
+        height=120,
+        key="readiness_projects"
+    )
+    readiness_envs = st.multiselect(
+        "查询环境",
+        ArgoCDClient.list_environments(),
+        default=ArgoCDClient.list_environments(),
+        key="readiness_envs"
+    )
+    
+    with st.expander("🔗 项目 -> 服务映射"):
+        service_mappings = load_service_mappings()
+        mapping_text = st.text_area(
+            "每行一条: 项目 = 服务1, 服务2（服务留空表示该项目不部署到 ArgoCD）",
+            value="\n".join(f"{source} = {', '.join(targets)}" for source, targets in service_mappings.items()),
+            height=150,
+            key="service_mapping_text"
+        )
+        if st.button("💾 保存映射", key="save_service_mapping"):
+            new_mappings = {}
+            for line in mapping_text.splitlines():
+                if '=' in line:
+                    source, targets = line.split('=', 1)
+                    if source.strip():
+                        new_mappings[source.strip()] = [t.strip() for t in targets.split(',') if t.strip()]
+            if save_service_mappings(new_mappings):
+                st.success("✅ 服务映射已保存")
+                service_mappings = new_mappings
+    
+    readiness_projects = collect_projects([p for p in readiness_projects_text.splitlines() if p.strip()])
+    readiness_services = map_projects_to_services(readiness_projects, service_mappings)
+    st.info(f"📊 {len(readiness_projects)} 个项目 → {len(readiness_services)} 个服务")
+    
+    if st.button("🚦 一键检查发布就绪", type="primary", key="run_readiness", disabled=not (token and readiness_services and readiness_envs)):
+        # 每个环境优先使用 CLI 配置中对应服务器的 token，否则使用侧边栏的 token
+        readiness_tokens = {
+            env: try_load_token_from_cli(env, fallback_first=False) or token
+            for env in readiness_envs
+        }
+        previous_job = get_job_runner().get(st.session_state.get('readiness_job_id'))
+        if previous_job and not previous_job.finished:
+            previous_job.cancel()
+        job = get_job_runner().submit(
+            'release_readiness',
+            readiness_job,
+            readiness_tokens,
+            list(readiness_envs),
+            service_mappings,
+            readiness_projects,
+            description=f"{len(readiness_services)} 个服务 × {len(readiness_envs)} 个环境"
+        )
+        st.session_state.readiness_job_id = job.job_id
+        # 轮询片段在页面主体中，需要整页重跑才能开始显示进度
+        st.rerun()
+    
+    readiness_notice = st.session_state.pop('readiness_notice', None)
+    if readiness_notice:
+        getattr(st, readiness_notice[0])(readiness_notice[1])
+    
+    if st.session_state.get('readiness_rows'):
+        readiness_df = pd.DataFrame(st.session_state.readiness_rows)
+        st.caption(f"检查时间: {st.session_state.readiness_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        st.dataframe(readiness_df, use_container_width=True, hide_index=True)
+        st.download_button(
+            "📥 下载就绪表 CSV",
+            readiness_df.to_csv(index=False, encoding='utf-8-sig'),
+            f"release_readiness_{st.session_state.readiness_time.strftime('%Y%m%d_%H%M%S')}.csv",
+            "text/csv",
+            on_click="ignore",
+            key="download_readiness"
+        )
+
+
+@st.fragment(run_every=1)
+def render_readiness_job():
+    """轮询发布就绪检查任务，结束后保存就绪表并刷新页面（只在有任务 ID 时挂载）"""
+    job = get_job_runner().get(st.session_state.get('readiness_job_id'))
+    if job is None:
+        st.session_state.pop('readiness_job_id', None)
+        st.rerun()
+    if not job.finished:
+        st.progress(job.fraction, text=f"🔄 正在检查 {job.description}: {job.message or '等待执行...'} ({job.done}/{job.total})")
+        if st.button("⏹️ 取消", key="cancel_readiness"):
+            job.cancel()
+        return
+    st.session_state.pop('readiness_job_id', None)
+    if job.status == Job.SUCCEEDED:
+        st.session_state.readiness_rows = job.result
+        st.session_state.readiness_time = datetime.now()
+    elif job.status == Job.CANCELLED:
+        st.session_state.readiness_notice = ('warning', "⏹️ 就绪检查已取消，保留上一次的结果")
+    else:
+        st.session_state.readiness_notice = ('error', f"❌ 就绪检查失败: {job.error}")
+    st.rerun()
+
+
+render_readiness_section(token)
+if 'readiness_job_id' in st.session_state:
+    render_readiness_job()
+
+render_diagnostics_panel('argocd')
+
+
 # 使用说明
 st.markdown("---")
 with st.expander("📖 使用说明和最佳实践"):
@@ -616,3 +1169,4 @@ st.markdown("""
     st.session_state.last_query_time.strftime("%Y-%m-%d %H:%M:%S") if st.session_state.last_query_time else "未查询"
 ), unsafe_allow_html=True)
 
+get_metrics_registry().observe('stage_duration_seconds', time.perf_counter() - render_started, client='argocd', stage='render')